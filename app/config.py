@@ -9,6 +9,70 @@ class Settings(BaseSettings):
     ALGORITHM : str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES : int = 60 * 24 * 7  # 7 days
     
+    # Stateless auth: short-lived access tokens carrying role and status, renewed with rotating refresh tokens
+    STATELESS_AUTH : bool = False
+    CLAIMS_TOKEN_EXPIRE_MINUTES : int = 5
+    REFRESH_TOKEN_EXPIRE_DAYS : int = 30
+    
+    # Revoked access tokens: Bloom filter size and false-positive rate, how often to pick up other processes' revocations,
+    # and how often to delete issued and revoked token rows that have expired
+    TOKEN_REVOCATION_CAPACITY : int = 100000
+    TOKEN_REVOCATION_ERROR_RATE : float = 0.001
+    TOKEN_REVOCATION_SYNC_SECONDS : float = 5.0
+    TOKEN_PRUNE_SECONDS : float = 3600.0
+    
+    # Cached authorization fields per user; see app/principals.py
+    PRINCIPAL_CACHE_SIZE : int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS : float = 60.0
+    
+    # Server-Sent Events: reconnect delay, keep-alive interval, per-board resume buffer, per-client queue
+    SSE_RETRY_MS : int = 3000
+    SSE_HEARTBEAT_SECONDS : float = 15.0
+    SSE_BUFFER_SIZE : int = 500
+    SSE_QUEUE_SIZE : int = 100
+    # Browsers' EventSource can't send Authorization, so streams accept a ticket in the URL valid this long
+    SSE_TICKET_SECONDS : int = 60
+    
+    # Full-text search ranks matches in windows of this many recent posts, using term statistics cached this long
+    SEARCH_CANDIDATE_LIMIT : int = 250
+    SEARCH_STATS_TTL_SECONDS : float = 300.0
+    
+    # Crisis screening of new posts: worker threads, queue bound, backlog sweep interval, attempts before giving up,
+    # and how long a claimed job stays with its process before another may take it back
+    SCREENING_WORKERS : int = 2
+    SCREENING_QUEUE_SIZE : int = 1000
+    SCREENING_SWEEP_SECONDS : float = 30.0
+    SCREENING_MAX_ATTEMPTS : int = 3
+    SCREENING_LEASE_SECONDS : float = 300.0
+    
+    # bcrypt runs in this many processes; more calls than workers + queue limit get a 429
+    PASSWORD_HASH_WORKERS : int = 2
+    PASSWORD_HASH_QUEUE_LIMIT : int = 16
+    
+    # Audit entries are written behind the request in batches of up to AUDIT_BATCH_SIZE, at least every
+    # AUDIT_FLUSH_SECONDS; past AUDIT_MAX_PENDING buffered entries the request thread flushes them itself
+    AUDIT_BUFFERED : bool = True
+    AUDIT_BATCH_SIZE : int = 200
+    AUDIT_FLUSH_SECONDS : float = 1.0
+    AUDIT_MAX_PENDING : int = 10000
+    # archive-audit-log moves entries older than this many days into compressed daily files under this directory
+    AUDIT_RETENTION_DAYS : int = 90
+    AUDIT_ARCHIVE_DIR : str = "./audit_archive"
+    
+    # Deleted accounts' content is redacted in batches of this many rows, each its own transaction, pausing
+    # between batches so other writers get the database; idle workers look for new jobs this often. A job whose
+    # worker hasn't committed a batch for ANONYMIZATION_LEASE_SECONDS may be taken over by another process
+    ANONYMIZATION_BATCH_SIZE : int = 500
+    ANONYMIZATION_BATCH_PAUSE_SECONDS : float = 0.05
+    ANONYMIZATION_POLL_SECONDS : float = 30.0
+    ANONYMIZATION_LEASE_SECONDS : float = 300.0
+    ANONYMIZATION_MAX_ATTEMPTS : int = 3
+    
+    # /metrics under several worker processes: each writes its metrics to this directory (empty it before
+    # starting them) this often, and a scrape of any worker sums them. Unset for a single process.
+    METRICS_MULTIPROCESS_DIR : str = ""
+    METRICS_SYNC_SECONDS : float = 1.0
+    
     # CORS configuration - comma-separated list of allowed origins
     CORS_ORIGINS : str = "http://localhost:3000,http://localhost:5173,http://127.0.0.1:3000,http://127.0.0.1:5173"
     
@@ -4,10 +4,13 @@ Shared constants for the LEN application.
 These constants are used across multiple modules to ensure consistency
 and centralize configuration that may need to be updated.
 """
+from typing import List
+
+from .keyword_matcher import KeywordMatch, KeywordMatcher
 
 # Crisis detection keywords
 # These keywords trigger automatic crisis escalation when detected in posts.
-# Keep in sync with frontend/src/utils/constants.js for client-side detection.
+# POST /posts/ reports a match as crisis_detected, so clients don't keep their own copy.
 CRISIS_KEYWORDS = [
     'end it all',
     'ending it',
@@ -22,14 +25,39 @@ CRISIS_KEYWORDS = [
 ]
 
 
+# Compiled once; scans a post in one pass however long the keyword list grows.
+CRISIS_MATCHER = KeywordMatcher(CRISIS_KEYWORDS)
+
+
 def detect_crisis(content: str) -> bool:
     """Check if content contains crisis-indicating keywords.
     
+    Keywords match whole words, case-insensitively.
+    
     Args:
         content: The text content to analyze.
         
     Returns:
         True if any crisis keyword is found, False otherwise.
     """
-    content_lower = content.lower()
-    return any(keyword in content_lower for keyword in CRISIS_KEYWORDS)
+    return CRISIS_MATCHER.search(content)
+
+
+def find_crisis_keywords(content: str) -> List[KeywordMatch]:
+    """Return every crisis keyword found in content with its character span.
+    
+    Args:
+        content: The text content to analyze.
+        
+    Returns:
+        The matches in the order they end in the text; empty if none.
+    """
+    return CRISIS_MATCHER.find_all(content)
+
+
+# Pagination limits shared by the cursor-paged list endpoints.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Reporter ids kept on a report cluster; report_count keeps counting past it
+REPORT_CLUSTER_MAX_REPORTERS = 100
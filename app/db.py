@@ -1,8 +1,52 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import Pool
+from . import metrics
 from .config import settings
 
+# Route label for statements run outside a request: startup, background workers, maintenance commands
+BACKGROUND_ROUTE = "background"
+# SQLite statements mostly take tens to hundreds of microseconds
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+statements_total = metrics.registry.counter(
+    "db_statements_total", "SQL statements executed, by the route that ran them", labelnames=("route",))
+statement_seconds = metrics.registry.histogram(
+    "db_statement_duration_seconds", "SQL statement execution time, by the route that ran them",
+    buckets=DB_BUCKETS, labelnames=("route",))
+pool_checkouts = metrics.registry.counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool")
+pool_wait_seconds = metrics.registry.histogram(
+    "db_pool_wait_seconds", "Time to get a connection from the pool", buckets=DB_BUCKETS)
+commit_seconds = metrics.registry.histogram(
+    "db_commit_duration_seconds", "Session commit time, including the final flush", buckets=DB_BUCKETS)
+
+
+def instrument_pool_waits(engine: Engine) -> None:
+    """
+    Time how long connections take to come out of engine's pool. There is no event
+    before a checkout, so this wraps raw_connection, which every Connection goes through.
+    """
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        started = perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            pool_wait_seconds.observe(perf_counter() - started)
+
+    engine.raw_connection = timed_raw_connection
+
+
 engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}, )
+instrument_pool_waits(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -12,4 +56,72 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+class StatementCounter:
+    """Number of SQL statements executed while the counter was active, and how long each took."""
+
+    def __init__(self):
+        self.count = 0
+        self.durations: List[float] = []
+
+
+_statement_counter: ContextVar[Optional[StatementCounter]] = ContextVar("statement_counter", default=None)
+
+
+@contextmanager
+def count_statements():
+    """Count SQL statements run in this context, including sync endpoints on the threadpool."""
+    counter = StatementCounter()
+    token = _statement_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _statement_counter.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _statement_counter.get()
+    if counter is not None:
+        counter.count += 1
+    if context is not None:
+        context._metrics_started = perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _time_statement(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = perf_counter() - started
+    counter = _statement_counter.get()
+    if counter is not None:
+        # Recorded against the request's route once it has finished; see app/instrumentation.py
+        counter.durations.append(elapsed)
+    else:
+        statements_total.labels(BACKGROUND_ROUTE).inc()
+        statement_seconds.labels(BACKGROUND_ROUTE).observe(elapsed)
+
+
+@event.listens_for(Pool, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_checkouts.inc()
+
+
+@event.listens_for(Session, "before_commit")
+def _start_commit_timer(session):
+    session.info["commit_started"] = perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _stop_commit_timer(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        commit_seconds.observe(perf_counter() - started)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_commit_timer(session, previous_transaction):
+    session.info.pop("commit_started", None)
@@ -6,14 +6,15 @@ from jose import JWTError, jwt
 from .db import get_db 
 from . import models
 from .config import settings
+from .principals import Principal, principal_cache
+from .revocation import revocation_list
+from .services.token_service import principal_from_claims, read_stream_ticket
 
 security = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db),
-):
+def _token_payload(credentials: Optional[HTTPAuthorizationCredentials], db: Session) -> dict:
+    """Return the claims of a valid, unrevoked bearer token, or raise 401."""
     # Primary authentication via JWT token
     if not credentials:
         raise HTTPException(
@@ -34,19 +35,85 @@ def get_current_user(
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        payload["sub"] = int(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
-    
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
-    if user is None:
+    jti = payload.get("jti")
+    if jti is not None and revocation_list.is_revoked(db, jti):
         raise credentials_exception
-    
+    return payload
+
+
+def _load_user(db: Session, user_id: int) -> models.User:
+    """Load the user and refresh their cached principal, or raise 401."""
+    generation = principal_cache.generation
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    principal_cache.put(Principal.from_user(user), generation)
+    return user
+
+
+def _require_active(user):
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is deleted")
-    
     return user
 
 
+def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: Session = Depends(get_db),
+):
+    """The signed-in user as an ORM object, for endpoints that read or change the account itself."""
+    user = _load_user(db, _token_payload(credentials, db)["sub"])
+    return _require_active(user)
+
+
+def get_current_principal(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """
+    The signed-in user's id, role and status. With STATELESS_AUTH these come
+    from the token's claims; otherwise from the principal cache when possible.
+    """
+    payload = _token_payload(credentials, db)
+    if settings.STATELESS_AUTH:
+        principal = principal_from_claims(payload)
+        if principal is not None:
+            return _require_active(principal)
+    user_id = payload["sub"]
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        principal = Principal.from_user(_load_user(db, user_id))
+    return _require_active(principal)
+
+
+def get_stream_principal(
+    board_id: int,
+    ticket: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """
+    The user opening a board's event stream, from a ?ticket= issued for that board
+    (see token_service.create_stream_ticket) or, for clients that can send one, a bearer token.
+    """
+    if ticket is None:
+        return get_current_principal(credentials, db)
+    user_id = read_stream_ticket(ticket, board_id)
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired stream ticket")
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        principal = Principal.from_user(_load_user(db, user_id))
+    return _require_active(principal)
+
+
 def require_moderator(current_user: models.User):
     if current_user.role not in {models.UserRole.MODERATOR, models.UserRole.ADMIN}:
         raise HTTPException(status_code=403, detail="Moderator access required")
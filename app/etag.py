@@ -0,0 +1,39 @@
+"""
+Helpers for ETag / If-None-Match conditional GETs.
+
+Endpoints derive a validator from cheap version data (a counter row or a
+small aggregate) before running their main query, so an unchanged resource
+is answered with 304 Not Modified without loading or serializing anything.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that identify one representation."""
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value matches etag (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def set_validator(response: Response, etag: str) -> None:
+    """Attach the ETag and ask clients to revalidate instead of reusing silently."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validator(response, etag)
+    return response
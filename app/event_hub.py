@@ -0,0 +1,177 @@
+"""
+In-process fan-out of board events to Server-Sent Events streams.
+
+Services publish after their transaction commits, usually from a
+threadpool worker. Each connected client is an asyncio queue drained by
+its streaming response, so idle connections cost a coroutine rather than
+a thread. Recent events are kept per board so a reconnecting client can
+resume from its Last-Event-ID. If those events have already been dropped,
+the client gets a ``reset`` event and should refetch the feed.
+
+Events only reach clients connected to the same process.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+from . import schemas
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BoardEvent:
+    id: str
+    seq: int
+    event: str
+    data: dict
+
+    def encode(self) -> str:
+        return f"id: {self.id}\nevent: {self.event}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class Subscription:
+    """One connected client: a bounded queue owned by the client's event loop."""
+
+    def __init__(self, board_id: int, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.board_id = board_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def push(self, event: BoardEvent) -> None:
+        """Runs on the subscriber's loop. A client that can't keep up is cut off and resumes later."""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventHub:
+    def __init__(self, buffer_size: int, queue_size: int):
+        # Event ids carry the hub's start time so ids from a previous process are never mistaken for ours
+        self.epoch = str(int(time.time() * 1000))
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._buffers: Dict[int, Deque[BoardEvent]] = {}
+        # Highest seq dropped from each board's buffer; older positions can't be resumed
+        self._evicted: Dict[int, int] = {}
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._buffer_size = buffer_size
+        self._queue_size = queue_size
+
+    def publish(self, board_id: Optional[int], event: str, data: dict) -> None:
+        """Record an event for a board and hand it to every subscriber. Safe to call from any thread."""
+        if board_id is None:
+            return
+        with self._lock:
+            seq = next(self._seq)
+            board_event = BoardEvent(id=f"{self.epoch}-{seq}", seq=seq, event=event, data=data)
+            buffer = self._buffers.setdefault(board_id, deque())
+            if len(buffer) >= self._buffer_size:
+                self._evicted[board_id] = buffer.popleft().seq
+            buffer.append(board_event)
+            subscribers = list(self._subscribers.get(board_id, ()))
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.push, board_event)
+            except RuntimeError:
+                # The subscriber's loop has closed; it will be removed when its stream ends
+                pass
+
+    def subscribe(self, board_id: int, last_event_id: Optional[str] = None) -> Tuple[Subscription, List[BoardEvent], bool]:
+        """
+        Register a subscriber on the running loop.
+        Returns the subscription, buffered events newer than last_event_id,
+        and whether the client must reset because its position can't be resumed.
+        """
+        sub = Subscription(board_id, asyncio.get_running_loop(), self._queue_size)
+        with self._lock:
+            self._subscribers.setdefault(board_id, set()).add(sub)
+            buffered = list(self._buffers.get(board_id, ()))
+            evicted_upto = self._evicted.get(board_id, 0)
+        if not last_event_id:
+            return sub, [], False
+        last_seq = self._parse_seq(last_event_id)
+        if last_seq is None or last_seq < evicted_upto:
+            return sub, [], True
+        return sub, [e for e in buffered if e.seq > last_seq], False
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(sub.board_id)
+            if subscribers is not None:
+                subscribers.discard(sub)
+                if not subscribers:
+                    del self._subscribers[sub.board_id]
+
+    def subscriber_count(self, board_id: Optional[int] = None) -> int:
+        with self._lock:
+            if board_id is not None:
+                return len(self._subscribers.get(board_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+    async def stream(self, board_id: int, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield SSE frames for a board until the client disconnects or falls too far behind."""
+        sub, backlog, reset = self.subscribe(board_id, last_event_id)
+        try:
+            yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+            if reset:
+                yield "event: reset\ndata: {}\n\n"
+            for event in backlog:
+                yield event.encode()
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    # Overflowed; closing lets the client reconnect with its Last-Event-ID
+                    return
+                yield event.encode()
+        finally:
+            self.unsubscribe(sub)
+
+    def _parse_seq(self, last_event_id: str) -> Optional[int]:
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+
+hub = EventHub(buffer_size=settings.SSE_BUFFER_SIZE, queue_size=settings.SSE_QUEUE_SIZE)
+
+
+def publish(board_id: Optional[int], event: str, data: dict) -> None:
+    """Publish without ever failing the caller; the write it describes has already committed."""
+    try:
+        hub.publish(board_id, event, data)
+    except Exception:
+        logger.exception("Failed to publish %s event for board %s", event, board_id)
+
+
+def publish_post_created(post) -> None:
+    if post.group_id is None:
+        return
+    try:
+        data = schemas.PostRead.model_validate(post).model_dump(mode="json")
+    except Exception:
+        logger.exception("Failed to serialize post %s for its board stream", getattr(post, "id", None))
+        return
+    publish(post.group_id, "post_created", data)
+
+
+def publish_post_deleted(post) -> None:
+    publish(post.group_id, "post_deleted", {"id": post.id})
@@ -1,19 +1,69 @@
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateIndex
+
 from app.db import engine, Base, SessionLocal
-from app.models import User, Post, Report, CrisisTicket, AuditLogEntry, ConditionBoard, UserRole
-from app.services.board_service import seed_initial_boards
+from app.models import User, Post, Report, CrisisTicket, AuditLogEntry, ConditionBoard, UserRole, BoardStats, ReportCluster, ModerationCounter
+from app.services.cluster_service import rebuild_clusters
+from app.services.summary_service import reconcile
+from app.services.board_service import seed_initial_boards, rebuild_board_stats
+from app.services.search_service import ensure_search_index
 from app.services.account_service import hash_password
 
 
+def ensure_columns():
+    """
+    create_all doesn't alter existing tables either, so add columns a model gained since
+    its table was created. Such columns must be nullable.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+
+
+def ensure_indexes():
+    """
+    create_all only builds indexes for new tables, so add any missing ones to existing tables.
+    IF NOT EXISTS rather than checkfirst, since reflection skips expression indexes like ix_users_directory.
+    """
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+
 # Create all tables
 def init_db():
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    ensure_columns()
+    ensure_indexes()
+    if ensure_search_index(engine):
+        print("Built post search index")
     print("Database tables created.")
     # Seed boards if empty
     db = SessionLocal()
     try:
         # Seed boards
         seed_initial_boards(db)
+        # Databases created before board counters existed start with an empty stats table
+        if db.query(BoardStats).count() == 0:
+            rebuild_board_stats(db)
+            print("Built board statistics")
+        # Likewise, reports filed before clustering existed aren't in any cluster yet
+        if db.query(ReportCluster).count() == 0:
+            built = rebuild_clusters(db)
+            if built:
+                print(f"Built {built} report clusters")
+        if db.query(ModerationCounter).count() == 0:
+            reconcile(db)
+            print("Built moderation counters")
         # Seed initial users
         initial_users = [
             {
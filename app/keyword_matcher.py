@@ -0,0 +1,114 @@
+"""
+Multi-phrase keyword matching with an Aho-Corasick automaton over words.
+
+Text is split into words (runs of letters and digits, case-folded) and the
+automaton steps once per word, so a post is scanned in a single pass no
+matter how many phrases are registered. Posts that contain none of the
+phrases' first words, which is nearly all of them, are rejected with one
+set check before the automaton runs. Phrases only ever match whole words:
+"ending it" matches "I keep thinking about ending it" but not
+"pending items". Phrases are matched by their words, so punctuation and
+spacing between them don't matter.
+
+Scripts written without spaces between words (Chinese, Japanese, Thai)
+are seen as one long word per run and need phrases that cover the run.
+"""
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+_WORD = re.compile(r"[^\W_]+")
+# Splitting ASCII text with str.translate gives the same words as _WORD several times faster
+_ASCII_SEPARATORS = str.maketrans({chr(c): " " for c in range(128) if not chr(c).isalnum()})
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    keyword: str
+    start: int
+    end: int
+
+
+def _split(text: str) -> List[str]:
+    if text.isascii():
+        return text.translate(_ASCII_SEPARATORS).split()
+    return _WORD.findall(text)
+
+
+def _words(text: str) -> List[str]:
+    return [word.casefold() for word in _split(text)]
+
+
+class KeywordMatcher:
+    """Compiled matcher for a fixed set of phrases. Build once and reuse; matching is thread-safe."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Phrases ending at each state, with their length in words
+        self._output: List[List[Tuple[str, int]]] = [[]]
+
+        for keyword in keywords:
+            words = _words(keyword)
+            if not words:
+                raise ValueError(f"Keyword has no words to match: {keyword!r}")
+            state = 0
+            for word in words:
+                next_state = self._goto[state].get(word)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][word] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append((keyword, len(words)))
+        # A text containing none of these can't match anything
+        self._first_words = frozenset(self._goto[0])
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                if self._fail[child] == child:
+                    self._fail[child] = 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def finditer(self, text: str) -> Iterator[KeywordMatch]:
+        """Yield every phrase occurrence in text, including overlapping ones, in order of where they end."""
+        folded = text.casefold()
+        if len(folded) == len(text):
+            source, words = folded, _split(folded)
+        else:
+            # Folding changed the length (e.g. "ß" -> "ss"); offsets must refer to text, so fold word by word
+            source, words = text, _words(text)
+        if self._first_words.isdisjoint(words):
+            return
+
+        goto, fail, output = self._goto, self._fail, self._output
+        spans = None
+        state = 0
+        for index, word in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            if output[state]:
+                if spans is None:
+                    spans = [match.span() for match in _WORD.finditer(source)]
+                for keyword, length in output[state]:
+                    yield KeywordMatch(keyword, spans[index - length + 1][0], spans[index][1])
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        return list(self.finditer(text))
+
+    def search(self, text: str) -> bool:
+        """True if any phrase occurs in text. Stops at the first match."""
+        return next(self.finditer(text), None) is not None
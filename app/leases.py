@@ -0,0 +1,66 @@
+"""
+Ownership of claimed background jobs.
+
+A worker that claims a job stamps it with its owner id (host and pid) and
+the claim time, and refreshes the claim time as it makes progress. Another
+process only takes a RUNNING job back once that lease has run out or the
+owner is a process on the same host that has exited, so a restart of one
+worker process doesn't pull jobs out from under its siblings. A recycled
+pid looks alive, which only delays reclaiming until the lease runs out.
+"""
+import os
+import socket
+from typing import List, Optional
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+
+def owner_id() -> str:
+    """Identify this process; computed per call so forked workers don't share their parent's id."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def owner_gone(owner: Optional[str]) -> bool:
+    """True if owner was a process on this host that has exited. Owners on other hosts are left to their lease."""
+    if not owner:
+        # Claimed before jobs recorded an owner
+        return True
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    return not process_alive(int(pid))
+
+
+def reclaim_expired(db: Session, model, running, pending, lease_seconds: float, now: float) -> List[int]:
+    """
+    Return RUNNING jobs of model whose lease ran out or whose owner is gone to PENDING and commit.
+    Each job is only reset if its claim hasn't changed since it was read, so a job another process
+    reclaimed and claimed again in the meantime is left alone. Returns the reclaimed job ids.
+    """
+    claims = db.query(model.id, model.claimed_by, model.claimed_at).filter(model.status == running).all()
+    reclaimed = []
+    for job_id, claimed_by, claimed_at in claims:
+        if claimed_at is not None and claimed_at > now - lease_seconds and not owner_gone(claimed_by):
+            continue
+        unchanged = and_(
+            model.claimed_by.is_(None) if claimed_by is None else model.claimed_by == claimed_by,
+            model.claimed_at.is_(None) if claimed_at is None else model.claimed_at == claimed_at,
+        )
+        updated = db.query(model).filter(model.id == job_id, model.status == running, unchanged).update(
+            {model.status: pending, model.updated_at: now}, synchronize_session=False,
+        )
+        if updated:
+            reclaimed.append(job_id)
+    db.commit()
+    return reclaimed
@@ -1,9 +1,16 @@
 #quick setup using fastapi and taking in the given routers. depending on commit version not all routers may be prsent yet
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from . import instrumentation, metrics
 from .routers import accounts, posts, moderation, crisis, boards
 from .init_db import init_db
 from .config import settings
+from .db import SessionLocal, count_statements
+from .revocation import revocation_list
+from .services import anonymization_service, audit_service, hashing_service, screening_service
 
 app = FastAPI(
     title="LEN - Community Support Backend",
@@ -20,6 +27,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Records request and SQL metrics for /metrics, and reports how many SQL statements each
+# request ran, so N+1 regressions show up in tests
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    instrumentation.requests_in_flight.inc()
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        with count_statements() as counter:
+            response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        instrumentation.requests_in_flight.dec()
+        instrumentation.record_request(request, status_code, time.perf_counter() - started, counter)
+    if settings.ENV == "development":
+        response.headers["X-SQL-Statements"] = str(counter.count)
+    return response
+
 #including the routers here
 app.include_router(accounts.router, prefix="/accounts", tags=["accounts"])
 app.include_router(posts.router, prefix="/posts", tags=["posts"])
@@ -40,7 +65,30 @@ def root():
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    """Metrics in the Prometheus text format, summed over every worker process."""
+    return PlainTextResponse(metrics.render(instrumentation.collect()),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.on_event("startup")
 def startup_event():
     # Ensure tables exist and seed boards
-    init_db()
\ No newline at end of file
+    init_db()
+    db = SessionLocal()
+    try:
+        revocation_list.load(db)
+    finally:
+        db.close()
+    screening_service.service.start()
+    audit_service.writer.start()
+    anonymization_service.service.start()
+    instrumentation.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    screening_service.service.stop()
+    anonymization_service.service.stop()
+    audit_service.writer.stop()
+    hashing_service.pool.shutdown()
+    instrumentation.stop()
@@ -0,0 +1,102 @@
+"""
+Operator maintenance commands.
+
+Usage:
+    python -m app.maintenance rebuild-board-stats
+    python -m app.maintenance rebuild-search-index
+    python -m app.maintenance reconcile-moderation-counters
+    python -m app.maintenance archive-audit-log
+    python -m app.maintenance run-anonymization-jobs
+    python -m app.maintenance prune-expired-tokens
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.db import SessionLocal
+from app.revocation import prune_expired
+from app.services import anonymization_service, archive_service, board_service, search_service, summary_service
+
+
+def rebuild_board_stats():
+    """Recompute the per-board post counters and print any drift that was corrected."""
+    db = SessionLocal()
+    try:
+        drifted = board_service.rebuild_board_stats(db)
+        for board_id, old_count, new_count in drifted:
+            print(f"Board {board_id}: post_count {old_count} -> {new_count}")
+        print(f"Board statistics rebuilt ({len(drifted)} boards corrected)")
+    finally:
+        db.close()
+
+
+def rebuild_search_index():
+    """Refill the post full-text index from the posts table."""
+    db = SessionLocal()
+    try:
+        count = search_service.rebuild_index(db)
+        print(f"Search index rebuilt ({count} active posts)")
+    finally:
+        db.close()
+
+
+def reconcile_moderation_counters():
+    """Recompute the moderation dashboard counters and print any drift that was corrected."""
+    db = SessionLocal()
+    try:
+        drifted = summary_service.reconcile(db)
+        for name, day, old_value, new_value in drifted:
+            print(f"{name} {day or 'total'}: {old_value} -> {new_value}")
+        print(f"Moderation counters reconciled ({len(drifted)} counters corrected)")
+    finally:
+        db.close()
+
+
+def archive_audit_log():
+    """Move audit entries older than AUDIT_RETENTION_DAYS into compressed segment files."""
+    older_than = (datetime.now() - timedelta(days=settings.AUDIT_RETENTION_DAYS)).timestamp()
+    db = SessionLocal()
+    try:
+        segments = archive_service.archive_audit_log(db, older_than)
+        for segment in segments:
+            print(f"{segment.path}: {segment.entry_count} entries")
+        print(f"Audit log archived ({sum(s.entry_count for s in segments)} entries in {len(segments)} segments)")
+    finally:
+        db.close()
+
+
+def run_anonymization_jobs():
+    """Redact the content of deleted accounts whose anonymization jobs are still pending."""
+    finished = anonymization_service.run_pending(SessionLocal)
+    print(f"Anonymization jobs finished: {finished}")
+
+
+def prune_expired_tokens():
+    """Delete issued and revoked token rows whose tokens have expired."""
+    db = SessionLocal()
+    try:
+        issued, revoked = prune_expired(db)
+        print(f"Expired tokens pruned ({issued} issued, {revoked} revoked)")
+    finally:
+        db.close()
+
+
+COMMANDS = {
+    "rebuild-board-stats": rebuild_board_stats,
+    "rebuild-search-index": rebuild_search_index,
+    "reconcile-moderation-counters": reconcile_moderation_counters,
+    "archive-audit-log": archive_audit_log,
+    "run-anonymization-jobs": run_anonymization_jobs,
+    "prune-expired-tokens": prune_expired_tokens,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LEN maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+    COMMANDS[args.command]()
+
+
+if __name__ == "__main__":
+    main()
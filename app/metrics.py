@@ -0,0 +1,366 @@
+"""
+Process-local counters, gauges and histograms, exported in the Prometheus text format.
+
+Services register their metrics once at import time on the shared
+``registry`` and update them from any thread. A metric registered with
+labelnames is a family: ``.labels(*values)`` returns the child metric for
+those label values, created on first use.
+
+Under several worker processes each one only sees its own requests, so
+with METRICS_MULTIPROCESS_DIR set every process writes a dump of its
+registry to that directory every METRICS_SYNC_SECONDS and whenever it
+serves /metrics, and /metrics sums every process's latest dump. Counters and
+histograms of processes that have exited are kept, so totals never go
+backwards; their gauges are dropped. The directory should be emptied
+before the workers start.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .leases import process_alive
+
+logger = logging.getLogger(__name__)
+
+
+class Counter:
+    """A value that only goes up."""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """A value that goes up and down, either set directly or read from a callback when collected."""
+
+    def __init__(self, name: str, description: str, callback: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.description = description
+        self._callback = callback
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        if self._callback is not None:
+            return self._callback()
+        return self._value
+
+
+class Histogram:
+    """Counts observations into cumulative buckets and keeps their count and sum."""
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets: List[float] = sorted(buckets)
+        # One slot per bucket plus one for observations above the largest bound
+        self._bucket_counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._count += 1
+            self._sum += value
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def cumulative_counts(self) -> List[int]:
+        """Observations at or below each bucket bound, then the total."""
+        return _cumulative(self.state()[0])
+
+    def state(self) -> Tuple[List[int], float]:
+        """Per-bucket counts, the last one above every bound, and the sum, read together."""
+        with self._lock:
+            return list(self._bucket_counts), self._sum
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class Family:
+    """A metric with labels: one child Counter, Gauge or Histogram per combination of label values."""
+
+    def __init__(self, kind: type, name: str, description: str, labelnames: Sequence[str], **options):
+        self.kind = kind
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = sorted(options["buckets"]) if "buckets" in options else None
+        self._options = options
+        self._children: Dict[Tuple[str, ...], Metric] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Metric:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self.kind(self.name, self.description, **self._options))
+        return child
+
+    def children(self) -> List[Tuple[Tuple[str, ...], Metric]]:
+        with self._lock:
+            return list(self._children.items())
+
+
+_TYPES = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}
+
+
+def _cumulative(counts: Iterable[int]) -> List[int]:
+    running, cumulative = 0, []
+    for count in counts:
+        running += count
+        cumulative.append(running)
+    return cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Union[Metric, Family]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Union[Counter, Family]:
+        if labelnames:
+            return self._register(Family(Counter, name, description, labelnames))
+        return self._register(Counter(name, description))
+
+    def gauge(self, name: str, description: str, callback: Optional[Callable[[], float]] = None,
+              labelnames: Sequence[str] = ()) -> Union[Gauge, Family]:
+        if labelnames:
+            return self._register(Family(Gauge, name, description, labelnames))
+        return self._register(Gauge(name, description, callback))
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float] = Histogram.DEFAULT_BUCKETS,
+                  labelnames: Sequence[str] = ()) -> Union[Histogram, Family]:
+        if labelnames:
+            return self._register(Family(Histogram, name, description, labelnames, buckets=buckets))
+        return self._register(Histogram(name, description, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                same_kind = getattr(existing, "kind", None) is getattr(metric, "kind", None)
+                if type(existing) is not type(metric) or not same_kind:
+                    raise ValueError(f"Metric {metric.name} is already registered as a {type(existing).__name__}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def get(self, name: str) -> Optional[Union[Metric, Family]]:
+        return self._metrics.get(name)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Values of the unlabelled metrics, histograms as _count and _sum."""
+        with self._lock:
+            metrics = [metric for metric in self._metrics.values() if not isinstance(metric, Family)]
+        values = {}
+        for metric in metrics:
+            if isinstance(metric, Histogram):
+                values[f"{metric.name}_count"] = metric.count
+                values[f"{metric.name}_sum"] = metric.sum
+            else:
+                values[metric.name] = metric.value
+        return values
+
+    def dump(self) -> dict:
+        """
+        Every metric as JSON-serializable data: type, help, labelnames, buckets for
+        histograms, and samples of [label values, value], where a histogram's value
+        is [per-bucket counts, sum].
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        dumped = {}
+        for metric in metrics:
+            if isinstance(metric, Family):
+                kind, labelnames, children = metric.kind, metric.labelnames, metric.children()
+            else:
+                kind, labelnames, children = type(metric), (), [((), metric)]
+            samples = []
+            for values, child in children:
+                try:
+                    samples.append([list(values), list(child.state()) if kind is Histogram else child.value])
+                except Exception:
+                    logger.exception("Failed to collect metric %s", metric.name)
+            entry = {"type": _TYPES[kind], "help": metric.description, "labelnames": list(labelnames),
+                     "samples": samples}
+            if kind is Histogram:
+                entry["buckets"] = metric.buckets
+            dumped[metric.name] = entry
+        return dumped
+
+
+def merge(dumps: Iterable[dict]) -> dict:
+    """Sum registry dumps sample by sample, e.g. from several worker processes."""
+    merged: Dict[str, dict] = {}
+    for dump in dumps:
+        for name, entry in dump.items():
+            target = merged.setdefault(name, {**entry, "samples": []})
+            if target["type"] != entry["type"] or target.get("buckets") != entry.get("buckets"):
+                logger.warning("Skipping metric %s with a different type or buckets in another process", name)
+                continue
+            by_labels = {tuple(sample[0]): sample for sample in target["samples"]}
+            for values, value in entry["samples"]:
+                existing = by_labels.get(tuple(values))
+                if existing is None:
+                    copied = [list(values), [list(value[0]), value[1]] if entry["type"] == "histogram" else value]
+                    target["samples"].append(copied)
+                    by_labels[tuple(values)] = copied
+                elif entry["type"] == "histogram":
+                    counts, total = existing[1]
+                    existing[1] = [[a + b for a, b in zip(counts, value[0])], total + value[1]]
+                else:
+                    existing[1] += value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render(dump: dict) -> str:
+    """A registry dump in the Prometheus text exposition format, version 0.0.4."""
+    lines = []
+    for name in sorted(dump):
+        entry = dump[name]
+        lines.append(f"# HELP {name} {entry['help']}".replace("\n", " "))
+        lines.append(f"# TYPE {name} {entry['type']}")
+        labelnames = entry["labelnames"]
+        for values, value in sorted(entry["samples"]):
+            if entry["type"] != "histogram":
+                lines.append(f"{name}{_labels(labelnames, values)} {_number(value)}")
+                continue
+            counts, total = value
+            bounds = list(entry["buckets"]) + [float("inf")]
+            for bound, cumulative in zip(bounds, _cumulative(counts)):
+                le = f'le="{_number(bound) if bound == float("inf") else repr(float(bound))}"'
+                lines.append(f"{name}_bucket{_labels(labelnames, values, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labelnames, values)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labelnames, values)} {sum(counts)}")
+    return "\n".join(lines) + "\n"
+
+
+class MultiprocessExporter:
+    """Writes this process's registry dump to a shared directory and merges every process's dumps."""
+
+    def __init__(self, registry: Registry, directory: str, sync_seconds: float):
+        self._registry = registry
+        self._directory = directory
+        self._sync_seconds = sync_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # The sync thread and scrapes both write, through the same .partial file
+        self._write_lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self._directory, f"metrics-{os.getpid()}.json")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        os.makedirs(self._directory, exist_ok=True)
+        self._stop.clear()
+        self.write()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(5.0)
+        self._thread = None
+        self.write()
+
+    def write(self) -> None:
+        path = self.path
+        partial = f"{path}.partial"
+        with self._write_lock:
+            with open(partial, "w", encoding="utf-8") as target:
+                json.dump(self._registry.dump(), target, separators=(",", ":"))
+            os.replace(partial, path)
+
+    def collect(self) -> dict:
+        """
+        Every process's latest dump merged. This process writes its own first and is read
+        back from its file like the rest, so whichever worker a scrape reaches, each
+        process's contribution is the newest it has written and counters never go back.
+        """
+        self.write()
+        dumps = []
+        for filename in sorted(os.listdir(self._directory)):
+            if not (filename.startswith("metrics-") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self._directory, filename), encoding="utf-8") as source:
+                    dump = json.load(source)
+            except (OSError, ValueError):
+                logger.warning("Skipping unreadable metrics file %s", filename)
+                continue
+            if not process_alive(int(filename[len("metrics-"):-len(".json")])):
+                dump = {name: entry for name, entry in dump.items() if entry["type"] != "gauge"}
+            dumps.append(dump)
+        return merge(dumps)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._sync_seconds):
+            try:
+                self.write()
+            except Exception:
+                logger.exception("Failed to write metrics to %s", self._directory)
+
+
+registry = Registry()
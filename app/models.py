@@ -9,10 +9,14 @@ from sqlalchemy import (
     ForeignKey,
     Enum,
     Float,
+    Index,
+    func,
+    text,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
+import json
 
 from .db import Base
 
@@ -36,6 +40,18 @@ class CrisisStatus(str, enum.Enum):
     IN_REVIEW = "in_review"
     CLOSED = "closed"
 
+class ScreeningStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class AnonymizationStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
 class ReportReason(str, enum.Enum):
     HARASSMENT = "harassment"
     SPAM = "spam"
@@ -67,12 +83,22 @@ class User(Base):
         overlaps="reports_made",
     )
 
+    # The user directory: listed users only, ordered and prefix-searched by lowercased name
+    __table_args__ = (
+        Index(
+            "ix_users_directory",
+            func.lower(display_name),
+            id,
+            sqlite_where=text("is_active = 1 AND is_anonymous = 0 AND display_name IS NOT NULL"),
+        ),
+    )
+
 
 class Post(Base):
     __tablename__ = "posts"
 
     id = Column(Integer, primary_key=True, index=True)
-    author_id = Column(Integer, ForeignKey("users.id"))
+    author_id = Column(Integer, ForeignKey("users.id"), index=True)
     # Represents the condition board this post belongs to. Foreign key optional for backward compatibility
     group_id = Column(Integer, ForeignKey("condition_boards.id"), nullable=True)
     content = Column(Text, nullable=False)
@@ -81,6 +107,12 @@ class Post(Base):
     author = relationship("User", back_populates="posts")
     reports = relationship("Report", back_populates="post")
 
+    # Feed reads filter on status (and usually group_id) and page newest first
+    __table_args__ = (
+        Index("ix_posts_status_group_created", "status", "group_id", "created_at", "id"),
+        Index("ix_posts_status_created", "status", "created_at", "id"),
+    )
+
 class ConditionBoard(Base):
     __tablename__ = "condition_boards"
 
@@ -91,6 +123,17 @@ class ConditionBoard(Base):
     updated_at = Column(Float, default=lambda: datetime.now().timestamp())
 
     posts = relationship("Post", backref="board")
+    stats = relationship("BoardStats", uselist=False)
+
+class BoardStats(Base):
+    """Per-board counters maintained alongside post writes so reads never COUNT(*)."""
+    __tablename__ = "board_stats"
+
+    board_id = Column(Integer, ForeignKey("condition_boards.id"), primary_key=True)
+    post_count = Column(Integer, nullable=False, default=0)
+    latest_post_at = Column(Float, nullable=True)
+    # Bumped on every change to the board's visible posts
+    version = Column(Integer, nullable=False, default=0)
 
 class Report(Base):
     __tablename__ = "reports"
@@ -111,6 +154,64 @@ class Report(Base):
     reporting_user = relationship("User", back_populates="reports_made", foreign_keys=[reporting_user_id])
     post = relationship("Post", back_populates="reports")
 
+    # Moderation queue filters on status / is_crisis / reason by date; duplicate check in create_report;
+    # a report cluster's open members
+    __table_args__ = (
+        Index("ix_reports_created", "created_at"),
+        Index("ix_reports_status_created", "status", "created_at"),
+        Index("ix_reports_crisis_created", "is_crisis", "created_at"),
+        Index("ix_reports_reason_created", "reason", "created_at"),
+        Index("ix_reports_reporter_post_status", "reporting_user_id", "post_id", "status"),
+        Index("ix_reports_post_reason_status", "post_id", "reason", "status"),
+    )
+
+class ReportCluster(Base):
+    """
+    Reports on one post for one reason, shown to moderators as a single queue item.
+    Members are the reports with the same (post_id, reason); at most one cluster per pair is open.
+    """
+    __tablename__ = "report_clusters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    reason = Column(Enum(ReportReason), nullable=False)
+    is_crisis = Column(Boolean, nullable=False, default=False)
+    reported_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    status = Column(Enum(ReportStatus), nullable=False, default=ReportStatus.OPEN)
+    report_count = Column(Integer, nullable=False, default=0)
+    first_reported_at = Column(Float, nullable=False)
+    last_reported_at = Column(Float, nullable=False)
+    # JSON array of the first REPORT_CLUSTER_MAX_REPORTERS reporter ids
+    reporter_ids = Column(Text, nullable=False, default="[]")
+    resolution_impact = Column(String(50), nullable=True)
+    resolved_at = Column(Float, nullable=True)
+
+    post = relationship("Post")
+    reported_user = relationship("User")
+
+    @property
+    def reporters(self):
+        return json.loads(self.reporter_ids or "[]")
+
+    __table_args__ = (
+        # Target of the upsert that files each new report into its open cluster
+        Index("ux_report_clusters_open", "post_id", "reason", unique=True, sqlite_where=text("status = 'OPEN'")),
+        Index("ix_report_clusters_status_last", "status", "last_reported_at"),
+        Index("ix_report_clusters_status_first", "status", "first_reported_at"),
+        Index("ix_report_clusters_status_count", "status", "report_count"),
+    )
+
+class ModerationCounter(Base):
+    """
+    Report counters for the moderation dashboard, kept in step with report writes.
+    Running totals use day ""; per-day counters use the local ISO date.
+    """
+    __tablename__ = "moderation_counters"
+
+    name = Column(String(20), primary_key=True)
+    day = Column(String(10), primary_key=True, default="")
+    value = Column(Integer, nullable=False, default=0)
+
 class CrisisTicket(Base):
     __tablename__ = "crisis_tickets"
 
@@ -132,3 +233,151 @@ class AuditLogEntry(Base):
     target_id = Column(Integer, nullable=True)
     details = Column(Text, nullable=True)
     created_at = Column(Float, default=lambda: datetime.now().timestamp())
+
+    # GET /moderation/audit seeks one of these for each filter, newest first; SQLite appends the id to every index
+    __table_args__ = (
+        Index("ix_audit_created", "created_at"),
+        Index("ix_audit_actor_created", "actor_id", "created_at"),
+        Index("ix_audit_action_created", "action_type", "created_at"),
+        Index("ix_audit_target_created", "target_type", "created_at"),
+        Index("ix_audit_target_id_created", "target_type", "target_id", "created_at"),
+    )
+
+
+class AuditSegment(Base):
+    """
+    One archived file of audit entries from a single day, gzip-compressed JSON lines.
+    The time range and actor ids let the audit query skip segments without opening them.
+    """
+    __tablename__ = "audit_segments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Relative to AUDIT_ARCHIVE_DIR
+    path = Column(String(255), nullable=False, unique=True)
+    day = Column(String(10), nullable=False)
+    min_created_at = Column(Float, nullable=False)
+    max_created_at = Column(Float, nullable=False)
+    min_entry_id = Column(Integer, nullable=False)
+    max_entry_id = Column(Integer, nullable=False)
+    entry_count = Column(Integer, nullable=False)
+    # JSON array of distinct actor ids
+    actor_ids = Column(Text, nullable=False, default="[]")
+    created_at = Column(Float, default=lambda: datetime.now().timestamp())
+    # Last time the file was rewritten to redact a deleted account's content
+    rewritten_at = Column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("ix_audit_segments_max_created", "max_created_at"),
+    )
+
+
+class ScreeningJob(Base):
+    """A new post waiting for server-side crisis screening; the table is the screening queue's durable backlog."""
+    __tablename__ = "screening_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    status = Column(Enum(ScreeningStatus), nullable=False, default=ScreeningStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    escalated = Column(Boolean, nullable=False, default=False)
+    last_error = Column(Text, nullable=True)
+    # Process holding the job while RUNNING and when it claimed it; see app.leases
+    claimed_by = Column(String(100), nullable=True)
+    claimed_at = Column(Float, nullable=True)
+    created_at = Column(Float, default=lambda: datetime.now().timestamp())
+    updated_at = Column(Float, default=lambda: datetime.now().timestamp())
+
+    post = relationship("Post")
+
+    __table_args__ = (
+        # Sweeping the backlog reads pending jobs oldest first
+        Index("ix_screening_jobs_status_id", "status", "id"),
+    )
+
+
+class AnonymizationJob(Base):
+    """
+    Redaction of a deleted account's content, run in batches. phase and last_id
+    record how far it got, so a restarted job carries on where it stopped.
+    """
+    __tablename__ = "anonymization_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(Enum(AnonymizationStatus), nullable=False, default=AnonymizationStatus.PENDING)
+    phase = Column(String(20), nullable=False, default="posts")
+    last_id = Column(Integer, nullable=False, default=0)
+    posts_redacted = Column(Integer, nullable=False, default=0)
+    reports_redacted = Column(Integer, nullable=False, default=0)
+    audit_entries_redacted = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    # Process holding the job while RUNNING and when it last committed a batch; see app.leases
+    claimed_by = Column(String(100), nullable=True)
+    claimed_at = Column(Float, nullable=True)
+    created_at = Column(Float, default=lambda: datetime.now().timestamp())
+    updated_at = Column(Float, default=lambda: datetime.now().timestamp())
+    finished_at = Column(Float, nullable=True)
+
+    __table_args__ = (
+        # The worker picks up pending jobs oldest first
+        Index("ix_anonymization_jobs_status_id", "status", "id"),
+    )
+
+
+class ProvisioningRun(Base):
+    """
+    A bulk user import from one file, identified by its digest. records_committed is the
+    number of input records handled by committed batches, so a rerun starts after them.
+    """
+    __tablename__ = "provisioning_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(500), nullable=False)
+    digest = Column(String(64), unique=True, nullable=False)
+    records_committed = Column(Integer, nullable=False, default=0)
+    created = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    created_at = Column(Float, default=lambda: datetime.now().timestamp())
+    updated_at = Column(Float, default=lambda: datetime.now().timestamp())
+    finished_at = Column(Float, nullable=True)
+
+
+class RefreshToken(Base):
+    """
+    A refresh token for stateless auth, stored as a SHA-256 hash. Each use
+    revokes it and issues its successor in the same family; presenting a
+    revoked token again revokes the whole family.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    created_at = Column(Float, default=lambda: datetime.now().timestamp())
+    expires_at = Column(Float, nullable=False)
+    revoked_at = Column(Float, nullable=True)
+
+    user = relationship("User")
+
+
+class IssuedToken(Base):
+    """An unexpired access token, recorded so its jti can be revoked when its user is banned or deleted."""
+    __tablename__ = "issued_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Expired rows are pruned by expiry
+    expires_at = Column(Float, nullable=False, index=True)
+
+
+class RevokedToken(Base):
+    """A revoked access token; rows are dropped once the token would have expired anyway."""
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    expires_at = Column(Float, nullable=False, index=True)
+    revoked_at = Column(Float, nullable=False, index=True)
@@ -0,0 +1,72 @@
+"""
+Opaque cursor helpers for keyset (seek) pagination.
+
+A cursor is the sort key of the last row on a page, serialized as
+url-safe base64 JSON. Clients must treat it as opaque and pass it back
+unchanged to fetch the next page.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+
+from .constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode a row's sort key into an opaque cursor string."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: Callable[[Any], Any]) -> Tuple[Any, ...]:
+    """Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: The opaque cursor string sent by the client.
+        *types: One converter per sort key value, e.g. ``float, int``.
+
+    Returns:
+        The decoded sort key as a tuple of converted values.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    invalid = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise invalid
+    if not isinstance(values, list) or len(values) != len(types):
+        raise invalid
+    try:
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (TypeError, ValueError):
+        raise invalid
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """Return a page size within [1, MAX_PAGE_SIZE], defaulting when unset."""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def split_page(rows: Sequence[Any], limit: int, key) -> Tuple[list, Optional[str]]:
+    """Trim a result fetched with limit + 1 rows and build the next cursor.
+
+    Args:
+        rows: Rows fetched with one extra row to detect a following page.
+        limit: The requested page size.
+        key: Callable returning the sort key tuple for a row.
+
+    Returns:
+        The page items and the cursor for the next page (None on the last page).
+    """
+    items = list(rows[:limit])
+    if len(rows) > limit and items:
+        return items, encode_cursor(*key(items[-1]))
+    return items, None
@@ -0,0 +1,97 @@
+"""
+Cache of the user fields needed to authorize a request.
+
+Looking up the signed-in user is the most frequent query the API runs.
+Endpoints that only need to know who the caller is and what they may do
+take a Principal from get_current_principal, which reads this cache and
+only queries the database on a miss.
+
+Entries expire after PRINCIPAL_CACHE_TTL_SECONDS. Services that change
+these fields invalidate the entry after committing. Invalidation is
+local to the process, so with several workers the TTL bounds how long
+another process may act on stale values.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from . import models
+from .config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    role: models.UserRole
+    is_active: bool
+    is_banned: bool
+    display_name: Optional[str]
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            role=user.role,
+            is_active=user.is_active,
+            is_banned=user.is_banned,
+            display_name=user.display_name,
+        )
+
+
+class PrincipalCache:
+    """Bounded LRU of principals by user id with a TTL per entry. Thread-safe."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so a lookup that raced one doesn't cache what it read
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: Principal, generation: Optional[int] = None) -> None:
+        """Cache principal, unless an invalidation happened since generation was read."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[principal.id] = (time.monotonic() + self._ttl_seconds, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,80 @@
+"""
+Create user accounts in bulk from a CSV or JSON-lines file.
+
+Each record needs email, password and display_name (or displayname); role
+is optional and defaults to user. Existing emails are skipped and invalid
+records are reported and skipped. Passwords are hashed across a process
+pool and users are inserted in one transaction per batch. If a run is
+interrupted, running the same file again carries on after the last
+committed batch.
+
+Usage:
+    python -m app.provision_users patients.csv [--batch-size 1000] [--workers 4]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.db import Base, SessionLocal, engine
+from app.services import auth_service, provisioning_service
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _hasher(executor, workers):
+    def hash_many(passwords):
+        if executor is None:
+            return [auth_service.hash_password(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (workers * 4))
+        return list(executor.map(auth_service.hash_password, passwords, chunksize=chunksize))
+    return hash_many
+
+
+def provision_users(path, batch_size=DEFAULT_BATCH_SIZE, workers=None):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # Tables added since the database was created, such as provisioning_runs
+    Base.metadata.create_all(bind=engine)
+    # Spawn rather than fork, as in hashing_service
+    executor = None
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    started = time.perf_counter()
+    created = 0
+
+    def report(run, result):
+        nonlocal created
+        created += result.created
+        for number, reason in result.rejected:
+            print(f"Record {number} rejected: {reason}", file=sys.stderr)
+        rate = created / (time.perf_counter() - started)
+        print(f"{run.records_committed} records: {run.created} created, {run.skipped} skipped, "
+              f"{run.rejected} rejected ({rate:.0f} users/s)")
+
+    db = SessionLocal()
+    try:
+        run = provisioning_service.provision_file(db, path, batch_size, _hasher(executor, workers), report)
+        print(f"Provisioned {created} users in {time.perf_counter() - started:.1f}s "
+              f"({run.created} created, {run.skipped} skipped, {run.rejected} rejected for this file in total)")
+        return run
+    finally:
+        db.close()
+        if executor is not None:
+            executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create user accounts in bulk from a CSV or JSON-lines file")
+    parser.add_argument("path", help="CSV with a header row, or .jsonl/.ndjson with one object per line")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Users per transaction")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Password hashing processes; defaults to the CPU count, 0 hashes in this process")
+    args = parser.parse_args(argv)
+    provision_users(args.path, args.batch_size, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Revoked access tokens, checked without the database in the common case.
+
+Access tokens carry a token id (jti). Banning a user or deleting their
+account records the jti of every unexpired token they hold in the
+revoked_tokens table and adds it to an in-memory Bloom filter. A request
+whose jti the filter has never seen is not revoked and costs no query.
+A filter hit is confirmed against the table by primary key, so false
+positives only cost that one lookup.
+
+Each process rebuilds its filter from the table on startup and picks up
+other processes' revocations every TOKEN_REVOCATION_SYNC_SECONDS. Every
+login, registration and refresh records an issued_tokens row, so expired
+issued and revoked rows are deleted on startup and again every
+TOKEN_PRUNE_SECONDS, or by ``python -m app.maintenance prune-expired-tokens``.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import metrics, models
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+checks = metrics.registry.counter(
+    "token_revocation_checks_total", "Access tokens checked against the revocation filter")
+filter_hits = metrics.registry.counter(
+    "token_revocation_filter_hits_total", "Revocation checks the filter could not answer alone")
+false_positives = metrics.registry.counter(
+    "token_revocation_false_positives_total", "Filter hits for tokens that were not revoked")
+tokens_pruned = metrics.registry.counter(
+    "token_rows_pruned_total", "Expired issued and revoked token rows deleted")
+
+# revoked_at is stamped before commit, so a sync also rereads this far behind
+# its watermark to catch revocations that committed after newer ones
+_SYNC_OVERLAP_SECONDS = 60.0
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter sized for capacity entries at error_rate false positives."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Double hashing: the i-th position is h1 + i * h2
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str) -> None:
+        if key in self:
+            return
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+def prune_expired(db: Session) -> Tuple[int, int]:
+    """Delete issued and revoked token rows whose tokens have expired and commit. Returns both counts."""
+    now = datetime.now().timestamp()
+    issued = db.query(models.IssuedToken).filter(models.IssuedToken.expires_at <= now).delete(synchronize_session=False)
+    revoked = db.query(models.RevokedToken).filter(models.RevokedToken.expires_at <= now).delete(synchronize_session=False)
+    db.commit()
+    tokens_pruned.inc(issued + revoked)
+    return issued, revoked
+
+
+class RevocationList:
+    """The Bloom filter in front of revoked_tokens. Thread-safe."""
+
+    def __init__(self, capacity: int, error_rate: float, sync_seconds: float, prune_seconds: Optional[float] = None):
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._sync_seconds = sync_seconds
+        # None leaves expired rows to load and the maintenance command
+        self._prune_seconds = prune_seconds
+        self._filter = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self._synced_at = time.monotonic()
+        self._pruned_at = time.monotonic()
+        # Highest revoked_at seen, so syncs only read newer revocations; None forces a rebuild
+        self._watermark: Optional[float] = 0.0
+
+    def add(self, jtis: Iterable[str]) -> None:
+        """
+        Add jtis to the filter. Safe to call before the revocation commits:
+        a hit for a jti that never reached the table is just a false positive.
+        """
+        with self._lock:
+            for jti in jtis:
+                self._filter.add(jti)
+            if self._filter.count > self._filter.capacity:
+                # Past capacity the error rate climbs; the next sync rebuilds from unexpired rows
+                self._watermark = None
+
+    def is_revoked(self, db: Session, jti: str) -> bool:
+        checks.inc()
+        self._sync_if_due(db)
+        if jti not in self._filter:
+            return False
+        filter_hits.inc()
+        revoked = db.query(models.RevokedToken.jti).filter(models.RevokedToken.jti == jti).first() is not None
+        if not revoked:
+            false_positives.inc()
+        return revoked
+
+    def load(self, db: Session) -> None:
+        """Drop expired rows and rebuild the filter from the rest."""
+        prune_expired(db)
+        with self._lock:
+            self._pruned_at = time.monotonic()
+        self._rebuild(db)
+
+    def _rebuild(self, db: Session) -> None:
+        now = datetime.now().timestamp()
+        rows = db.query(models.RevokedToken.jti, models.RevokedToken.revoked_at).filter(
+            models.RevokedToken.expires_at > now).all()
+        bloom = BloomFilter(max(self._capacity, len(rows) * 2), self._error_rate)
+        for jti, _ in rows:
+            bloom.add(jti)
+        with self._lock:
+            self._filter = bloom
+            self._watermark = max((revoked_at for _, revoked_at in rows), default=0.0)
+            self._synced_at = time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._filter = BloomFilter(self._capacity, self._error_rate)
+            self._watermark = 0.0
+            self._synced_at = time.monotonic()
+
+    def _sync_if_due(self, db: Session) -> None:
+        if time.monotonic() - self._synced_at < self._sync_seconds:
+            return
+        with self._lock:
+            if time.monotonic() - self._synced_at < self._sync_seconds:
+                return
+            # Claim this sync so concurrent requests don't all run it
+            self._synced_at = time.monotonic()
+            watermark = self._watermark
+            prune = self._prune_seconds is not None and self._synced_at - self._pruned_at >= self._prune_seconds
+            if prune:
+                self._pruned_at = self._synced_at
+        if prune:
+            # Runs at the start of a request, before the session holds any of its changes
+            try:
+                prune_expired(db)
+            except Exception:
+                db.rollback()
+                logger.exception("Failed to prune expired tokens")
+        if watermark is None:
+            self._rebuild(db)
+            return
+        rows = db.query(models.RevokedToken.jti, models.RevokedToken.revoked_at).filter(
+            models.RevokedToken.revoked_at > watermark - _SYNC_OVERLAP_SECONDS).all()
+        with self._lock:
+            for jti, revoked_at in rows:
+                self._filter.add(jti)
+                if self._watermark is not None and revoked_at > self._watermark:
+                    self._watermark = revoked_at
+
+
+revocation_list = RevocationList(
+    capacity=settings.TOKEN_REVOCATION_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_ERROR_RATE,
+    sync_seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS,
+    prune_seconds=settings.TOKEN_PRUNE_SECONDS,
+)
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List
+from typing import Optional
 from ..db import get_db
+from ..config import settings
+from ..constants import MAX_PAGE_SIZE
 from .. import schemas, models
 from ..dependencies import get_current_user
-from ..services import account_service
+from ..services import account_service, token_service
 
 router = APIRouter()
 
@@ -19,8 +21,9 @@ def register(
 ):
     """Register a new user account"""
     user = account_service.register_user(db, user_data)
-    access_token = account_service.create_access_token(data={"sub": str(user.id)})
-    return {"access_token": access_token, "token_type": "bearer"}
+    if settings.STATELESS_AUTH:
+        return token_service.issue_tokens(db, user)
+    return token_service.issue_session_token(db, user)
 
 @router.post("/login", response_model=schemas.Token)
 def login(
@@ -29,21 +32,37 @@ def login(
 ):
     """Sign in with email and password"""
     user = account_service.authenticate_user(db, credentials.email, credentials.password)
-    access_token = account_service.create_access_token(data={"sub": str(user.id)})
-    return {"access_token": access_token, "token_type": "bearer"}
+    if settings.STATELESS_AUTH:
+        return token_service.issue_tokens(db, user)
+    return token_service.issue_session_token(db, user)
+
+@router.post("/refresh", response_model=schemas.Token)
+def refresh(
+    req: schemas.RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """Exchange a refresh token for a new access token (stateless auth)"""
+    return token_service.refresh(db, req.refresh_token)
 
 @router.post("/logout")
 def logout():
     """Sign out (client-side token removal)"""
     return {"message": "Successfully logged out"}
 
-@router.get("/", response_model=List[schemas.UserBase])
+@router.get("/", response_model=schemas.UserPage)
 def get_all_users(
+    q: Optional[str] = Query(None, min_length=1, max_length=50, description="Only users whose display name starts with this"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    """Get all users (requires authentication)"""
-    return db.query(models.User).filter(models.User.is_active == True).all()
+    """
+    The user directory: active, non-anonymous users by display name, one page at a time
+    (requires authentication).
+    """
+    items, next_cursor = account_service.directory_page(db, q, limit, cursor)
+    return schemas.UserPage(items=items, next_cursor=next_cursor)
 
 @router.get("/me/", response_model=schemas.UserBase)
 def get_current_user_info(
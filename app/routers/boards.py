@@ -1,25 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from ..db import get_db
-from .. import schemas, models
-from ..services import board_service
-from ..dependencies import get_current_user
+from .. import event_hub, schemas, models
+from ..config import settings
+from ..services import board_service, token_service
+from ..dependencies import get_current_principal, get_stream_principal
+from ..principals import Principal
+from ..etag import etag_matches, make_etag, not_modified, set_validator
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.ConditionBoardRead])
 def get_boards(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
+    etag = make_etag("boards", *board_service.boards_version(db))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_validator(response, etag)
     return board_service.list_boards(db)
 
+@router.get("/stats", response_model=List[schemas.BoardStatsRead])
+def get_board_stats(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Active post count and latest post time for every board"""
+    return board_service.list_board_stats(db)
+
+@router.post("/{board_id}/events/ticket", response_model=schemas.StreamTicket)
+def board_events_ticket(
+    board_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """A short-lived ticket for opening the board's event stream with EventSource, as ?ticket="""
+    if board_service.get_board(db, board_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Board not found")
+    return schemas.StreamTicket(
+        ticket=token_service.create_stream_ticket(current_user.id, board_id),
+        expires_in=settings.SSE_TICKET_SECONDS,
+    )
+
+@router.get("/{board_id}/events")
+def board_events(
+    board_id: int,
+    last_event_id: Optional[str] = Header(None),
+    resume_from: Optional[str] = Query(None, alias="last_event_id"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_stream_principal)
+):
+    """
+    Server-Sent Events stream of post_created / post_deleted events for one board.
+    Reconnecting clients send Last-Event-ID to receive what they missed; a reset event means refetch.
+    Browsers authenticate with ?ticket= from the ticket endpoint, and a client that has to open a new
+    connection (say, with a fresh ticket) passes its last event id as ?last_event_id= instead.
+    """
+    if board_service.get_board(db, board_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Board not found")
+    # Release the pooled connection now rather than holding it for the life of the stream
+    db.close()
+    return StreamingResponse(
+        event_hub.hub.stream(board_id, last_event_id or resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/", response_model=schemas.ConditionBoardRead)
 def create_board(
     data: schemas.ConditionBoardCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     # Only moderators/admins can create boards
     if current_user.role not in (models.UserRole.MODERATOR, models.UserRole.ADMIN):
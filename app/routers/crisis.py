@@ -3,7 +3,8 @@ from sqlalchemy.orm import Session
 from ..db import get_db
 from .. import schemas, models
 from ..services import crisis_service
-from ..dependencies import get_current_user
+from ..dependencies import get_current_principal
+from ..principals import Principal
 
 #router for specifically a crisis
 router = APIRouter()
@@ -12,7 +13,7 @@ router = APIRouter()
 def escalate_crisis(
     data: schemas.CrisisEscalationInput, 
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     ticket = crisis_service.escalate_crisis(db, data, current_user)
     return schemas.CrisisEscalationResult(
@@ -1,59 +1,170 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 from ..db import get_db
 from .. import schemas, models
-from ..dependencies import get_current_user, require_moderator
-from ..services import moderation_service
+from ..constants import MAX_PAGE_SIZE
+from ..dependencies import get_current_principal, require_moderator
+from ..principals import Principal
+from ..services import (
+    anonymization_service, audit_service, cluster_service, moderation_service, screening_service, summary_service,
+)
 
 # router specifically for general moderation
 
 router = APIRouter()
 
-@router.get("/reports", response_model=List[schemas.ReportRead])
+@router.get("/reports", response_model=Union[schemas.ReportPage, List[schemas.ReportRead]])
 def get_reports(
     status: Optional[str] = Query(None, description="Filter by report status (open, resolved, dismissed)"),
     include_crisis: bool = Query(True, description="Include crisis reports"),
+    reason: Optional[models.ReportReason] = Query(None, description="Filter by report reason"),
+    group_id: Optional[int] = Query(None, description="Only reports on posts in this condition board"),
+    created_after: Optional[float] = Query(None, description="Only reports filed at or after this timestamp"),
+    created_before: Optional[float] = Query(None, description="Only reports filed before this timestamp"),
+    sort: Literal["newest", "oldest"] = Query("newest", description="oldest with status=open gives the SLA queue"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor paging"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """Get all reports for moderation. Only accessible by moderators."""
+    """
+    Get reports for moderation. Only accessible by moderators.
+    Passing limit or cursor returns a page with next_cursor instead of the full list.
+    """
     moderator = require_moderator(current_user)
-    
-    query = db.query(models.Report)
-    
-    # Optionally filter out crisis reports
-    if not include_crisis:
-        query = query.filter(models.Report.is_crisis == False)
-    
-    if status:
-        try:
-            status_enum = models.ReportStatus(status)
-            query = query.filter(models.Report.status == status_enum)
-        except ValueError:
-            pass
-    
-    reports = query.order_by(models.Report.created_at.desc()).all()
-    return reports
+    filters = dict(
+        status=status,
+        include_crisis=include_crisis,
+        reason=reason,
+        group_id=group_id,
+        created_after=created_after,
+        created_before=created_before,
+        oldest_first=sort == "oldest",
+    )
+
+    if limit is None and cursor is None:
+        return moderation_service.report_queue_query(db, **filters).all()
+
+    items, next_cursor = moderation_service.report_queue_page(db, limit, cursor, **filters)
+    return schemas.ReportPage(items=items, next_cursor=next_cursor)
+
+@router.get("/clusters", response_model=schemas.ReportClusterPage)
+def get_report_clusters(
+    status: Optional[str] = Query("open", description="Filter by cluster status (open, resolved, dismissed)"),
+    include_crisis: bool = Query(True, description="Include crisis clusters"),
+    reason: Optional[models.ReportReason] = Query(None, description="Filter by report reason"),
+    group_id: Optional[int] = Query(None, description="Only clusters on posts in this condition board"),
+    sort: Literal["newest", "oldest", "largest"] = Query("newest", description="largest puts the most-reported posts first"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Reports grouped by post and reason, one queue item per cluster. Only accessible by moderators."""
+    require_moderator(current_user)
+    items, next_cursor = cluster_service.cluster_queue_page(
+        db, limit, cursor, sort=sort, status=status, include_crisis=include_crisis, reason=reason, group_id=group_id,
+    )
+    return schemas.ReportClusterPage(items=items, next_cursor=next_cursor)
+
+@router.post("/clusters/{cluster_id}/action", response_model=schemas.ClusterActionResult)
+def resolve_report_cluster(
+    cluster_id: int,
+    data: schemas.ClusterActionInput,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Apply one action to every open report in a cluster. Only accessible by moderators."""
+    moderator = require_moderator(current_user)
+    return moderation_service.resolve_cluster(db, moderator, cluster_id, data)
+
+@router.get("/summary", response_model=schemas.ModerationSummary)
+def get_summary(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Dashboard report counts, read from maintained counters. Only accessible by moderators."""
+    require_moderator(current_user)
+    return schemas.ModerationSummary(**summary_service.summary(db))
+
+@router.get("/audit", response_model=schemas.AuditLogPage)
+def get_audit_log(
+    actor_id: Optional[int] = Query(None, description="Only entries by this user"),
+    action_type: Optional[str] = Query(None, description="Only entries with this action type"),
+    target_type: Optional[str] = Query(None, description="Only entries about this kind of object, e.g. Report"),
+    target_id: Optional[int] = Query(None, description="Only entries about this object; needs target_type"),
+    created_after: Optional[float] = Query(None, description="Only entries at or after this timestamp"),
+    created_before: Optional[float] = Query(None, description="Only entries before this timestamp"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Audit log entries, newest first. Only accessible by moderators and admins."""
+    require_moderator(current_user)
+    items, next_cursor = audit_service.audit_page(
+        db, limit, cursor,
+        actor_id=actor_id,
+        action_type=action_type,
+        target_type=target_type,
+        target_id=target_id,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    return schemas.AuditLogPage(items=items, next_cursor=next_cursor)
+
+@router.get("/anonymization-jobs", response_model=schemas.AnonymizationJobPage)
+def get_anonymization_jobs(
+    user_id: Optional[int] = Query(None, description="Only jobs for this deleted account"),
+    status: Optional[models.AnonymizationStatus] = Query(None, description="Only jobs in this status"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Progress of redacting deleted accounts' content, newest first. Only accessible by moderators."""
+    require_moderator(current_user)
+    items, next_cursor = anonymization_service.job_page(db, user_id, status, limit, cursor)
+    return schemas.AnonymizationJobPage(items=items, next_cursor=next_cursor)
+
+@router.get("/screening", response_model=schemas.ScreeningStats)
+def get_screening_stats(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Crisis screening queue depth, backlog and throughput. Only accessible by moderators."""
+    require_moderator(current_user)
+    return schemas.ScreeningStats(**screening_service.stats(db))
 
 @router.post("/determine-action", response_model=schemas.DetermineActionResult)
 def determine_action(
     data: schemas.DetermineActionInput,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Determine action on a report (warn, ban, dismiss). Only accessible by moderators."""
     moderator = require_moderator(current_user)
     report = moderation_service.determine_action(db, moderator, data)
     return schemas.DetermineActionResult(report=report)
 
+@router.post("/bulk-action", response_model=schemas.BulkActionResult)
+def bulk_action(
+    data: schemas.BulkActionInput,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Apply one action to many reports in one transaction. Only accessible by moderators."""
+    moderator = require_moderator(current_user)
+    return moderation_service.bulk_action(db, moderator, data)
+
 @router.post("/delete-post/{post_id}", response_model=schemas.DeletePostResult)
 def delete_post(
     post_id: int,
     reason: str = Query(..., description="Reason for deletion"),
     report_id: Optional[int] = Query(None, description="Report ID to resolve"),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Delete a post. Only accessible by moderators."""
     moderator = require_moderator(current_user)
@@ -70,7 +181,7 @@ def delete_account(
     reason: str = Query(..., description="Reason for account deletion"),
     report_id: Optional[int] = Query(None, description="Report ID to resolve"),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Delete a user account. Only accessible by moderators."""
     moderator = require_moderator(current_user)
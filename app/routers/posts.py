@@ -1,34 +1,68 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from ..db import get_db
 from .. import schemas, models
-from ..dependencies import get_current_user
-from ..services import messaging_service, report_service
+from ..constants import MAX_PAGE_SIZE
+from ..dependencies import get_current_principal
+from ..principals import Principal
+from ..services import board_service, messaging_service, report_service, search_service
+from ..etag import etag_matches, make_etag, not_modified, set_validator
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.PostRead])
+@router.get("/", response_model=Union[schemas.PostPage, List[schemas.PostRead]])
 def get_posts(
+    response: Response,
     group_id: Optional[int] = Query(None, description="Filter posts by condition/board group_id"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor paging"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """Get posts, optionally filtered by group_id (condition board)"""
-    query = db.query(models.Post).filter(models.Post.status == models.PostStatus.ACTIVE)
-    
+    """
+    Get posts, optionally filtered by group_id (condition board).
+    Passing limit or cursor returns a page with next_cursor instead of the full list.
+    Board feeds carry an ETag; a matching If-None-Match gets 304 without running the feed query.
+    """
     if group_id is not None:
-        query = query.filter(models.Post.group_id == group_id)
-    
-    posts = query.order_by(models.Post.created_at.desc()).all()
-    return posts
+        version = board_service.board_version(db, group_id)
+        if version is not None:
+            etag = make_etag("posts", group_id, version, limit, cursor)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            set_validator(response, etag)
+
+    if limit is None and cursor is None:
+        return messaging_service.feed_query(db, group_id).all()
 
-@router.post("/", response_model=schemas.PostRead)
+    items, next_cursor = messaging_service.list_posts_page(db, group_id, limit, cursor)
+    return schemas.PostPage(items=items, next_cursor=next_cursor)
+
+@router.get("/search", response_model=schemas.PostPage)
+def search_posts(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for in post content"),
+    group_id: Optional[int] = Query(None, description="Only search this condition board"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Full-text search over active posts, best matches first"""
+    items, next_cursor = search_service.search_posts(db, q, group_id, limit, cursor)
+    return schemas.PostPage(items=items, next_cursor=next_cursor)
+
+@router.post("/", response_model=schemas.PostCreated)
 def post_message(
     data: schemas.PostCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
+    """
+    Create a post. crisis_detected tells the client whether the post's
+    screening job will alert moderators, so the UI doesn't have to guess.
+    """
     post = messaging_service.post_message(db, current_user, data)
     return post
 
@@ -36,7 +70,7 @@ def post_message(
 def delete_post(
     post_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Allow users to delete their own posts"""
     post = messaging_service.delete_post(db, current_user, post_id)
@@ -51,7 +85,7 @@ def report_post(
     post_id: int,
     data: schemas.ReportCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Report a post for harassment, spam, inappropriate content, or crisis.
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, Field, ConfigDict, computed_field
+from typing import List, Literal, Optional
 from datetime import datetime
-from .models import UserRole, PostStatus, ReportStatus, CrisisStatus, ReportReason
+from .constants import detect_crisis
+from .models import UserRole, PostStatus, ReportStatus, CrisisStatus, ReportReason, AnonymizationStatus
 
 
 class UserBase(BaseModel):
@@ -13,6 +14,11 @@ class UserBase(BaseModel):
     role: UserRole
 
 
+class UserPage(BaseModel):
+    items: List[UserBase]
+    next_cursor: Optional[str] = None
+
+
 class PostCreate(BaseModel):
     group_id: Optional[int] = None
     content: str = Field(min_length=1)
@@ -28,6 +34,17 @@ class PostRead(BaseModel):
     created_at: float
     author: UserBase
 
+class PostCreated(PostRead):
+    @computed_field
+    @property
+    def crisis_detected(self) -> bool:
+        """Whether the post matched the crisis keywords its screening job escalates on"""
+        return detect_crisis(self.content)
+
+class PostPage(BaseModel):
+    items: List[PostRead]
+    next_cursor: Optional[str] = None
+
 class ReportCreate(BaseModel):
     reported_user_id : Optional[int] = None
     post_id : Optional[int] = None
@@ -54,6 +71,10 @@ class ReportRead(BaseModel):
     # Include post info for display
     post: Optional[PostRead] = None
 
+class ReportPage(BaseModel):
+    items: List[ReportRead]
+    next_cursor: Optional[str] = None
+
 class DetermineActionInput(BaseModel):
     report_id : int
     action : str
@@ -62,6 +83,89 @@ class DetermineActionInput(BaseModel):
 class DetermineActionResult(BaseModel):
     report : ReportRead
 
+class BulkActionInput(BaseModel):
+    """Select reports by id, or every open report on a post or against a user; exactly one selector."""
+    action : str
+    report_ids : Optional[List[int]] = Field(None, min_length=1, max_length=500)
+    post_id : Optional[int] = None
+    reported_user_id : Optional[int] = None
+    mod_note : Optional[str] = None
+
+class BulkActionOutcome(BaseModel):
+    report_id : int
+    outcome : Literal["applied", "not_found", "not_open", "rejected"]
+    detail : Optional[str] = None
+
+class BulkActionResult(BaseModel):
+    applied : int
+    results : List[BulkActionOutcome]
+
+class ReportClusterRead(BaseModel):
+    """Open reports on one post for one reason; reporters holds the first reporter ids."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    post_id: int
+    reason: ReportReason
+    is_crisis: bool
+    reported_user_id: Optional[int]
+    status: ReportStatus
+    report_count: int
+    first_reported_at: float
+    last_reported_at: float
+    reporters: List[int]
+    resolution_impact: Optional[str]
+    resolved_at: Optional[float]
+    post: Optional[PostRead] = None
+
+class ReportClusterPage(BaseModel):
+    items: List[ReportClusterRead]
+    next_cursor: Optional[str] = None
+
+class ClusterActionInput(BaseModel):
+    action : str
+    mod_note : Optional[str] = None
+
+class ClusterActionResult(BaseModel):
+    cluster : ReportClusterRead
+    applied : int
+
+class AuditLogEntryRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    actor_id: Optional[int]
+    action_type: str
+    target_type: Optional[str]
+    target_id: Optional[int]
+    details: Optional[str]
+    created_at: float
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogEntryRead]
+    next_cursor: Optional[str] = None
+
+class AnonymizationJobRead(BaseModel):
+    """Progress of redacting a deleted account's content; phase is posts, reports, audit, archive or done."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: int
+    status: AnonymizationStatus
+    phase: str
+    posts_redacted: int
+    reports_redacted: int
+    audit_entries_redacted: int
+    attempts: int
+    last_error: Optional[str]
+    created_at: float
+    updated_at: float
+    finished_at: Optional[float]
+
+class AnonymizationJobPage(BaseModel):
+    items: List[AnonymizationJobRead]
+    next_cursor: Optional[str] = None
+
 class DeleteAccountResult(BaseModel):
     success : bool
     message : str
@@ -76,6 +180,23 @@ class CrisisEscalationResult(BaseModel):
     ticket_id : int
     status : CrisisStatus
 
+class ScreeningStats(BaseModel):
+    running : bool
+    queue_depth : int
+    queue_capacity : int
+    pending_jobs : int  # Persisted backlog, including jobs already in the queue
+    submitted : int
+    deferred : int  # Left in the backlog because the queue was full
+    completed : int
+    failed : int
+    escalated : int
+
+class ModerationSummary(BaseModel):
+    open : int
+    crisis_open : int
+    resolved_today : int  # Local server date
+    dismissed_today : int
+
 class DeletePostResult(BaseModel):
     success : bool
     post_id : int
@@ -94,6 +215,17 @@ class ConditionBoardCreate(BaseModel):
 class ConditionBoardRead(ConditionBoardBase):
     pass
 
+class StreamTicket(BaseModel):
+    """Opens one board's event stream as ?ticket=, until it expires."""
+    ticket: str
+    expires_in: int
+
+class BoardStatsRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    board_id: int
+    post_count: int
+    latest_post_at: Optional[float] = None
+
 class UserRegister(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
     
@@ -112,6 +244,12 @@ class UserUpdate(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    # Only set with STATELESS_AUTH
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     user_id: Optional[int] = None
\ No newline at end of file
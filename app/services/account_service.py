@@ -4,14 +4,34 @@ Account service for user registration, authentication, and account management.
 This module handles account-related business logic, delegating authentication
 operations to auth_service for proper separation of concerns.
 """
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from .. import models, schemas
+from ..pagination import clamp_page_size, decode_cursor, split_page
+from ..principals import principal_cache
 from .auth_service import hash_password, verify_password, create_access_token
+from . import anonymization_service, audit_service, board_service, hashing_service, token_service
 
 # Re-export auth functions for backward compatibility
 __all__ = ['hash_password', 'verify_password', 'create_access_token', 
-           'register_user', 'authenticate_user', 'delete_account', 'update_account']
+           'register_user', 'authenticate_user', 'anonymize_account', 'delete_account', 'update_account',
+           'directory_page']
+
+# SQLite's lower() only folds ASCII, so names and search terms are folded the same way in Python
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _run_hashing(fn, *args):
+    """Run a hashing_service call, turning a full hashing queue into a 429."""
+    try:
+        return fn(*args)
+    except hashing_service.HashingBusy as busy:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many sign-in requests, please try again shortly",
+            headers={"Retry-After": str(busy.retry_after)},
+        )
 
 
 def register_user(db: Session, user_data: schemas.UserRegister) -> models.User:
@@ -25,7 +45,7 @@ def register_user(db: Session, user_data: schemas.UserRegister) -> models.User:
         )
     
     # Hash the password
-    hashed_password = hash_password(user_data.password)
+    hashed_password = _run_hashing(hashing_service.hash_password, user_data.password)
     
     # Create new user
     new_user = models.User(
@@ -58,7 +78,7 @@ def authenticate_user(db: Session, email: str, password: str) -> models.User:
             detail="Account is deleted"
         )
     
-    if not verify_password(password, user.hashed_password):
+    if not _run_hashing(hashing_service.verify_password, password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -66,7 +86,11 @@ def authenticate_user(db: Session, email: str, password: str) -> models.User:
     
     return user
 
-def delete_account(db, user, reason):
+def anonymize_account(db, user, reason):
+    """
+    Anonymize the account and revoke its tokens in the caller's transaction, and queue
+    the redaction of its content; call anonymization_service.submit() once committed.
+    """
     user.display_name = "Deleted User"
     user.email = None
     user.hashed_password = None
@@ -74,22 +98,82 @@ def delete_account(db, user, reason):
     user.is_active = False
 
     db.add(user)
+    board_service.touch_author_boards(db, user.id)
+    token_service.revoke_user_tokens(db, user.id)
 
-    audit = models.AuditLogEntry(actor_id=user.id, action_type="delete_account", target_type="User", target_id=user.id, details=reason or "")
-    db.add(audit)
+    audit_service.record(db, actor_id=user.id, action_type="delete_account", target_type="User", target_id=user.id, details=reason or "")
+    anonymization_service.create_job(db, user)
+
+def delete_account(db, user, reason):
+    anonymize_account(db, user, reason)
     db.commit()
+    principal_cache.invalidate(user.id)
+    anonymization_service.submit()
 
     return schemas.DeleteAccountResult(success=True, message="Account deleted and content anonymized")
 
 def update_account(db, user, update_data: schemas.UserUpdate):
     """Update user account settings"""
+    changed = False
     if update_data.display_name is not None:
+        changed = changed or user.display_name != update_data.display_name
         user.display_name = update_data.display_name
     if update_data.is_anonymous is not None:
+        changed = changed or user.is_anonymous != update_data.is_anonymous
         user.is_anonymous = update_data.is_anonymous
     
     db.add(user)
+    if changed:
+        board_service.touch_author_boards(db, user.id)
     db.commit()
+    principal_cache.invalidate(user.id)
     db.refresh(user)
     
-    return user
\ No newline at end of file
+    return user
+
+
+def directory_query(db: Session, q=None):
+    """
+    Active, non-anonymous users by lowercased display name, optionally those whose
+    name starts with q. Matches the partial index ix_users_directory, so the filters
+    and the order are a range scan on it.
+    """
+    name = func.lower(models.User.display_name)
+    query = db.query(models.User).filter(
+        models.User.is_active == True,
+        models.User.is_anonymous == False,
+        models.User.display_name.isnot(None),
+    )
+    if q:
+        prefix = q.translate(_ASCII_LOWER)
+        bound = _prefix_bound(prefix)
+        if bound is not None:
+            query = query.filter(name >= prefix, name < bound)
+        else:
+            query = query.filter(name >= prefix, func.substr(name, 1, len(prefix)) == prefix)
+    return query.order_by(name, models.User.id)
+
+
+def _prefix_bound(prefix: str):
+    """
+    The string just past every string starting with prefix: the last character
+    incremented, skipping the surrogates SQLite can't store. None if it is U+10FFFF.
+    """
+    code = ord(prefix[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        code = 0xE000
+    if code > 0x10FFFF:
+        return None
+    return prefix[:-1] + chr(code)
+
+
+def directory_page(db: Session, q=None, limit=None, cursor=None):
+    """One page of the user directory plus the next cursor, seeking on (lowercased name, id)."""
+    page_size = clamp_page_size(limit)
+    query = directory_query(db, q)
+    if cursor:
+        last_name, user_id = decode_cursor(cursor, str, int)
+        name = func.lower(models.User.display_name)
+        query = query.filter(name >= last_name, or_(name > last_name, models.User.id > user_id))
+    rows = query.limit(page_size + 1).all()
+    return split_page(rows, page_size, key=lambda user: (user.display_name.translate(_ASCII_LOWER), user.id))
@@ -0,0 +1,382 @@
+"""
+Background redaction of deleted accounts' content.
+
+anonymize_account scrubs the user row and records an AnonymizationJob in
+the same transaction. A worker thread then redacts what the user wrote,
+phase by phase: post content, the details of reports they filed
+(including the crisis reports escalate_crisis files with a copy of the
+post), and the content snippets crisis escalations copy into the audit
+log. Each phase walks the user's rows by id in batches of
+ANONYMIZATION_BATCH_SIZE, and each batch is one short transaction that
+also moves the job's phase/last_id cursor, so writers are only ever held
+up for one batch and a job interrupted by a crash or restart picks up at
+the first batch that didn't commit. Redacting a row twice is harmless.
+
+The last phase does the same for audit entries already moved to archive
+segments: it walks the segments whose actor_ids include the user, one per
+batch, and rewrites each file with the snippets redacted, committing the
+segment row along with the job's cursor.
+
+A claimed job records its process and claim time, and every committed
+batch renews the claim. Jobs left RUNNING are only taken back once their
+owner process on this host has exited or their claim is older than
+ANONYMIZATION_LEASE_SECONDS, so one worker process restarting doesn't
+run a job a sibling is still working through.
+"""
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from .. import leases, metrics, models
+from ..config import settings
+from ..db import SessionLocal
+from ..pagination import clamp_page_size, decode_cursor, split_page
+from . import archive_service, board_service
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "[removed]"
+
+# Audit actions whose details carry the user's own words
+REDACTED_AUDIT_ACTIONS = ("crisis_escalation",)
+
+jobs_completed = metrics.registry.counter(
+    "anonymization_jobs_completed_total", "Deleted accounts whose content has been redacted")
+jobs_failed = metrics.registry.counter(
+    "anonymization_jobs_failed_total", "Anonymization attempts that raised an error")
+rows_redacted = metrics.registry.counter(
+    "anonymization_rows_redacted_total", "Posts, reports and audit entries redacted for deleted accounts")
+
+
+class _Phase(NamedTuple):
+    model: type
+    owned: Callable[[int], object]
+    values: dict
+    counter: str
+
+
+_PHASES: Dict[str, _Phase] = {
+    "posts": _Phase(
+        models.Post,
+        lambda user_id: models.Post.author_id == user_id,
+        {models.Post.content: REDACTED},
+        "posts_redacted",
+    ),
+    "reports": _Phase(
+        models.Report,
+        lambda user_id: models.Report.reporting_user_id == user_id,
+        {models.Report.details: None},
+        "reports_redacted",
+    ),
+    "audit": _Phase(
+        models.AuditLogEntry,
+        lambda user_id: and_(
+            models.AuditLogEntry.actor_id == user_id,
+            models.AuditLogEntry.action_type.in_(REDACTED_AUDIT_ACTIONS),
+        ),
+        {models.AuditLogEntry.details: REDACTED},
+        "audit_entries_redacted",
+    ),
+}
+# Audit entries in archive segments; last_id is a segment id
+ARCHIVE_PHASE = "archive"
+PHASE_ORDER = list(_PHASES) + [ARCHIVE_PHASE]
+DONE_PHASE = "done"
+
+
+def _now() -> float:
+    return datetime.now().timestamp()
+
+
+def create_job(db: Session, user: models.User) -> models.AnonymizationJob:
+    """Add a pending job for user to the session, unless one is already unfinished; it commits with the caller."""
+    existing = db.query(models.AnonymizationJob).filter(
+        models.AnonymizationJob.user_id == user.id,
+        models.AnonymizationJob.status.in_([models.AnonymizationStatus.PENDING, models.AnonymizationStatus.RUNNING]),
+    ).first()
+    if existing is not None:
+        return existing
+    now = _now()
+    job = models.AnonymizationJob(
+        user_id=user.id,
+        status=models.AnonymizationStatus.PENDING,
+        phase=PHASE_ORDER[0],
+        last_id=0,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    return job
+
+
+def run_batch(db: Session, job: models.AnonymizationJob, batch_size: Optional[int] = None) -> bool:
+    """
+    Redact the next batch of the job's current phase and commit it along with the
+    job's new position. Returns whether the job has more to do.
+    """
+    batch_size = batch_size or settings.ANONYMIZATION_BATCH_SIZE
+    if job.phase == ARCHIVE_PHASE:
+        found, redacted = _redact_next_segment(db, job)
+        job.audit_entries_redacted += redacted
+        phase_finished = not found
+    else:
+        redacted = _redact_rows(db, job, batch_size)
+        phase_finished = redacted < batch_size
+    if phase_finished:
+        following = PHASE_ORDER.index(job.phase) + 1
+        job.last_id = 0
+        if following < len(PHASE_ORDER):
+            job.phase = PHASE_ORDER[following]
+        else:
+            job.phase = DONE_PHASE
+            job.status = models.AnonymizationStatus.DONE
+            job.last_error = None
+            job.finished_at = _now()
+    job.updated_at = _now()
+    # Each committed batch renews the claim
+    job.claimed_at = job.updated_at
+    db.commit()
+    rows_redacted.inc(redacted)
+    return job.status != models.AnonymizationStatus.DONE
+
+
+def _redact_rows(db: Session, job: models.AnonymizationJob, batch_size: int) -> int:
+    """Redact the next batch of the job's rows in its current table phase and advance last_id. Returns the count."""
+    phase = _PHASES[job.phase]
+    ids = [
+        row_id for (row_id,) in db.query(phase.model.id)
+        .filter(phase.owned(job.user_id), phase.model.id > job.last_id)
+        .order_by(phase.model.id)
+        .limit(batch_size)
+        .all()
+    ]
+    if ids:
+        db.query(phase.model).filter(phase.model.id.in_(ids)).update(phase.values, synchronize_session=False)
+        if phase.model is models.Post:
+            # Feeds embed post content
+            board_service.touch_boards(db, select(models.Post.group_id).where(models.Post.id.in_(ids)).distinct())
+        setattr(job, phase.counter, getattr(job, phase.counter) + len(ids))
+        job.last_id = ids[-1]
+    return len(ids)
+
+
+def _redact_next_segment(db: Session, job: models.AnonymizationJob) -> Tuple[bool, int]:
+    """
+    Rewrite the next archive segment holding the user's entries with their snippets
+    redacted, and advance last_id past it. Returns whether there was such a segment
+    and how many entries were redacted.
+    """
+    segment_model = models.AuditSegment
+    while True:
+        # LIKE narrows the candidates; the parsed actor ids decide, since 12 also matches 112
+        segment = db.query(segment_model).filter(
+            segment_model.id > job.last_id,
+            segment_model.actor_ids.like(f"%{job.user_id}%"),
+        ).order_by(segment_model.id).first()
+        if segment is None:
+            return False, 0
+        job.last_id = segment.id
+        if job.user_id in json.loads(segment.actor_ids):
+            break
+
+    records = archive_service.read_segment(segment)
+    redacted = 0
+    for record in records:
+        if (record["actor_id"] == job.user_id and record["action_type"] in REDACTED_AUDIT_ACTIONS
+                and record["details"] != REDACTED):
+            record["details"] = REDACTED
+            redacted += 1
+    if redacted:
+        archive_service.rewrite_segment(segment, records)
+    return True, redacted
+
+
+def run_job(db: Session, job_id: int, batch_size: Optional[int] = None,
+            keep_going: Callable[[], bool] = lambda: True) -> Optional[models.AnonymizationJob]:
+    """
+    Claim a pending job and run its batches until it is done, or until keep_going,
+    asked between batches, returns False, which puts it back to PENDING where it stopped.
+    Returns the job, or None if it was already claimed or finished.
+    """
+    claimed = db.query(models.AnonymizationJob).filter(
+        models.AnonymizationJob.id == job_id,
+        models.AnonymizationJob.status == models.AnonymizationStatus.PENDING,
+    ).update(
+        {
+            models.AnonymizationJob.status: models.AnonymizationStatus.RUNNING,
+            models.AnonymizationJob.attempts: models.AnonymizationJob.attempts + 1,
+            models.AnonymizationJob.claimed_by: leases.owner_id(),
+            models.AnonymizationJob.claimed_at: _now(),
+            models.AnonymizationJob.updated_at: _now(),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    if not claimed:
+        return None
+
+    job = db.query(models.AnonymizationJob).filter(models.AnonymizationJob.id == job_id).one()
+    while run_batch(db, job, batch_size):
+        if not keep_going():
+            job.status = models.AnonymizationStatus.PENDING
+            job.updated_at = _now()
+            db.commit()
+            break
+    return job
+
+
+def record_failure(db: Session, job_id: int, error: Exception) -> None:
+    """Return a job to the backlog for another attempt, or mark it failed once attempts run out."""
+    job = db.query(models.AnonymizationJob).filter(models.AnonymizationJob.id == job_id).first()
+    if job is None:
+        return
+    exhausted = job.attempts >= settings.ANONYMIZATION_MAX_ATTEMPTS
+    job.status = models.AnonymizationStatus.FAILED if exhausted else models.AnonymizationStatus.PENDING
+    job.last_error = repr(error)[:500]
+    job.updated_at = _now()
+    db.commit()
+
+
+def reclaim(db: Session) -> List[int]:
+    """Return jobs left RUNNING by a process that died or outlived its lease to PENDING."""
+    return leases.reclaim_expired(
+        db, models.AnonymizationJob, models.AnonymizationStatus.RUNNING, models.AnonymizationStatus.PENDING,
+        settings.ANONYMIZATION_LEASE_SECONDS, _now(),
+    )
+
+
+def run_pending(session_factory: Callable[[], Session], batch_size: Optional[int] = None,
+                keep_going: Callable[[], bool] = lambda: True) -> int:
+    """
+    Reclaim abandoned jobs, then run pending jobs oldest first until none are left
+    or keep_going says stop. Returns how many finished.
+    """
+    db = session_factory()
+    try:
+        reclaim(db)
+    finally:
+        db.close()
+    finished = 0
+    attempted = set()
+    while True:
+        db = session_factory()
+        try:
+            job_id = db.query(models.AnonymizationJob.id).filter(
+                models.AnonymizationJob.status == models.AnonymizationStatus.PENDING,
+                models.AnonymizationJob.id.notin_(attempted),
+            ).order_by(models.AnonymizationJob.id).limit(1).scalar()
+            if job_id is None:
+                return finished
+            try:
+                job = run_job(db, job_id, batch_size, keep_going)
+            except Exception as error:
+                # A failed job waits for the next run rather than being retried in a tight loop
+                attempted.add(job_id)
+                jobs_failed.inc()
+                logger.exception("Failed to anonymize content for job %s", job_id)
+                db.rollback()
+                try:
+                    record_failure(db, job_id, error)
+                except Exception:
+                    logger.exception("Failed to record anonymization failure for job %s", job_id)
+                continue
+            if job is not None and job.status != models.AnonymizationStatus.DONE:
+                # Stopped between batches
+                return finished
+            if job is not None:
+                finished += 1
+                jobs_completed.inc()
+                if not keep_going():
+                    return finished
+        finally:
+            db.close()
+
+
+class AnonymizationService:
+    """One worker thread that drains the persisted job backlog, woken by new jobs or every poll interval."""
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int, batch_pause_seconds: float,
+                 poll_seconds: float):
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._batch_pause_seconds = batch_pause_seconds
+        self._poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+
+    def start(self) -> None:
+        if self.running:
+            return
+        # Each run of the worker first reclaims jobs abandoned by a previous process; they carry on
+        # from their last committed batch
+        self._stop.clear()
+        self.running = True
+        self._thread = threading.Thread(target=self._work, name="anonymization-worker", daemon=True)
+        self._thread.start()
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the thread after its current batch. An unfinished job goes back to PENDING for the next start."""
+        if not self.running:
+            return
+        self.running = False
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        """Look for pending jobs now rather than at the next poll."""
+        self._wake.set()
+
+    def _keep_going(self) -> bool:
+        # The pause lets writers queued behind a batch take the database before the next one
+        return not self._stop.wait(self._batch_pause_seconds)
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._poll_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                run_pending(self._session_factory, self._batch_size, self._keep_going)
+            except Exception:
+                logger.exception("Failed to run pending anonymization jobs")
+
+
+service = AnonymizationService(
+    SessionLocal,
+    batch_size=settings.ANONYMIZATION_BATCH_SIZE,
+    batch_pause_seconds=settings.ANONYMIZATION_BATCH_PAUSE_SECONDS,
+    poll_seconds=settings.ANONYMIZATION_POLL_SECONDS,
+)
+
+
+def submit() -> None:
+    """Wake the worker for a committed job; if it isn't running, the job waits in the backlog."""
+    service.wake()
+
+
+def job_page(db: Session, user_id=None, status=None, limit=None, cursor=None):
+    """One page of jobs, newest first, optionally for one user or in one status, plus the next cursor."""
+    page_size = clamp_page_size(limit)
+    job = models.AnonymizationJob
+    query = db.query(job)
+    if user_id is not None:
+        query = query.filter(job.user_id == user_id)
+    if status is not None:
+        query = query.filter(job.status == status)
+    if cursor:
+        (job_id,) = decode_cursor(cursor, int)
+        query = query.filter(job.id < job_id)
+    rows = query.order_by(job.id.desc()).limit(page_size + 1).all()
+    return split_page(rows, page_size, key=lambda row: (row.id,))
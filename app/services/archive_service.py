@@ -0,0 +1,172 @@
+"""
+Audit log archival.
+
+archive_audit_log moves audit entries older than the retention window
+out of audit_log_entries into gzip-compressed JSON-lines files, one per
+day per run, and records each file in audit_segments with its time
+range, id range and actor ids. A segment is written to a temporary name
+and renamed into place before its row is inserted and its entries are
+deleted in one transaction, so an interrupted run leaves either the
+entries in the table or a complete segment that the next run overwrites.
+After that a segment is only rewritten by rewrite_segment, with the same
+steps, when a deleted account's content is redacted from it.
+
+archived_entries reads segments back for the audit query when its time
+range reaches past the hot table.
+"""
+import gzip
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+
+
+def _day_bounds(timestamp: float):
+    """The local day a timestamp falls on, with its start and end as timestamps."""
+    day = date.fromtimestamp(timestamp)
+    start = datetime.combine(day, time.min)
+    return day.isoformat(), start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+
+def _record(entry: models.AuditLogEntry) -> dict:
+    return {
+        "id": entry.id,
+        "actor_id": entry.actor_id,
+        "action_type": entry.action_type,
+        "target_type": entry.target_type,
+        "target_id": entry.target_id,
+        "details": entry.details,
+        "created_at": entry.created_at,
+    }
+
+
+def _write_segment(archive_dir: str, relative_path: str, records) -> None:
+    path = os.path.join(archive_dir, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + ".partial"
+    with gzip.open(partial, "wt", encoding="utf-8") as segment:
+        for record in records:
+            segment.write(json.dumps(record, separators=(",", ":")) + "\n")
+    with open(partial, "rb") as written:
+        os.fsync(written.fileno())
+    os.replace(partial, path)
+
+
+def archive_audit_log(db: Session, older_than: float, archive_dir: Optional[str] = None) -> List[models.AuditSegment]:
+    """
+    Move entries created before older_than into daily segment files, oldest day first.
+    Each segment commits on its own. Returns the segments written.
+    """
+    archive_dir = archive_dir or settings.AUDIT_ARCHIVE_DIR
+    entry = models.AuditLogEntry
+    segments = []
+    while True:
+        oldest = (
+            db.query(entry.created_at)
+            .filter(entry.created_at < older_than)
+            .order_by(entry.created_at, entry.id)
+            .first()
+        )
+        if oldest is None:
+            return segments
+        day, day_start, day_end = _day_bounds(oldest.created_at)
+        entries = (
+            db.query(entry)
+            .filter(entry.created_at >= day_start, entry.created_at < min(day_end, older_than))
+            .order_by(entry.created_at, entry.id)
+            .all()
+        )
+        ids = [e.id for e in entries]
+        relative_path = os.path.join(day[:7], f"audit-{day}-{min(ids)}-{max(ids)}.jsonl.gz")
+        _write_segment(archive_dir, relative_path, [_record(e) for e in entries])
+        for archived in entries:
+            db.expunge(archived)
+
+        segment = models.AuditSegment(
+            path=relative_path,
+            day=day,
+            min_created_at=entries[0].created_at,
+            max_created_at=entries[-1].created_at,
+            min_entry_id=min(ids),
+            max_entry_id=max(ids),
+            entry_count=len(entries),
+            actor_ids=json.dumps(sorted({e.actor_id for e in entries if e.actor_id is not None})),
+        )
+        db.add(segment)
+        for start in range(0, len(ids), 500):
+            db.query(entry).filter(entry.id.in_(ids[start:start + 500])).delete(synchronize_session=False)
+        db.commit()
+        segments.append(segment)
+
+
+def read_segment(segment: models.AuditSegment, archive_dir: Optional[str] = None) -> List[dict]:
+    """The entries in a segment, oldest first."""
+    path = os.path.join(archive_dir or settings.AUDIT_ARCHIVE_DIR, segment.path)
+    with gzip.open(path, "rt", encoding="utf-8") as lines:
+        return [json.loads(line) for line in lines if line.strip()]
+
+
+def rewrite_segment(segment: models.AuditSegment, records: List[dict], archive_dir: Optional[str] = None) -> None:
+    """
+    Replace a segment's file with records, as read by read_segment and edited, and mark
+    the segment row rewritten. The row change commits with the caller.
+    """
+    _write_segment(archive_dir or settings.AUDIT_ARCHIVE_DIR, segment.path, records)
+    segment.rewritten_at = datetime.now().timestamp()
+
+
+def _matches(record: dict, actor_id, action_type, target_type, target_id, created_after, created_before, before_key):
+    if actor_id is not None and record["actor_id"] != actor_id:
+        return False
+    if action_type is not None and record["action_type"] != action_type:
+        return False
+    if target_type is not None and record["target_type"] != target_type:
+        return False
+    if target_id is not None and record["target_id"] != target_id:
+        return False
+    if created_after is not None and record["created_at"] < created_after:
+        return False
+    if created_before is not None and record["created_at"] >= created_before:
+        return False
+    if before_key is not None and (record["created_at"], record["id"]) >= before_key:
+        return False
+    return True
+
+
+def archived_entries(db: Session, need: int, before_key=None, actor_id=None, action_type=None, target_type=None,
+                     target_id=None, created_after=None, created_before=None,
+                     archive_dir: Optional[str] = None) -> List[models.AuditLogEntry]:
+    """
+    Up to need archived entries matching the filters, newest first, all older than
+    before_key, a (created_at, id) cursor key. Entries are transient AuditLogEntry objects.
+    Segments outside the time range, or without the actor, aren't opened.
+    """
+    segment = models.AuditSegment
+    query = db.query(segment)
+    if created_after is not None:
+        query = query.filter(segment.max_created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(segment.min_created_at < created_before)
+    if before_key is not None:
+        query = query.filter(segment.min_created_at <= before_key[0])
+    filters = (actor_id, action_type, target_type, target_id, created_after, created_before, before_key)
+
+    found = []
+    for candidate in query.order_by(segment.max_created_at.desc(), segment.id.desc()):
+        if len(found) >= need and candidate.max_created_at < found[need - 1].created_at:
+            # Every later segment is older than the page already collected
+            break
+        if actor_id is not None and actor_id not in json.loads(candidate.actor_ids):
+            continue
+        found.extend(
+            models.AuditLogEntry(**record)
+            for record in read_segment(candidate, archive_dir)
+            if _matches(record, *filters)
+        )
+        found.sort(key=lambda entry: (entry.created_at, entry.id), reverse=True)
+    return found[:need]
@@ -0,0 +1,252 @@
+"""
+Write-behind audit logging.
+
+Services call record() where they used to add an AuditLogEntry to the
+session. While the writer is running, the entry is held on the session
+until the transaction commits and then handed to an in-memory buffer,
+which a background thread writes out with multi-row INSERTs once it
+holds AUDIT_BATCH_SIZE entries or AUDIT_FLUSH_SECONDS have passed. A
+rolled-back transaction drops its entries, so the log never records an
+action that didn't happen.
+
+durable=True entries, and every entry while the writer isn't running
+(tests, maintenance scripts, startup), are added to the session and
+commit with the action as before. Crisis escalations use that path.
+stop() writes whatever is still buffered.
+
+audit_page() serves GET /moderation/audit; buffered entries show up
+there once they've been written, and entries moved to archive segments
+are read back from them when a page runs past the hot table.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import event, insert, or_
+from sqlalchemy.orm import Session
+
+from .. import metrics, models
+from ..config import settings
+from ..db import SessionLocal
+from ..pagination import clamp_page_size, decode_cursor, split_page
+from . import archive_service
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "audit_pending"
+
+entries_buffered = metrics.registry.counter(
+    "audit_entries_buffered_total", "Audit entries handed to the write-behind buffer")
+entries_written = metrics.registry.counter(
+    "audit_entries_written_total", "Buffered audit entries written to the database")
+flush_failures = metrics.registry.counter(
+    "audit_flush_failures_total", "Audit batch writes that failed and were retried")
+flush_seconds = metrics.registry.histogram(
+    "audit_flush_seconds", "Time to write one batch of buffered audit entries")
+
+
+class AuditWriter:
+    """A buffer of committed audit rows drained by one thread in batched INSERTs."""
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int, flush_seconds: float,
+                 max_pending: int):
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._flush_seconds = flush_seconds
+        self._max_pending = max_pending
+        self._buffer: List[dict] = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        # One batch at a time, so a failed batch goes back ahead of newer entries
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+
+    @property
+    def pending(self) -> int:
+        """Entries buffered or being written."""
+        with self._lock:
+            return len(self._buffer) + self._in_flight
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the thread and write out everything still buffered."""
+        if not self.running:
+            return
+        self.running = False
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            while self.flush():
+                pass
+        except Exception:
+            logger.exception("Failed to write %s audit entries on shutdown", self.pending)
+
+    def enqueue(self, rows: List[dict]) -> None:
+        """Buffer rows from a committed transaction."""
+        if not rows:
+            return
+        with self._lock:
+            self._buffer.extend(rows)
+            pending = len(self._buffer)
+        entries_buffered.inc(len(rows))
+        if pending >= self._max_pending or not self.running:
+            # The writer is behind (or gone); make this request pay for a batch rather than grow without bound
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to write audit entries; they stay buffered for the next attempt")
+        elif pending >= self._batch_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write up to one batch of buffered rows. Returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._buffer[:self._batch_size]
+                del self._buffer[:self._batch_size]
+                self._in_flight = len(batch)
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            db = self._session_factory()
+            try:
+                db.execute(insert(models.AuditLogEntry), batch)
+                db.commit()
+            except Exception:
+                db.rollback()
+                flush_failures.inc()
+                with self._lock:
+                    self._buffer[:0] = batch
+                raise
+            finally:
+                db.close()
+                with self._lock:
+                    self._in_flight = 0
+            flush_seconds.observe(time.perf_counter() - started)
+            entries_written.inc(len(batch))
+            return len(batch)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._flush_seconds)
+            self._wake.clear()
+            try:
+                while self.flush() == self._batch_size and not self._stop.is_set():
+                    pass
+            except Exception:
+                logger.exception("Failed to write audit entries; they stay buffered for the next attempt")
+                # Back off instead of spinning on a database that's refusing writes
+                self._stop.wait(self._flush_seconds)
+
+
+writer = AuditWriter(
+    SessionLocal,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_seconds=settings.AUDIT_FLUSH_SECONDS,
+    max_pending=settings.AUDIT_MAX_PENDING,
+)
+
+metrics.registry.gauge("audit_entries_pending", "Audit entries buffered and not yet written",
+                       callback=lambda: writer.pending)
+
+
+def _row(actor_id, action_type, target_type, target_id, details) -> dict:
+    return {
+        "actor_id": actor_id,
+        "action_type": action_type,
+        "target_type": target_type,
+        "target_id": target_id,
+        "details": details,
+        "created_at": datetime.now().timestamp(),
+    }
+
+
+def record_many(db: Session, rows: List[dict], durable: bool = False) -> None:
+    """
+    Log audit rows (AuditLogEntry column dicts) for the caller's transaction.
+    Buffered rows are written after it commits; durable rows commit with it.
+    """
+    if not rows:
+        return
+    if not durable and settings.AUDIT_BUFFERED and writer.running:
+        db.info.setdefault(PENDING_KEY, []).extend(rows)
+    elif len(rows) == 1:
+        db.add(models.AuditLogEntry(**rows[0]))
+    else:
+        db.execute(insert(models.AuditLogEntry), rows)
+
+
+def record(db: Session, actor_id, action_type: str, target_type=None, target_id=None, details=None,
+           durable: bool = False) -> None:
+    """Log one audit entry for the caller's transaction; see record_many."""
+    record_many(db, [_row(actor_id, action_type, target_type, target_id, details)], durable=durable)
+
+
+@event.listens_for(Session, "after_commit")
+def _hand_off_after_commit(session: Session) -> None:
+    rows = session.info.pop(PENDING_KEY, None)
+    if rows:
+        writer.enqueue(rows)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(PENDING_KEY, None)
+
+
+def audit_query(db: Session, actor_id=None, action_type=None, target_type=None, target_id=None,
+                created_after=None, created_before=None):
+    """Audit entries matching every given filter, newest first."""
+    if target_id is not None and target_type is None:
+        raise HTTPException(status_code=400, detail="target_id needs target_type")
+    entry = models.AuditLogEntry
+    query = db.query(entry)
+    if actor_id is not None:
+        query = query.filter(entry.actor_id == actor_id)
+    if action_type is not None:
+        query = query.filter(entry.action_type == action_type)
+    if target_type is not None:
+        query = query.filter(entry.target_type == target_type)
+    if target_id is not None:
+        query = query.filter(entry.target_id == target_id)
+    if created_after is not None:
+        query = query.filter(entry.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(entry.created_at < created_before)
+    return query.order_by(entry.created_at.desc(), entry.id.desc())
+
+
+def audit_page(db: Session, limit=None, cursor=None, **filters):
+    """One page of audit entries plus the next cursor, seeking on (created_at, id)."""
+    page_size = clamp_page_size(limit)
+    query = audit_query(db, **filters)
+    before_key = None
+    if cursor:
+        before_key = created_at, entry_id = decode_cursor(cursor, float, int)
+        entry = models.AuditLogEntry
+        query = query.filter(
+            entry.created_at <= created_at,
+            or_(entry.created_at < created_at, entry.id < entry_id),
+        )
+    rows = query.limit(page_size + 1).all()
+    if len(rows) <= page_size:
+        # The hot table ran out; the rest of the page may be in archived segments
+        rows.extend(archive_service.archived_entries(db, page_size + 1, before_key, **filters))
+        rows.sort(key=lambda entry: (entry.created_at, entry.id), reverse=True)
+    return split_page(rows, page_size, key=lambda entry: (entry.created_at, entry.id))
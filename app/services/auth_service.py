@@ -7,6 +7,7 @@ business logic.
 """
 import bcrypt
 from datetime import datetime, timedelta
+from typing import Optional
 from jose import jwt
 from ..config import settings
 
@@ -40,17 +41,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
-def create_access_token(data: dict) -> str:
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token.
     
     Args:
         data: The payload data to encode in the token.
+        expires_delta: How long the token is valid; defaults to ACCESS_TOKEN_EXPIRE_MINUTES.
         
     Returns:
         The encoded JWT token as a string.
     """
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    if expires_delta is None:
+        expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.utcnow() + expires_delta
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
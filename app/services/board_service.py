@@ -1,3 +1,5 @@
+from collections import Counter
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from .. import models, schemas
@@ -16,11 +18,15 @@ INITIAL_BOARDS = [
 def list_boards(db: Session):
     return db.query(models.ConditionBoard).order_by(models.ConditionBoard.id.asc()).all()
 
+def get_board(db: Session, board_id: int):
+    return db.query(models.ConditionBoard).filter(models.ConditionBoard.id == board_id).first()
+
 def create_board(db: Session, data: schemas.ConditionBoardCreate):
     existing = db.query(models.ConditionBoard).filter(models.ConditionBoard.name == data.name).first()
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Board name already exists")
     board = models.ConditionBoard(name=data.name, description=data.description)
+    board.stats = models.BoardStats(post_count=0)
     db.add(board)
     db.commit()
     db.refresh(board)
@@ -31,8 +37,141 @@ def seed_initial_boards(db: Session):
     if count == 0:
         for b in INITIAL_BOARDS:
             board = models.ConditionBoard(name=b["name"], description=b["description"])
+            board.stats = models.BoardStats(post_count=0)
             db.add(board)
         db.commit()
         print("Seeded initial condition boards")
     else:
-        print("Condition boards already present; skipping seed")
\ No newline at end of file
+        print("Condition boards already present; skipping seed")
+
+def list_board_stats(db: Session):
+    """Post count and latest post time for every board, read straight from the counters."""
+    return (
+        db.query(
+            models.ConditionBoard.id.label("board_id"),
+            func.coalesce(models.BoardStats.post_count, 0).label("post_count"),
+            models.BoardStats.latest_post_at,
+        )
+        .outerjoin(models.BoardStats, models.BoardStats.board_id == models.ConditionBoard.id)
+        .order_by(models.ConditionBoard.id.asc())
+        .all()
+    )
+
+def board_version(db: Session, board_id: int):
+    """Change version of a board's feed, or None if the board has no counters row yet."""
+    return db.query(models.BoardStats.version).filter(models.BoardStats.board_id == board_id).scalar()
+
+def boards_version(db: Session):
+    """Cheap validator for the board list: number of boards and the last time one changed."""
+    return db.query(func.count(models.ConditionBoard.id), func.max(models.ConditionBoard.updated_at)).one()
+
+def touch_boards(db: Session, board_ids):
+    """Bump the version of the given boards; board_ids may be a list or a subquery."""
+    db.query(models.BoardStats).filter(models.BoardStats.board_id.in_(board_ids)).update(
+        {models.BoardStats.version: models.BoardStats.version + 1},
+        synchronize_session=False,
+    )
+
+def touch_author_boards(db: Session, user_id: int):
+    """
+    Bump the version of every board the user has posted on.
+    Feeds embed the author's display name, so profile changes must invalidate them too.
+    """
+    touch_boards(db, select(models.Post.group_id).where(models.Post.author_id == user_id).distinct())
+
+def record_post_created(db: Session, post: models.Post):
+    """Count a new active post against its board. Runs in the caller's transaction."""
+    if post.group_id is None:
+        return
+    updated = db.query(models.BoardStats).filter(models.BoardStats.board_id == post.group_id).update(
+        {
+            models.BoardStats.post_count: models.BoardStats.post_count + 1,
+            models.BoardStats.latest_post_at: case(
+                (models.BoardStats.latest_post_at >= post.created_at, models.BoardStats.latest_post_at),
+                else_=post.created_at,
+            ),
+            models.BoardStats.version: models.BoardStats.version + 1,
+        },
+        synchronize_session=False,
+    )
+    if not updated:
+        # Boards created before the counters existed get their row lazily
+        db.add(models.BoardStats(board_id=post.group_id, post_count=1, latest_post_at=post.created_at, version=1))
+
+def record_post_removed(db: Session, post: models.Post):
+    """
+    Uncount a post that just left the active state. Runs in the caller's transaction.
+    The latest timestamp is re-read with a MAX() that the feed index answers in one seek.
+    """
+    if post.group_id is None:
+        return
+    latest = (
+        db.query(func.max(models.Post.created_at))
+        .filter(
+            models.Post.status == models.PostStatus.ACTIVE,
+            models.Post.group_id == post.group_id,
+            models.Post.id != post.id,
+        )
+        .scalar()
+    )
+    db.query(models.BoardStats).filter(models.BoardStats.board_id == post.group_id).update(
+        {
+            models.BoardStats.post_count: models.BoardStats.post_count - 1,
+            models.BoardStats.latest_post_at: latest,
+            models.BoardStats.version: models.BoardStats.version + 1,
+        },
+        synchronize_session=False,
+    )
+
+def record_posts_removed(db: Session, posts):
+    """
+    Uncount posts whose status was just set away from active, with one MAX() and
+    one UPDATE per affected board rather than per post. Runs in the caller's transaction.
+    """
+    removed = Counter(post.group_id for post in posts if post.group_id is not None)
+    for board_id, count in removed.items():
+        latest = (
+            db.query(func.max(models.Post.created_at))
+            .filter(models.Post.status == models.PostStatus.ACTIVE, models.Post.group_id == board_id)
+            .scalar()
+        )
+        db.query(models.BoardStats).filter(models.BoardStats.board_id == board_id).update(
+            {
+                models.BoardStats.post_count: models.BoardStats.post_count - count,
+                models.BoardStats.latest_post_at: latest,
+                models.BoardStats.version: models.BoardStats.version + 1,
+            },
+            synchronize_session=False,
+        )
+
+def rebuild_board_stats(db: Session):
+    """
+    Recompute every board's counters from the posts table.
+    Returns a list of (board_id, old_count, new_count) for boards whose count had drifted.
+    """
+    actual = {
+        group_id: (count, latest)
+        for group_id, count, latest in db.query(
+            models.Post.group_id, func.count(models.Post.id), func.max(models.Post.created_at)
+        )
+        .filter(models.Post.status == models.PostStatus.ACTIVE, models.Post.group_id.isnot(None))
+        .group_by(models.Post.group_id)
+        .all()
+    }
+    existing = {stats.board_id: stats for stats in db.query(models.BoardStats).all()}
+    board_ids = {board_id for (board_id,) in db.query(models.ConditionBoard.id).all()}
+
+    drifted = []
+    for board_id in board_ids | set(actual) | set(existing):
+        count, latest = actual.get(board_id, (0, None))
+        stats = existing.get(board_id)
+        if stats is None:
+            stats = models.BoardStats(board_id=board_id, post_count=0, version=0)
+            db.add(stats)
+        if (stats.post_count or 0) != count or stats.latest_post_at != latest:
+            drifted.append((board_id, stats.post_count or 0, count))
+            stats.post_count = count
+            stats.latest_post_at = latest
+            stats.version = (stats.version or 0) + 1
+    db.commit()
+    return drifted
@@ -0,0 +1,168 @@
+"""
+Report clusters: one moderation queue item per (post, reason).
+
+Every report on a post is filed into the open cluster for its post and
+reason with a single upsert, which bumps the count, the last report
+time and the reporter list. Once a cluster's reports have all been
+handled it closes, and the next report on that pair opens a new one.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import case, func, or_, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, joinedload
+
+from .. import models
+from ..constants import REPORT_CLUSTER_MAX_REPORTERS
+from ..pagination import clamp_page_size, decode_cursor, split_page
+
+OPEN_CLUSTER = text("status = 'OPEN'")
+
+# Sort name -> (column, descending)
+SORTS = {
+    "newest": (models.ReportCluster.last_reported_at, True),
+    "oldest": (models.ReportCluster.first_reported_at, False),
+    "largest": (models.ReportCluster.report_count, True),
+}
+
+
+def record_report(db: Session, report: models.Report) -> None:
+    """File a new report into its open cluster. Runs in the caller's transaction."""
+    if report.post_id is None:
+        return
+    clusters = models.ReportCluster.__table__
+    insert = sqlite_insert(clusters).values(
+        post_id=report.post_id,
+        reason=report.reason,
+        is_crisis=bool(report.is_crisis),
+        reported_user_id=report.reported_user_id,
+        status=models.ReportStatus.OPEN,
+        report_count=1,
+        first_reported_at=report.created_at,
+        last_reported_at=report.created_at,
+        reporter_ids=json.dumps([report.reporting_user_id]),
+    )
+    db.execute(insert.on_conflict_do_update(
+        index_elements=[clusters.c.post_id, clusters.c.reason],
+        index_where=OPEN_CLUSTER,
+        set_={
+            "report_count": clusters.c.report_count + 1,
+            "last_reported_at": func.max(clusters.c.last_reported_at, insert.excluded.last_reported_at),
+            "reporter_ids": case(
+                (
+                    func.json_array_length(clusters.c.reporter_ids) < REPORT_CLUSTER_MAX_REPORTERS,
+                    func.json_insert(clusters.c.reporter_ids, "$[#]", report.reporting_user_id),
+                ),
+                else_=clusters.c.reporter_ids,
+            ),
+        },
+    ))
+
+
+def members_query(db: Session, cluster: models.ReportCluster):
+    """The cluster's reports still waiting for a moderator."""
+    return db.query(models.Report).filter(
+        models.Report.post_id == cluster.post_id,
+        models.Report.reason == cluster.reason,
+        models.Report.status == models.ReportStatus.OPEN,
+    )
+
+
+def close_settled(db: Session, post_ids, status: models.ReportStatus, resolution_impact: str) -> None:
+    """
+    Close open clusters on these posts that no longer have open reports, after
+    reports were handled one at a time. Runs in the caller's transaction.
+    """
+    post_ids = {post_id for post_id in post_ids if post_id is not None}
+    if not post_ids:
+        return
+    # The session doesn't autoflush, and the check below must see the reports just handled
+    db.flush()
+    open_member = select(models.Report.id).where(
+        models.Report.post_id == models.ReportCluster.post_id,
+        models.Report.reason == models.ReportCluster.reason,
+        models.Report.status == models.ReportStatus.OPEN,
+    ).exists()
+    db.query(models.ReportCluster).filter(
+        models.ReportCluster.post_id.in_(post_ids),
+        models.ReportCluster.status == models.ReportStatus.OPEN,
+        ~open_member,
+    ).update(
+        {
+            models.ReportCluster.status: status,
+            models.ReportCluster.resolution_impact: resolution_impact,
+            models.ReportCluster.resolved_at: datetime.now().timestamp(),
+        },
+        synchronize_session=False,
+    )
+
+
+def cluster_queue_query(db: Session, status="open", include_crisis=True, reason=None, group_id=None, sort="newest"):
+    """Clusters for the moderation dashboard. Unknown status values are ignored."""
+    query = db.query(models.ReportCluster).options(
+        joinedload(models.ReportCluster.post).joinedload(models.Post.author),
+    )
+    if status:
+        try:
+            query = query.filter(models.ReportCluster.status == models.ReportStatus(status))
+        except ValueError:
+            pass
+    if not include_crisis:
+        query = query.filter(models.ReportCluster.is_crisis == False)
+    if reason is not None:
+        query = query.filter(models.ReportCluster.reason == reason)
+    if group_id is not None:
+        query = query.filter(models.ReportCluster.post.has(models.Post.group_id == group_id))
+
+    column, descending = SORTS[sort]
+    if descending:
+        return query.order_by(column.desc(), models.ReportCluster.id.desc())
+    return query.order_by(column.asc(), models.ReportCluster.id.asc())
+
+
+def cluster_queue_page(db: Session, limit=None, cursor=None, sort="newest", **filters):
+    """One page of clusters plus the next cursor, seeking on (sort key, id)."""
+    page_size = clamp_page_size(limit)
+    query = cluster_queue_query(db, sort=sort, **filters)
+    column, descending = SORTS[sort]
+    if cursor:
+        value, cluster_id = decode_cursor(cursor, float, int)
+        if descending:
+            query = query.filter(column <= value, or_(column < value, models.ReportCluster.id < cluster_id))
+        else:
+            query = query.filter(column >= value, or_(column > value, models.ReportCluster.id > cluster_id))
+    rows = query.limit(page_size + 1).all()
+    return split_page(rows, page_size, key=lambda cluster: (getattr(cluster, column.key), cluster.id))
+
+
+def rebuild_clusters(db: Session) -> int:
+    """Build open clusters from open reports, for databases that predate clustering. Returns how many."""
+    clusters, reporters = {}, {}
+    for report in (
+        db.query(models.Report)
+        .filter(models.Report.status == models.ReportStatus.OPEN, models.Report.post_id.isnot(None))
+        .order_by(models.Report.created_at, models.Report.id)
+    ):
+        key = (report.post_id, report.reason)
+        cluster = clusters.get(key)
+        if cluster is None:
+            cluster = clusters[key] = models.ReportCluster(
+                post_id=report.post_id,
+                reason=report.reason,
+                is_crisis=bool(report.is_crisis),
+                reported_user_id=report.reported_user_id,
+                status=models.ReportStatus.OPEN,
+                report_count=0,
+                first_reported_at=report.created_at,
+            )
+            reporters[key] = []
+        cluster.report_count += 1
+        cluster.last_reported_at = report.created_at
+        if len(reporters[key]) < REPORT_CLUSTER_MAX_REPORTERS:
+            reporters[key].append(report.reporting_user_id)
+    for key, cluster in clusters.items():
+        cluster.reporter_ids = json.dumps(reporters[key])
+        db.add(cluster)
+    db.commit()
+    return len(clusters)
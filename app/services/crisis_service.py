@@ -2,6 +2,7 @@
 
 from sqlalchemy.orm import Session
 from .. import models, schemas
+from . import audit_service, cluster_service, summary_service
 from datetime import datetime
 
 def escalate_crisis(db: Session, data: schemas.CrisisEscalationInput, current_user: models.User):
@@ -24,29 +25,30 @@ def escalate_crisis(db: Session, data: schemas.CrisisEscalationInput, current_us
     )
     
     db.add(report)
-    db.commit()
-    db.refresh(report)
+    # Flush for ids; everything commits together so a failure can't leave a ticket without its report or audit entry
+    db.flush()
+    cluster_service.record_report(db, report)
+    summary_service.record_report_opened(db, report)
     
     # Create crisis ticket linked to the report
     ticket = models.CrisisTicket(
         user_id=current_user.id,
         report_id=report.id
     )
-
     db.add(ticket)
-    db.commit()
-    db.refresh(ticket)
+    db.flush()
 
-    # Create audit log entry with crisis details
+    # Create audit log entry with crisis details; it must be on disk before the response
     details = data.content_snip[:100] if data.content_snip else "Crisis escalation without content details"
-    audit = models.AuditLogEntry(
+    audit_service.record(
+        db,
         actor_id=current_user.id,
         action_type="crisis_escalation",
         target_type="CrisisTicket",
         target_id=ticket.id,
-        details=details
+        details=details,
+        durable=True,
     )
-    db.add(audit)
     db.commit()
 
-    return ticket
\ No newline at end of file
+    return ticket
@@ -0,0 +1,112 @@
+"""
+Password hashing and verification off the request threadpool.
+
+bcrypt is deliberately slow, and register and login used to run it on
+the threadpool that serves every sync endpoint, so a burst of sign-ins
+starved cheap reads. Hashing now runs in a small process pool. At most
+PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT calls may be in flight;
+beyond that HashingBusy is raised at once, so a burst holds a bounded
+number of request threads instead of all of them.
+"""
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from .. import metrics
+from ..config import settings
+from . import auth_service
+
+T = TypeVar("T")
+
+hash_seconds = metrics.registry.histogram(
+    "password_hash_seconds", "Time to hash or verify a password, including time queued")
+hash_rejected = metrics.registry.counter(
+    "password_hash_rejected_total", "Password operations refused because the hashing queue was full")
+
+
+class HashingBusy(Exception):
+    """The hashing queue is full. retry_after is a rough estimate, in seconds, of when there will be room."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class HashingPool:
+    """
+    A process pool with a limit on calls waiting for it. With no workers
+    calls run on the calling thread, still subject to the limit.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self._workers = workers
+        self._capacity = workers + queue_limit
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for a worker."""
+        return max(0, self._in_flight - self._workers)
+
+    def run(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._in_flight >= self._capacity:
+                hash_rejected.inc()
+                raise HashingBusy(self._retry_after())
+            self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            if self._workers == 0:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            hash_seconds.observe(time.perf_counter() - started)
+            with self._lock:
+                self._in_flight -= 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Forking a process that already runs threads can copy held locks into the child
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _retry_after(self) -> int:
+        if not hash_seconds.count:
+            return 1
+        average = hash_seconds.sum / hash_seconds.count
+        return max(1, math.ceil(average * self._in_flight / max(self._workers, 1)))
+
+
+pool = HashingPool(workers=settings.PASSWORD_HASH_WORKERS, queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT)
+
+metrics.registry.gauge("password_hash_queue_depth", "Password operations waiting for a hashing worker",
+                       callback=lambda: pool.queue_depth)
+metrics.registry.gauge("password_hash_in_flight", "Password operations queued or running",
+                       callback=lambda: pool.in_flight)
+
+
+def hash_password(password: str) -> str:
+    return pool.run(auth_service.hash_password, password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    if not hashed_password:
+        return False
+    return pool.run(auth_service.verify_password, plain_password, hashed_password)
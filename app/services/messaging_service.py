@@ -1,6 +1,9 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, status
-from .. import models, schemas
+from .. import event_hub, models, schemas
+from . import board_service, screening_service
+from ..pagination import clamp_page_size, decode_cursor, split_page
 
 def post_message(db, author, data):
     if author.is_banned:
@@ -8,11 +11,50 @@ def post_message(db, author, data):
 
     post = models.Post(author_id=author.id, group_id=data.group_id, content=data.content, created_at=data.posttime)
     db.add(post)
+    board_service.record_post_created(db, post)
+    job = screening_service.create_job(db, post)
     db.commit()
     db.refresh(post)
+    event_hub.publish_post_created(post)
+    screening_service.submit(job)
 
     return post
 
+def feed_query(db, group_id=None):
+    """Active posts, newest first, optionally limited to one condition board."""
+    query = (
+        db.query(models.Post)
+        .options(joinedload(models.Post.author))
+        .filter(models.Post.status == models.PostStatus.ACTIVE)
+    )
+
+    if group_id is not None:
+        query = query.filter(models.Post.group_id == group_id)
+
+    return query.order_by(models.Post.created_at.desc(), models.Post.id.desc())
+
+def feed_page_query(db, group_id=None, cursor=None):
+    """Feed query seeking past the (created_at, id) position encoded in cursor."""
+    query = feed_query(db, group_id)
+
+    if cursor:
+        created_at, post_id = decode_cursor(cursor, float, int)
+        query = query.filter(
+            models.Post.created_at <= created_at,
+            or_(models.Post.created_at < created_at, models.Post.id < post_id),
+        )
+
+    return query
+
+def list_posts_page(db, group_id=None, limit=None, cursor=None):
+    """
+    Return one page of the feed plus the cursor for the next page.
+    Uses keyset pagination on (created_at, id) so deep pages cost the same as the first.
+    """
+    page_size = clamp_page_size(limit)
+    rows = feed_page_query(db, group_id, cursor).limit(page_size + 1).all()
+    return split_page(rows, page_size, key=lambda post: (post.created_at, post.id))
+
 def delete_post(db, user, post_id):
     """Allow users to delete their own posts"""
     post = db.query(models.Post).filter(models.Post.id == post_id).first()
@@ -26,8 +68,13 @@ def delete_post(db, user, post_id):
     if post.status == models.PostStatus.DELETED:
         raise HTTPException(status_code=400, detail="Post is already deleted")
     
+    was_active = post.status == models.PostStatus.ACTIVE
     post.status = models.PostStatus.DELETED
+    if was_active:
+        board_service.record_post_removed(db, post)
     db.commit()
     db.refresh(post)
+    if was_active:
+        event_hub.publish_post_deleted(post)
     
     return post
\ No newline at end of file
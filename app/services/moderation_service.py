@@ -1,10 +1,94 @@
 #uses the db model to store the action taken which may update a user in the user database
-from sqlalchemy.orm import Session
+from datetime import datetime
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, status
-from .. import models, schemas
+from .. import event_hub, models, schemas
+from ..pagination import clamp_page_size, decode_cursor, split_page
+from ..principals import principal_cache
+from . import anonymization_service, audit_service, board_service, cluster_service, summary_service, token_service
 
 VALID = {"warn", "ban", "dismiss", "delete_post", "delete_account"}
 
+def report_queue_query(db, status=None, include_crisis=True, reason=None, group_id=None,
+                       created_after=None, created_before=None, oldest_first=False):
+    """
+    Reports for the moderation dashboard, newest first or oldest first.
+    Unknown status values are ignored; group_id keeps reports on that board's posts.
+    """
+    # ReportRead embeds both users and the post with its author; load them in the same SELECT
+    query = db.query(models.Report).options(
+        joinedload(models.Report.reported_user),
+        joinedload(models.Report.reporting_user),
+        joinedload(models.Report.post).joinedload(models.Post.author),
+    )
+
+    # Optionally filter out crisis reports
+    if not include_crisis:
+        query = query.filter(models.Report.is_crisis == False)
+
+    if status:
+        try:
+            status_enum = models.ReportStatus(status)
+            query = query.filter(models.Report.status == status_enum)
+        except ValueError:
+            pass
+
+    if reason is not None:
+        query = query.filter(models.Report.reason == reason)
+    if group_id is not None:
+        query = query.filter(models.Report.post.has(models.Post.group_id == group_id))
+    if created_after is not None:
+        query = query.filter(models.Report.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(models.Report.created_at < created_before)
+
+    if oldest_first:
+        return query.order_by(models.Report.created_at.asc(), models.Report.id.asc())
+    return query.order_by(models.Report.created_at.desc(), models.Report.id.desc())
+
+def report_queue_page(db, limit=None, cursor=None, oldest_first=False, **filters):
+    """
+    One page of the report queue plus the cursor for the next page.
+    Keyset pagination on (created_at, id) in the chosen direction, so every page costs the same.
+    """
+    page_size = clamp_page_size(limit)
+    query = report_queue_query(db, oldest_first=oldest_first, **filters)
+    if cursor:
+        created_at, report_id = decode_cursor(cursor, float, int)
+        if oldest_first:
+            query = query.filter(
+                models.Report.created_at >= created_at,
+                or_(models.Report.created_at > created_at, models.Report.id > report_id),
+            )
+        else:
+            query = query.filter(
+                models.Report.created_at <= created_at,
+                or_(models.Report.created_at < created_at, models.Report.id < report_id),
+            )
+    rows = query.limit(page_size + 1).all()
+    return split_page(rows, page_size, key=lambda report: (report.created_at, report.id))
+
+def _close_report(db, report, status_value, resolution_impact):
+    """
+    Close report if it is still open, and update its cluster and the dashboard counters.
+    The status condition lets only one of two moderators acting at once close it; returns
+    whether this call did, and only then should the caller act on the report or audit it.
+    Runs in the caller's transaction.
+    """
+    now = datetime.now().timestamp()
+    closed = db.execute(
+        update(models.Report)
+        .where(models.Report.id == report.id, models.Report.status == models.ReportStatus.OPEN)
+        .values(status=status_value, resolution_impact=resolution_impact, resolved_at=now)
+        .returning(models.Report.id)
+    ).first()
+    if closed is None:
+        return False
+    summary_service.record_reports_closed(db, status_value, report.is_crisis, now)
+    cluster_service.close_settled(db, [report.post_id], status_value, resolution_impact)
+    return True
+
 def determine_action(db, moderator, data):
     # checks if the action reported is valid, and from there applies a given action to user. recorded in audit log
     if data.action not in VALID:
@@ -18,38 +102,46 @@ def determine_action(db, moderator, data):
     # Crisis reports can only use delete_post or dismiss, not warn/ban/delete_account
     if report.is_crisis and data.action not in {"delete_post", "dismiss"}:
         raise HTTPException(status_code=400, detail="Crisis reports can only use 'Delete Post' or 'Dismiss'")
+    if data.action == "delete_post" and not report.post_id:
+        raise HTTPException(status_code=400, detail="No post associated with this report")
+    if data.action == "delete_account" and not report.reported_user_id:
+        raise HTTPException(status_code=400, detail="No user associated with this report")
+
+    # A report that was already closed, or that another moderator closed meanwhile, is returned as it
+    # stands: the action, audit entry and counters belong to whoever closed it
+    status_value, impact, _ = _bulk_resolution(report, data.action)
+    if not _close_report(db, report, status_value, impact):
+        db.commit()
+        db.refresh(report)
+        return report
     
     # Handle delete_post action - delete the post, warn the user, and resolve the report
     if data.action == "delete_post":
-        if not report.post_id:
-            raise HTTPException(status_code=400, detail="No post associated with this report")
         post = db.query(models.Post).filter(models.Post.id == report.post_id).first()
+        removed_post = None
         if post:
+            was_active = post.status == models.PostStatus.ACTIVE
             post.status = models.PostStatus.DELETED
-        # Also warn the user if there's a reported user (non-crisis only)
-        if report.reported_user_id and not report.is_crisis:
-            reported_user = db.query(models.User).get(report.reported_user_id)
-            # User is warned - could track warning count in future
-            report.resolution_impact = "post_deleted_user_warned"
-        else:
-            report.resolution_impact = "post_deleted"
-        report.status = models.ReportStatus.RESOLVED
-        audit = models.AuditLogEntry(
-            actor_id=moderator.id, 
-            action_type="moderation_delete_post_warn" if not report.is_crisis else "moderation_delete_post", 
-            target_type="Report", 
-            target_id=report.id, 
-            details=data.mod_note or ""
+            if was_active:
+                board_service.record_post_removed(db, post)
+                removed_post = post
+        # The user is also warned if there's a reported user (non-crisis only); see _bulk_resolution
+        audit_service.record(
+            db,
+            actor_id=moderator.id,
+            action_type="moderation_delete_post_warn" if not report.is_crisis else "moderation_delete_post",
+            target_type="Report",
+            target_id=report.id,
+            details=data.mod_note or "",
         )
-        db.add(audit)
         db.commit()
         db.refresh(report)
+        if removed_post is not None:
+            event_hub.publish_post_deleted(removed_post)
         return report
     
     # Handle delete_account action - ban and delete the account, resolve the report
     if data.action == "delete_account":
-        if not report.reported_user_id:
-            raise HTTPException(status_code=400, detail="No user associated with this report")
         reported_user = db.query(models.User).get(report.reported_user_id)
         if reported_user:
             # Ban the user first
@@ -57,26 +149,18 @@ def determine_action(db, moderator, data):
             # Then delete their account
             from ..services import account_service
             account_service.delete_account(db, reported_user, data.mod_note or "Banned and deleted by moderator")
-        report.status = models.ReportStatus.RESOLVED
-        report.resolution_impact = "account_banned_deleted"
-        audit = models.AuditLogEntry(
-            actor_id=moderator.id, 
-            action_type="moderation_ban_delete_account", 
-            target_type="Report", 
-            target_id=report.id, 
-            details=data.mod_note or ""
+        audit_service.record(
+            db,
+            actor_id=moderator.id,
+            action_type="moderation_ban_delete_account",
+            target_type="Report",
+            target_id=report.id,
+            details=data.mod_note or "",
         )
-        db.add(audit)
         db.commit()
+        principal_cache.invalidate(report.reported_user_id)
         db.refresh(report)
         return report
-    
-    # applying the action - dismiss goes to DISMISSED, others go to RESOLVED
-    if data.action == "dismiss":
-        report.status = models.ReportStatus.DISMISSED
-    else:
-        report.status = models.ReportStatus.RESOLVED
-    report.resolution_impact = data.action
 
     if report.reported_user_id:
         reported_user = db.query(models.User).get(report.reported_user_id)
@@ -84,14 +168,260 @@ def determine_action(db, moderator, data):
         if reported_user:
             if data.action == "ban":
                 reported_user.is_banned = True
+                token_service.revoke_user_tokens(db, reported_user.id)
 
-    audit = models.AuditLogEntry(actor_id=moderator.id, action_type=f"moderation_{data.action}", target_type="Report", target_id=report.id, details=data.mod_note or "")
-    db.add(audit)
+    audit_service.record(db, actor_id=moderator.id, action_type=f"moderation_{data.action}", target_type="Report", target_id=report.id, details=data.mod_note or "")
     db.commit()
+    if data.action == "ban" and report.reported_user_id:
+        principal_cache.invalidate(report.reported_user_id)
     db.refresh(report)
 
     return report
 
+BULK_CHUNK_SIZE = 500
+
+def _chunks(ids, size=BULK_CHUNK_SIZE):
+    """Split ids so IN lists stay under SQLite's bound-parameter limit."""
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+def _bulk_targets(db, data):
+    """The reports a bulk action selects, with the fields it needs, keyed by id."""
+    selectors = [data.report_ids is not None, data.post_id is not None, data.reported_user_id is not None]
+    if sum(selectors) != 1:
+        raise HTTPException(status_code=400, detail="Give exactly one of report_ids, post_id or reported_user_id")
+
+    columns = (
+        models.Report.id,
+        models.Report.status,
+        models.Report.is_crisis,
+        models.Report.post_id,
+        models.Report.reported_user_id,
+    )
+    if data.report_ids is not None:
+        rows = []
+        for chunk in _chunks(set(data.report_ids)):
+            rows.extend(db.query(*columns).filter(models.Report.id.in_(chunk)).all())
+        return {row.id: row for row in rows}
+
+    query = db.query(*columns).filter(models.Report.status == models.ReportStatus.OPEN)
+    if data.post_id is not None:
+        query = query.filter(models.Report.post_id == data.post_id)
+    else:
+        query = query.filter(models.Report.reported_user_id == data.reported_user_id)
+    return {row.id: row for row in query.order_by(models.Report.id).all()}
+
+def _bulk_rejection(report, action):
+    """Why action can't apply to report, following determine_action's rules, or None."""
+    if report.status != models.ReportStatus.OPEN:
+        return "not_open", None
+    if report.is_crisis and action not in {"delete_post", "dismiss"}:
+        return "rejected", "Crisis reports can only use 'Delete Post' or 'Dismiss'"
+    if action == "delete_post" and not report.post_id:
+        return "rejected", "No post associated with this report"
+    if action == "delete_account" and not report.reported_user_id:
+        return "rejected", "No user associated with this report"
+    return None
+
+def _bulk_resolution(report, action):
+    """The (status, resolution_impact, audit action_type) determine_action would record."""
+    if action == "delete_post":
+        if report.reported_user_id and not report.is_crisis:
+            return models.ReportStatus.RESOLVED, "post_deleted_user_warned", "moderation_delete_post_warn"
+        return models.ReportStatus.RESOLVED, "post_deleted", "moderation_delete_post"
+    if action == "delete_account":
+        return models.ReportStatus.RESOLVED, "account_banned_deleted", "moderation_ban_delete_account"
+    if action == "dismiss":
+        return models.ReportStatus.DISMISSED, action, f"moderation_{action}"
+    return models.ReportStatus.RESOLVED, action, f"moderation_{action}"
+
+def bulk_action(db, moderator, data):
+    """
+    Apply one action to many reports in a single transaction.
+
+    Each report gets the outcome determine_action would give it, but
+    reports, posts and users are updated with one set-based UPDATE per
+    chunk and the audit entries are logged as one batch. Reports that
+    aren't open, or that the action can't apply to, are skipped and
+    reported back.
+    """
+    if data.action not in VALID:
+        raise HTTPException(status_code=400, detail="Invalid action")
+
+    targets = _bulk_targets(db, data)
+    requested = data.report_ids if data.report_ids is not None else list(targets)
+    outcomes = {}
+    applied = []
+    for report_id in dict.fromkeys(requested):
+        report = targets.get(report_id)
+        if report is None:
+            outcomes[report_id] = schemas.BulkActionOutcome(report_id=report_id, outcome="not_found")
+            continue
+        rejection = _bulk_rejection(report, data.action)
+        if rejection is not None:
+            outcome, detail = rejection
+            outcomes[report_id] = schemas.BulkActionOutcome(report_id=report_id, outcome=outcome, detail=detail)
+            continue
+        applied.append(report)
+        outcomes[report_id] = schemas.BulkActionOutcome(report_id=report_id, outcome="applied")
+
+    # One UPDATE per resolution and crisis flag. The status condition skips reports another
+    # moderator resolved meanwhile; only the ids it returns count as applied, so the
+    # outcomes, side effects, audit entries and dashboard counters cover exactly those
+    now = datetime.now().timestamp()
+    by_resolution = {}
+    for report in applied:
+        key = (_bulk_resolution(report, data.action), bool(report.is_crisis))
+        by_resolution.setdefault(key, []).append(report)
+    closed_ids = set()
+    for ((status_value, impact, _), is_crisis), reports in by_resolution.items():
+        closed = set()
+        for chunk in _chunks(report.id for report in reports):
+            closed.update(db.execute(
+                update(models.Report)
+                .where(models.Report.id.in_(chunk), models.Report.status == models.ReportStatus.OPEN)
+                .values(status=status_value, resolution_impact=impact, resolved_at=now)
+                .returning(models.Report.id)
+            ).scalars())
+        summary_service.record_reports_closed(db, status_value, is_crisis, now, len(closed))
+        for chunk in _chunks({report.post_id for report in reports if report.post_id and report.id in closed}):
+            cluster_service.close_settled(db, chunk, status_value, impact)
+        closed_ids |= closed
+    for report in applied:
+        if report.id not in closed_ids:
+            outcomes[report.id] = schemas.BulkActionOutcome(report_id=report.id, outcome="not_open")
+    applied = [report for report in applied if report.id in closed_ids]
+
+    # Side effects on posts and users, deduplicated across reports
+    removed_posts = []
+    affected_users = set()
+    if data.action == "delete_post":
+        post_ids = {report.post_id for report in applied}
+        for chunk in _chunks(post_ids):
+            removed_posts.extend(
+                db.query(models.Post.id, models.Post.group_id)
+                .filter(models.Post.id.in_(chunk), models.Post.status == models.PostStatus.ACTIVE)
+                .all()
+            )
+        for chunk in _chunks(post.id for post in removed_posts):
+            db.query(models.Post).filter(models.Post.id.in_(chunk)).update(
+                {models.Post.status: models.PostStatus.DELETED}, synchronize_session=False)
+        board_service.record_posts_removed(db, removed_posts)
+    elif data.action == "ban":
+        affected_users = {report.reported_user_id for report in applied if report.reported_user_id}
+        for chunk in _chunks(affected_users):
+            db.query(models.User).filter(models.User.id.in_(chunk)).update(
+                {models.User.is_banned: True}, synchronize_session=False)
+        for user_id in affected_users:
+            token_service.revoke_user_tokens(db, user_id)
+    elif data.action == "delete_account":
+        from ..services import account_service
+        affected_users = {report.reported_user_id for report in applied}
+        users = []
+        for chunk in _chunks(affected_users):
+            users.extend(db.query(models.User).filter(models.User.id.in_(chunk)).all())
+        for user in users:
+            user.is_banned = True
+            if user.is_active:
+                account_service.anonymize_account(db, user, data.mod_note or "Banned and deleted by moderator")
+
+    if applied:
+        audit_service.record_many(db, [
+            {
+                "actor_id": moderator.id,
+                "action_type": _bulk_resolution(report, data.action)[2],
+                "target_type": "Report",
+                "target_id": report.id,
+                "details": data.mod_note or "",
+                "created_at": now,
+            }
+            for report in applied
+        ])
+    db.commit()
+
+    for user_id in affected_users:
+        principal_cache.invalidate(user_id)
+    if data.action == "delete_account":
+        anonymization_service.submit()
+    for post in removed_posts:
+        event_hub.publish_post_deleted(post)
+
+    return schemas.BulkActionResult(applied=len(applied), results=list(outcomes.values()))
+
+def resolve_cluster(db, moderator, cluster_id, data):
+    """
+    Apply one action to every open report in a cluster.
+
+    The post or account action happens once, the member reports are
+    resolved with a single UPDATE on the cluster's (post_id, reason), and
+    the cluster gets one audit entry instead of one per report.
+    """
+    if data.action not in VALID:
+        raise HTTPException(status_code=400, detail="Invalid action")
+
+    cluster = db.get(models.ReportCluster, cluster_id)
+    if not cluster:
+        raise HTTPException(status_code=404, detail="Can't find report cluster")
+    if cluster.status != models.ReportStatus.OPEN:
+        raise HTTPException(status_code=400, detail="Report cluster is already closed")
+    if cluster.is_crisis and data.action not in {"delete_post", "dismiss"}:
+        raise HTTPException(status_code=400, detail="Crisis reports can only use 'Delete Post' or 'Dismiss'")
+    if data.action == "delete_account" and not cluster.reported_user_id:
+        raise HTTPException(status_code=400, detail="No user associated with this report cluster")
+
+    removed_post = None
+    affected_user = None
+    if data.action == "delete_post":
+        post = db.get(models.Post, cluster.post_id)
+        if post and post.status == models.PostStatus.ACTIVE:
+            post.status = models.PostStatus.DELETED
+            board_service.record_post_removed(db, post)
+            removed_post = post
+    elif data.action in {"ban", "delete_account"} and cluster.reported_user_id:
+        reported_user = db.get(models.User, cluster.reported_user_id)
+        if reported_user:
+            affected_user = reported_user.id
+            reported_user.is_banned = True
+            if data.action == "ban":
+                token_service.revoke_user_tokens(db, reported_user.id)
+            elif reported_user.is_active:
+                from ..services import account_service
+                account_service.anonymize_account(db, reported_user, data.mod_note or "Banned and deleted by moderator")
+
+    status_value, impact, _ = _bulk_resolution(cluster, data.action)
+    now = datetime.now().timestamp()
+    applied = cluster_service.members_query(db, cluster).update(
+        {
+            models.Report.status: status_value,
+            models.Report.resolution_impact: impact,
+            models.Report.resolved_at: now,
+        },
+        synchronize_session=False,
+    )
+    summary_service.record_reports_closed(db, status_value, cluster.is_crisis, now, applied)
+    cluster.status = status_value
+    cluster.resolution_impact = impact
+    cluster.resolved_at = now
+    audit_service.record(
+        db,
+        actor_id=moderator.id,
+        action_type=f"moderation_cluster_{data.action}",
+        target_type="ReportCluster",
+        target_id=cluster.id,
+        details=data.mod_note or "",
+    )
+    db.commit()
+
+    if affected_user is not None:
+        principal_cache.invalidate(affected_user)
+        if data.action == "delete_account":
+            anonymization_service.submit()
+    if removed_post is not None:
+        event_hub.publish_post_deleted(removed_post)
+    db.refresh(cluster)
+    return schemas.ClusterActionResult(cluster=cluster, applied=applied)
+
 def delete_post(db, moderator, post_id, reason, report_id=None):
     # audit log records post being deleted, with error-handling
     post = db.query(models.Post).filter(models.Post.id == post_id).first()
@@ -102,11 +432,12 @@ def delete_post(db, moderator, post_id, reason, report_id=None):
     if post.status == models.PostStatus.DELETED:
         raise HTTPException(status_code=400, detail="Post was already deleted")
     
+    was_active = post.status == models.PostStatus.ACTIVE
     post.status = models.PostStatus.DELETED
+    if was_active:
+        board_service.record_post_removed(db, post)
 
-    audit = models.AuditLogEntry(actor_id=moderator.id, action_type="delete_post", target_type="Post", target_id=post.id, details=reason or "")
-
-    db.add(audit)
+    audit_service.record(db, actor_id=moderator.id, action_type="delete_post", target_type="Post", target_id=post.id, details=reason or "")
     
     # Resolve the report if report_id is provided
     if report_id:
@@ -114,23 +445,23 @@ def delete_post(db, moderator, post_id, reason, report_id=None):
     
     db.commit()
     db.refresh(post)
+    if was_active:
+        event_hub.publish_post_deleted(post)
 
     return post
 
 def _resolve_report(db, moderator, report_id, resolution_impact, reason):
     """Helper to resolve a report with the given impact. Internal use only."""
     report = db.query(models.Report).filter(models.Report.id == report_id).first()
-    if report and report.status == models.ReportStatus.OPEN:
-        report.status = models.ReportStatus.RESOLVED
-        report.resolution_impact = resolution_impact
-        audit = models.AuditLogEntry(
+    if report and _close_report(db, report, models.ReportStatus.RESOLVED, resolution_impact):
+        audit_service.record(
+            db,
             actor_id=moderator.id,
             action_type=f"moderation_{resolution_impact}",
             target_type="Report",
             target_id=report.id,
-            details=reason or ""
+            details=reason or "",
         )
-        db.add(audit)
 
 def delete_account_as_moderator(db, moderator, user_to_delete, reason, report_id=None):
     """Delete a user account as a moderator action with optional report resolution."""
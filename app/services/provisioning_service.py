@@ -0,0 +1,201 @@
+"""
+Bulk user provisioning from CSV or JSON-lines files.
+
+Partner sites onboard cohorts of thousands of users at once, which through
+/accounts/register costs one bcrypt hash and one commit each. provision_file
+reads the file in batches instead. For each batch it:
+
+- validates the records with the registration schema;
+- drops emails that already exist, with one IN lookup;
+- hashes the new users' passwords with the caller's hash_many, which the
+  CLI runs on a process pool;
+- inserts the users with one multi-row INSERT.
+
+Records that aren't valid registrations are rejected one by one and
+reported with their record number, as are users whose email someone
+registers between the lookup and the INSERT; the rest of the batch goes in.
+
+Each batch commits together with its ProvisioningRun checkpoint, so running
+the same file again carries on after the last committed batch. Because of
+the email lookup, a changed or repeated file never creates duplicates.
+"""
+import csv
+import hashlib
+import json
+from datetime import datetime
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+
+HashMany = Callable[[List[str]], List[str]]
+
+
+class BatchResult(NamedTuple):
+    created: int
+    skipped: int
+    # (record number, reason) for each record that failed validation or lost its email to a registration
+    rejected: List[Tuple[int, str]]
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_records(path: str) -> Iterator[Tuple[int, dict]]:
+    """
+    (record number, fields) for each record, numbered from 1. .jsonl and .ndjson files
+    hold one object per line, with None for a line that isn't one; anything else is CSV
+    with a header row.
+    """
+    # utf-8-sig drops the byte order mark spreadsheet exports start with
+    with open(path, newline="", encoding="utf-8-sig") as source:
+        if path.endswith((".jsonl", ".ndjson")):
+            lines = (line for line in source if line.strip())
+            for number, line in enumerate(lines, start=1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield number, record if isinstance(record, dict) else None
+        else:
+            yield from enumerate(csv.DictReader(source), start=1)
+
+
+def _parse(record: dict) -> dict:
+    """User column values for a record. Raises ValueError if it isn't a valid registration."""
+    if record is None:
+        raise ValueError("not a JSON object")
+    if None in record:
+        # csv.DictReader files a row's cells beyond the header under None
+        raise ValueError("more fields than the header has columns")
+    role = record.get("role") or models.UserRole.USER.value
+    if not isinstance(role, str):
+        raise ValueError("role: must be a string")
+    registration = schemas.UserRegister.model_validate(
+        {key: value for key, value in record.items() if key != "role" and value not in (None, "")})
+    role = models.UserRole(role.strip().lower())
+    return {
+        "email": registration.email.strip(),
+        "password": registration.password,
+        "display_name": registration.display_name,
+        "role": role,
+    }
+
+
+def _reason(error: ValueError) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'record'}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+def _existing_emails(db: Session, emails: set) -> set:
+    if not emails:
+        return set()
+    return {email for (email,) in db.query(models.User.email).filter(models.User.email.in_(emails))}
+
+
+def start_run(db: Session, path: str) -> models.ProvisioningRun:
+    """The run for this file's contents, created if it's the first time the file is provisioned."""
+    digest = file_digest(path)
+    run = db.query(models.ProvisioningRun).filter(models.ProvisioningRun.digest == digest).first()
+    if run is None:
+        now = datetime.now().timestamp()
+        run = models.ProvisioningRun(source=path, digest=digest, records_committed=0, created=0, skipped=0,
+                                     rejected=0, created_at=now, updated_at=now)
+        db.add(run)
+        db.commit()
+    return run
+
+
+def provision_batch(db: Session, run: models.ProvisioningRun, records: List[Tuple[int, dict]],
+                    hash_many: HashMany) -> BatchResult:
+    """Create the batch's new users and advance the run past it, in one transaction."""
+    rejected, valid = [], []
+    for number, record in records:
+        try:
+            valid.append((number, _parse(record)))
+        except ValueError as error:
+            rejected.append((number, _reason(error)))
+
+    taken = _existing_emails(db, {user["email"] for _, user in valid})
+    new_users = []
+    for number, user in valid:
+        # Also drops repeats within the batch; repeats across batches are caught by the lookup
+        if user["email"] not in taken:
+            taken.add(user["email"])
+            new_users.append((number, user))
+
+    hashes = dict(zip(
+        (number for number, _ in new_users), hash_many([user["password"] for _, user in new_users])))
+    conflicted = []
+    while new_users:
+        try:
+            db.execute(insert(models.User), [
+                {
+                    "email": user["email"],
+                    "hashed_password": hashes[number],
+                    "display_name": user["display_name"],
+                    "is_anonymous": False,
+                    "role": user["role"],
+                    "is_banned": False,
+                    "is_active": True,
+                }
+                for number, user in new_users
+            ])
+            break
+        except IntegrityError:
+            # Someone registered one of these emails since the lookup: reject those records and retry the rest
+            db.rollback()
+            registered = _existing_emails(db, {user["email"] for _, user in new_users})
+            if not registered:
+                raise
+            conflicted.extend((number, "email was registered while the batch ran")
+                              for number, user in new_users if user["email"] in registered)
+            new_users = [(number, user) for number, user in new_users if user["email"] not in registered]
+    skipped = len(valid) - len(new_users) - len(conflicted)
+    rejected = sorted(rejected + conflicted)
+    run.records_committed = records[-1][0]
+    run.created += len(new_users)
+    run.skipped += skipped
+    run.rejected += len(rejected)
+    run.updated_at = datetime.now().timestamp()
+    db.commit()
+    return BatchResult(len(new_users), skipped, rejected)
+
+
+def provision_file(db: Session, path: str, batch_size: int, hash_many: HashMany,
+                   on_batch: Optional[Callable[[models.ProvisioningRun, BatchResult], None]] = None
+                   ) -> models.ProvisioningRun:
+    """
+    Provision every user in the file that a previous run of it didn't commit.
+    on_batch is called after each committed batch. Returns the run.
+    """
+    run = start_run(db, path)
+    if run.finished_at is not None:
+        return run
+    batch: List[Tuple[int, dict]] = []
+    for number, record in read_records(path):
+        if number <= run.records_committed:
+            continue
+        batch.append((number, record))
+        if len(batch) == batch_size:
+            result = provision_batch(db, run, batch, hash_many)
+            if on_batch:
+                on_batch(run, result)
+            batch = []
+    if batch:
+        result = provision_batch(db, run, batch, hash_many)
+        if on_batch:
+            on_batch(run, result)
+    run.finished_at = run.updated_at = datetime.now().timestamp()
+    db.commit()
+    return run
@@ -2,9 +2,18 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from .. import models, schemas
+from . import audit_service, cluster_service, summary_service
 from datetime import datetime
 
 
+def open_report_query(db: Session, reporter_id: int, post_id: int):
+    """Open reports already filed by this user against this post."""
+    return db.query(models.Report).filter(
+        models.Report.reporting_user_id == reporter_id,
+        models.Report.post_id == post_id,
+        models.Report.status == models.ReportStatus.OPEN
+    )
+
 def create_report(
     db: Session,
     reporter: models.User,
@@ -37,11 +46,7 @@ def create_report(
         )
     
     #check if user has already reported this post before
-    existing_report = db.query(models.Report).filter(
-        models.Report.reporting_user_id == reporter.id,
-        models.Report.post_id == post_id,
-        models.Report.status == models.ReportStatus.OPEN
-    ).first()
+    existing_report = open_report_query(db, reporter.id, post_id).first()
     
     if existing_report:
         raise HTTPException(
@@ -64,27 +69,29 @@ def create_report(
     )
     
     db.add(report)
-    db.commit()
-    db.refresh(report)
+    cluster_service.record_report(db, report)
+    summary_service.record_report_opened(db, report)
     
-    #crisis --> create a crisis ticket for urgent handling
+    #crisis --> create a crisis ticket for urgent handling, committed with the report
     if is_crisis:
+        db.flush()
         crisis_ticket = models.CrisisTicket(
             user_id=post.author_id,
             report_id=report.id,
         )
         db.add(crisis_ticket)
         
-        #logs the crisis escalation in audit log
-        audit = models.AuditLogEntry(
+        #logs the crisis escalation in audit log, durably with the report
+        audit_service.record(
+            db,
             actor_id=reporter.id,
             action_type="crisis_report_created",
             target_type="Report",
             target_id=report.id,
-            details=f"Crisis report created for post {post_id}"
+            details=f"Crisis report created for post {post_id}",
+            durable=True,
         )
-        db.add(audit)
-        db.commit()
     
+    db.commit()
     return report
 
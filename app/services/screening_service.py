@@ -0,0 +1,321 @@
+"""
+Server-side crisis screening of new posts.
+
+post_message records a ScreeningJob in the same transaction as the post
+and, once it has committed, hands the job id to a bounded in-process
+queue. Worker threads run the crisis keyword matcher over the post and
+escalate matches the same way /crisis/escalate does, so posting never
+waits on screening and a client can't skip it.
+
+The screening_jobs table is the durable backlog. A job that can't be
+queued, because the queue is full or the service isn't running, stays
+PENDING and the sweeper thread queues it once there is room. A claimed
+job records its process and claim time; on start and on every sweep, jobs
+left RUNNING by a process that has exited, or claimed longer ago than
+SCREENING_LEASE_SECONDS, go back to PENDING, while jobs sibling processes
+are still screening are left alone. Screening a post
+that already has an open crisis report does nothing, so a job that runs
+twice never escalates twice.
+"""
+import logging
+import queue
+import threading
+from datetime import datetime
+from typing import Callable, List, Optional, Set
+
+from sqlalchemy.orm import Session, joinedload
+
+from .. import leases, metrics, models, schemas
+from ..config import settings
+from ..constants import find_crisis_keywords
+from ..db import SessionLocal
+from . import crisis_service
+
+logger = logging.getLogger(__name__)
+
+jobs_submitted = metrics.registry.counter(
+    "screening_jobs_submitted_total", "Screening jobs handed to the in-process queue")
+jobs_deferred = metrics.registry.counter(
+    "screening_jobs_deferred_total", "Screening jobs left in the backlog because the queue was full")
+jobs_completed = metrics.registry.counter(
+    "screening_jobs_completed_total", "Posts screened")
+jobs_failed = metrics.registry.counter(
+    "screening_jobs_failed_total", "Screening attempts that raised an error")
+escalations = metrics.registry.counter(
+    "screening_escalations_total", "Crisis escalations raised by screening")
+
+
+def _now() -> float:
+    return datetime.now().timestamp()
+
+
+def create_job(db: Session, post: models.Post) -> models.ScreeningJob:
+    """Add a pending job for post to the session; it commits with the post."""
+    now = _now()
+    job = models.ScreeningJob(post=post, status=models.ScreeningStatus.PENDING, created_at=now, updated_at=now)
+    db.add(job)
+    return job
+
+
+def _has_open_crisis_report(db: Session, post_id: int) -> bool:
+    return db.query(models.Report.id).filter(
+        models.Report.post_id == post_id,
+        models.Report.is_crisis.is_(True),
+        models.Report.status == models.ReportStatus.OPEN,
+    ).first() is not None
+
+
+def screen_post(db: Session, post: Optional[models.Post]) -> bool:
+    """Escalate post if it contains crisis keywords and isn't already escalated. Returns whether it escalated."""
+    if post is None or post.status != models.PostStatus.ACTIVE:
+        return False
+    if not find_crisis_keywords(post.content) or _has_open_crisis_report(db, post.id):
+        return False
+    data = schemas.CrisisEscalationInput(post_id=post.id, content_snip=post.content)
+    crisis_service.escalate_crisis(db, data, post.author)
+    return True
+
+
+def screen_job(db: Session, job_id: int) -> Optional[models.ScreeningJob]:
+    """
+    Claim a pending job and screen its post.
+    Returns the finished job, or None if it was already claimed or finished.
+    """
+    claimed = db.query(models.ScreeningJob).filter(
+        models.ScreeningJob.id == job_id,
+        models.ScreeningJob.status == models.ScreeningStatus.PENDING,
+    ).update(
+        {
+            models.ScreeningJob.status: models.ScreeningStatus.RUNNING,
+            models.ScreeningJob.attempts: models.ScreeningJob.attempts + 1,
+            models.ScreeningJob.claimed_by: leases.owner_id(),
+            models.ScreeningJob.claimed_at: _now(),
+            models.ScreeningJob.updated_at: _now(),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    if not claimed:
+        return None
+
+    job = (
+        db.query(models.ScreeningJob)
+        .options(joinedload(models.ScreeningJob.post).joinedload(models.Post.author))
+        .filter(models.ScreeningJob.id == job_id)
+        .one()
+    )
+    job.escalated = screen_post(db, job.post)
+    job.status = models.ScreeningStatus.DONE
+    job.last_error = None
+    job.updated_at = _now()
+    db.commit()
+    return job
+
+
+def record_failure(db: Session, job_id: int, error: Exception) -> None:
+    """Return a job to the backlog for another attempt, or mark it failed once attempts run out."""
+    job = db.query(models.ScreeningJob).filter(models.ScreeningJob.id == job_id).first()
+    if job is None:
+        return
+    exhausted = job.attempts >= settings.SCREENING_MAX_ATTEMPTS
+    job.status = models.ScreeningStatus.FAILED if exhausted else models.ScreeningStatus.PENDING
+    job.last_error = repr(error)[:500]
+    job.updated_at = _now()
+    db.commit()
+
+
+def pending_job_count(db: Session) -> int:
+    return db.query(models.ScreeningJob).filter(models.ScreeningJob.status == models.ScreeningStatus.PENDING).count()
+
+
+class ScreeningService:
+    """Bounded queue of job ids drained by worker threads, refilled from the persisted backlog by a sweeper."""
+
+    def __init__(self, session_factory: Callable[[], Session], workers: int, queue_size: int, sweep_seconds: float):
+        self._session_factory = session_factory
+        self._workers = workers
+        self._sweep_seconds = sweep_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        # Job ids queued or being screened, so the sweeper doesn't queue them twice
+        self._queued: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._backlogged = False
+        self._threads: List[threading.Thread] = []
+        self.running = False
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def queue_capacity(self) -> int:
+        return self._queue.maxsize
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.reclaim()
+        self._stop.clear()
+        self.running = True
+        self._threads = [
+            threading.Thread(target=self._work, name=f"screening-worker-{i}", daemon=True)
+            for i in range(self._workers)
+        ]
+        self._threads.append(threading.Thread(target=self._sweep_periodically, name="screening-sweeper", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the threads. Jobs still queued stay PENDING in the backlog for the next start."""
+        if not self.running:
+            return
+        self.running = False
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        with self._lock:
+            self._queued.clear()
+            while not self._queue.empty():
+                self._queue.get_nowait()
+
+    def submit(self, job_id: Optional[int]) -> bool:
+        """Queue a committed job without blocking. Returns False if it was left in the backlog."""
+        if not self.running or job_id is None:
+            return False
+        with self._lock:
+            if job_id in self._queued:
+                return True
+            try:
+                self._queue.put_nowait(job_id)
+            except queue.Full:
+                self._backlogged = True
+                jobs_deferred.inc()
+                return False
+            self._queued.add(job_id)
+        jobs_submitted.inc()
+        return True
+
+    def reclaim(self) -> List[int]:
+        """Return jobs left RUNNING by a process that died or outlived its lease to the backlog."""
+        db = self._session_factory()
+        try:
+            return leases.reclaim_expired(
+                db, models.ScreeningJob, models.ScreeningStatus.RUNNING, models.ScreeningStatus.PENDING,
+                settings.SCREENING_LEASE_SECONDS, _now(),
+            )
+        finally:
+            db.close()
+
+    def sweep(self) -> int:
+        """Queue pending jobs from the backlog, oldest first, while there is room. Returns how many were queued."""
+        free = self._queue.maxsize - self._queue.qsize()
+        if free <= 0:
+            return 0
+        with self._lock:
+            queued = set(self._queued)
+        db = self._session_factory()
+        try:
+            job_ids = [
+                job_id for (job_id,) in db.query(models.ScreeningJob.id)
+                .filter(models.ScreeningJob.status == models.ScreeningStatus.PENDING)
+                .order_by(models.ScreeningJob.id)
+                .limit(free + len(queued))
+                .all()
+                if job_id not in queued
+            ]
+        finally:
+            db.close()
+        return sum(1 for job_id in job_ids[:free] if self.submit(job_id))
+
+    def join(self) -> None:
+        """Block until every queued job has been screened."""
+        self._queue.join()
+
+    def _sweep_periodically(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._sweep_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.reclaim()
+                self.sweep()
+            except Exception:
+                logger.exception("Failed to sweep the screening backlog")
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job_id = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._process(job_id)
+            finally:
+                with self._lock:
+                    self._queued.discard(job_id)
+                self._queue.task_done()
+            if self._backlogged and self._queue.qsize() <= self._queue.maxsize // 2:
+                # Room again; pull deferred jobs in now rather than at the next sweep
+                self._backlogged = False
+                self._wake.set()
+
+    def _process(self, job_id: int) -> None:
+        db = self._session_factory()
+        try:
+            job = screen_job(db, job_id)
+            if job is not None:
+                jobs_completed.inc()
+                if job.escalated:
+                    escalations.inc()
+        except Exception as error:
+            jobs_failed.inc()
+            logger.exception("Failed to screen job %s", job_id)
+            db.rollback()
+            try:
+                record_failure(db, job_id, error)
+            except Exception:
+                logger.exception("Failed to record screening failure for job %s", job_id)
+        finally:
+            db.close()
+
+
+service = ScreeningService(
+    SessionLocal,
+    workers=settings.SCREENING_WORKERS,
+    queue_size=settings.SCREENING_QUEUE_SIZE,
+    sweep_seconds=settings.SCREENING_SWEEP_SECONDS,
+)
+
+metrics.registry.gauge("screening_queue_depth", "Screening jobs waiting in the in-process queue",
+                       callback=lambda: service.queue_depth)
+metrics.registry.gauge("screening_queue_capacity", "Maximum depth of the screening queue",
+                       callback=lambda: service.queue_capacity)
+
+
+def submit(job: models.ScreeningJob) -> None:
+    """Queue a committed job without ever failing the caller; a job that isn't queued waits in the backlog."""
+    try:
+        service.submit(job.id)
+    except Exception:
+        logger.exception("Failed to queue screening job %s", getattr(job, "id", None))
+
+
+def stats(db: Session) -> dict:
+    values = metrics.registry.snapshot()
+    return {
+        "running": service.running,
+        "queue_depth": service.queue_depth,
+        "queue_capacity": service.queue_capacity,
+        "pending_jobs": pending_job_count(db),
+        "submitted": int(values["screening_jobs_submitted_total"]),
+        "deferred": int(values["screening_jobs_deferred_total"]),
+        "completed": int(values["screening_jobs_completed_total"]),
+        "failed": int(values["screening_jobs_failed_total"]),
+        "escalated": int(values["screening_escalations_total"]),
+    }
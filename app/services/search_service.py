@@ -0,0 +1,293 @@
+"""
+Full-text search over posts using an SQLite FTS5 index.
+
+posts_fts is an external-content FTS5 table over posts(content, group_id).
+Triggers on posts keep it in sync: only ACTIVE posts are indexed, so a
+post drops out of search as soon as it is deleted. group_id is indexed as
+a column so board filtering happens inside the full-text match instead of
+after it.
+
+Ranking is BM25 computed here rather than by FTS5's bm25(). The built-in
+function counts every document containing each query term on every call,
+which for a common word at a million posts costs far more than the match
+itself. Instead matches are scored in Python a window of recent posts at
+a time, with document frequencies read from the posts_fts_terms
+vocabulary table and cached.
+"""
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.orm import Session, joinedload
+from fastapi import HTTPException, status
+
+from .. import models
+from ..config import settings
+from ..pagination import clamp_page_size, decode_cursor, split_page
+
+FTS_TABLE = "posts_fts"
+VOCAB_TABLE = "posts_fts_terms"
+
+# BM25 parameters, the same defaults FTS5 uses
+_K1 = 1.2
+_B = 0.75
+
+# A token is a run of letters and digits, as with unicode61
+_TOKEN = re.compile(r"[^\W_]+")
+# Query terms not followed by another letter or digit; the preceding character is checked separately,
+# since a leading lookbehind would stop the regex engine from skipping ahead to candidate matches
+_TERM_END = r"({})(?![^\W_])"
+
+_CREATE_STATEMENTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        content, group_id, content='posts', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, row)",
+    f"""CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts WHEN new.status = 'ACTIVE' BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content, group_id) VALUES (new.id, new.content, new.group_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts WHEN old.status = 'ACTIVE' BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, group_id) VALUES ('delete', old.id, old.content, old.group_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF status, content, group_id ON posts BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, group_id)
+            SELECT 'delete', old.id, old.content, old.group_id WHERE old.status = 'ACTIVE';
+        INSERT INTO {FTS_TABLE}(rowid, content, group_id)
+            SELECT new.id, new.content, new.group_id WHERE new.status = 'ACTIVE';
+    END""",
+]
+
+
+def _is_sqlite(bind) -> bool:
+    return bind.dialect.name == "sqlite"
+
+
+def _create_index(connection):
+    for statement in _CREATE_STATEMENTS:
+        connection.exec_driver_sql(statement)
+
+
+def _drop_index(connection):
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {VOCAB_TABLE}")
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+@event.listens_for(models.Post.__table__, "after_create")
+def _posts_created(target, connection, **kw):
+    # A fresh posts table means any leftover index is stale
+    if _is_sqlite(connection):
+        _drop_index(connection)
+        _create_index(connection)
+        _statistics.clear()
+
+
+@event.listens_for(models.Post.__table__, "after_drop")
+def _posts_dropped(target, connection, **kw):
+    if _is_sqlite(connection):
+        _drop_index(connection)
+
+
+def ensure_search_index(engine) -> bool:
+    """
+    Create the index and triggers on a database whose posts table predates them.
+    Returns True if the index was created and filled.
+    """
+    if not _is_sqlite(engine) or inspect(engine).has_table(FTS_TABLE):
+        return False
+    with engine.begin() as connection:
+        _create_index(connection)
+        _fill_index(connection)
+    return True
+
+
+def _fill_index(connection):
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE}(rowid, content, group_id) "
+        f"SELECT id, content, group_id FROM posts WHERE status = 'ACTIVE'"
+    )
+
+
+def rebuild_index(db: Session) -> int:
+    """Empty and refill the index from active posts. Returns the number of posts indexed."""
+    connection = db.connection()
+    connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('delete-all')")
+    _fill_index(connection)
+    connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('optimize')")
+    count = db.query(models.Post).filter(models.Post.status == models.PostStatus.ACTIVE).count()
+    db.commit()
+    _statistics.clear()
+    return count
+
+
+class _StatisticsCache:
+    """Document frequencies by term, refreshed after SEARCH_STATS_TTL_SECONDS. They drift slowly enough for ranking."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self._lock = threading.Lock()
+        self._entries: Dict[Optional[str], Tuple[float, int]] = {}
+        self._max_entries = max_entries
+
+    def get(self, key: Optional[str]) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, key: Optional[str], value: int) -> None:
+        with self._lock:
+            if len(self._entries) >= self._max_entries:
+                self._entries.clear()
+            self._entries[key] = (time.monotonic() + settings.SEARCH_STATS_TTL_SECONDS, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Keyed by term; None holds the number of indexed posts
+_statistics = _StatisticsCache()
+
+
+def _fold(value: str) -> str:
+    """Lowercase and strip diacritics, as the index's unicode61 tokenizer does."""
+    value = value.casefold()
+    if not value.isascii():
+        value = "".join(c for c in unicodedata.normalize("NFKD", value) if not unicodedata.combining(c))
+    return value
+
+
+def tokenize(value: str) -> List[str]:
+    """Split text into tokens the way the index does: runs of letters and digits, folded."""
+    return _TOKEN.findall(_fold(value))
+
+
+def _indexed_post_count(db: Session) -> int:
+    count = _statistics.get(None)
+    if count is None:
+        count = db.query(models.Post).filter(models.Post.status == models.PostStatus.ACTIVE).count()
+        _statistics.put(None, count)
+    return count
+
+
+def _document_frequency(db: Session, term: str) -> int:
+    count = _statistics.get(term)
+    if count is None:
+        count = db.execute(text(f"SELECT doc FROM {VOCAB_TABLE} WHERE term = :term"), {"term": term}).scalar() or 0
+        _statistics.put(term, count)
+    return count
+
+
+def _bm25_ranks(db: Session, terms: List[str], contents: Dict[int, str]) -> Dict[int, float]:
+    """
+    Score each post's content against the query terms. Ranks follow the FTS5
+    convention of negated scores, so the best match sorts first. Document
+    length is measured in characters, which is close enough for normalizing
+    and avoids tokenizing every candidate.
+    """
+    total = max(_indexed_post_count(db), len(contents))
+    weights = {}
+    for term in set(terms):
+        frequency = min(_document_frequency(db, term), total)
+        weights[term] = math.log((total - frequency + 0.5) / (frequency + 0.5) + 1)
+
+    pattern = re.compile(_TERM_END.format("|".join(re.escape(term) for term in sorted(weights, key=len, reverse=True))))
+    documents = {post_id: _fold(content) for post_id, content in contents.items()}
+    average_length = sum(len(document) for document in documents.values()) / len(documents) or 1.0
+    ranks = {}
+    for post_id, document in documents.items():
+        occurrences = Counter(
+            match.group(1)
+            for match in pattern.finditer(document)
+            if not (match.start() and document[match.start() - 1].isalnum())
+        )
+        norm = _K1 * (1 - _B + _B * len(document) / average_length)
+        ranks[post_id] = -sum(
+            weights[term] * count * (_K1 + 1) / (count + norm) for term, count in occurrences.items()
+        )
+    return ranks
+
+
+def build_match_expression(q: str, group_id=None) -> str:
+    """
+    Turn free text into an FTS5 query in which every word must appear in the content.
+    FTS5 operators in the input are treated as plain text.
+    """
+    words = [word.replace('"', '""') for word in q.split()]
+    if not words:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query is empty")
+    terms = [f'content : "{word}"' for word in words]
+    if group_id is not None:
+        terms.append(f'group_id : "{int(group_id)}"')
+    return " AND ".join(terms)
+
+
+def _candidate_window(db: Session, match: str, ceiling: Optional[int]) -> List[int]:
+    """Rowids of the newest SEARCH_CANDIDATE_LIMIT matches below ceiling, newest first."""
+    bound = "AND rowid < :ceiling " if ceiling is not None else ""
+    return db.execute(
+        text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match {bound}ORDER BY rowid DESC LIMIT :limit"),
+        {"match": match, "ceiling": ceiling, "limit": settings.SEARCH_CANDIDATE_LIMIT},
+    ).scalars().all()
+
+
+def search_posts(db: Session, q: str, group_id=None, limit=None, cursor=None):
+    """
+    Rank active posts matching q by BM25, best first, with keyset paging on
+    (window, rank, id). Returns the page of posts and the cursor for the next page.
+
+    Matches are ranked in windows of SEARCH_CANDIDATE_LIMIT, newest window
+    first. FTS5 walks a match in rowid order and stops at the window's end, so
+    the cost of a page doesn't grow with the number of posts containing a
+    common word. A window is identified by the rowid just above its newest
+    match, so posts arriving between pages never shift one, and once a window
+    is used up paging carries on with the window below it.
+    """
+    if not _is_sqlite(db.get_bind()):
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Search requires SQLite FTS5")
+
+    page_size = clamp_page_size(limit)
+    match = build_match_expression(q, group_id)
+    terms = tokenize(q)
+    ceiling, after = None, None
+    if cursor:
+        ceiling, rank, post_id = decode_cursor(cursor, int, float, int)
+        after = (rank, post_id)
+
+    hits: List[Tuple[int, float, int]] = []
+    while len(hits) <= page_size:
+        candidate_ids = _candidate_window(db, match, ceiling)
+        if not candidate_ids:
+            break
+        if ceiling is None:
+            ceiling = candidate_ids[0] + 1
+        contents = dict(db.execute(
+            select(models.Post.id, models.Post.content).where(models.Post.id.in_(candidate_ids))
+        ).all())
+        ranked = sorted((rank, post_id) for post_id, rank in _bm25_ranks(db, terms, contents).items())
+        if after is not None:
+            ranked = [hit for hit in ranked if hit > after]
+        hits.extend((ceiling, rank, post_id) for rank, post_id in ranked[:page_size + 1 - len(hits)])
+        if len(candidate_ids) < settings.SEARCH_CANDIDATE_LIMIT:
+            break
+        ceiling, after = candidate_ids[-1], None
+    if not hits:
+        return [], None
+
+    # Filtering status in SQL would tempt SQLite into walking the status index instead of the primary key
+    posts = {
+        post.id: post
+        for post in db.query(models.Post).options(joinedload(models.Post.author)).filter(
+            models.Post.id.in_([post_id for _, _, post_id in hits])
+        )
+        if post.status == models.PostStatus.ACTIVE
+    }
+    keys = {post_id: (window, rank, post_id) for window, rank, post_id in hits}
+    rows = [posts[post_id] for _, _, post_id in hits if post_id in posts]
+    return split_page(rows, page_size, key=lambda post: keys[post.id])
@@ -0,0 +1,116 @@
+"""
+Moderation dashboard counters.
+
+Report writes adjust a handful of rows in moderation_counters in the
+same transaction, so the dashboard summary is a primary-key lookup
+instead of a scan of the reports table. reconcile() recomputes them
+from the reports and corrects any drift.
+"""
+from datetime import date, datetime
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .. import models
+
+TOTAL = ""
+OPEN = "open"
+CRISIS_OPEN = "crisis_open"
+TOTALS = (OPEN, CRISIS_OPEN)
+DAILY = (models.ReportStatus.RESOLVED.value, models.ReportStatus.DISMISSED.value)
+
+
+def day_of(timestamp: float) -> str:
+    """The local date a timestamp falls on, as stored in the day column."""
+    return date.fromtimestamp(timestamp).isoformat()
+
+
+def _bump(db: Session, deltas) -> None:
+    """Add each (name, day, delta) to its counter with one upsert."""
+    counters = models.ModerationCounter.__table__
+    insert = sqlite_insert(counters).values([
+        {"name": name, "day": day, "value": delta} for name, day, delta in deltas
+    ])
+    db.execute(insert.on_conflict_do_update(
+        index_elements=[counters.c.name, counters.c.day],
+        set_={"value": counters.c.value + insert.excluded.value},
+    ))
+
+
+def record_report_opened(db: Session, report: models.Report) -> None:
+    """Count a new open report. Runs in the caller's transaction."""
+    deltas = [(OPEN, TOTAL, 1)]
+    if report.is_crisis:
+        deltas.append((CRISIS_OPEN, TOTAL, 1))
+    _bump(db, deltas)
+
+
+def record_reports_closed(db: Session, status: models.ReportStatus, is_crisis: bool,
+                          closed_at: float, count: int = 1) -> None:
+    """Move count open reports to resolved or dismissed on closed_at's day. Runs in the caller's transaction."""
+    if count <= 0:
+        return
+    deltas = [(OPEN, TOTAL, -count), (status.value, day_of(closed_at), count)]
+    if is_crisis:
+        deltas.append((CRISIS_OPEN, TOTAL, -count))
+    _bump(db, deltas)
+
+
+def summary(db: Session, now: float = None) -> dict:
+    """Open, crisis-open, resolved-today and dismissed-today counts, read from the counters."""
+    today = day_of(now if now is not None else datetime.now().timestamp())
+    counter = models.ModerationCounter
+    values = dict(
+        db.query(counter.name, counter.value)
+        .filter(or_(
+            and_(counter.day == TOTAL, counter.name.in_(TOTALS)),
+            and_(counter.day == today, counter.name.in_(DAILY)),
+        ))
+        .all()
+    )
+    return {
+        "open": values.get(OPEN, 0),
+        "crisis_open": values.get(CRISIS_OPEN, 0),
+        "resolved_today": values.get(models.ReportStatus.RESOLVED.value, 0),
+        "dismissed_today": values.get(models.ReportStatus.DISMISSED.value, 0),
+    }
+
+
+def reconcile(db: Session):
+    """
+    Recompute every counter from the reports table.
+    Returns a list of (name, day, old_value, new_value) for counters that had drifted.
+    Reports closed before resolved_at was recorded can't be placed on a day and aren't counted.
+    """
+    report = models.Report
+    actual = {}
+    for is_crisis, count in (
+        db.query(report.is_crisis, func.count(report.id))
+        .filter(report.status == models.ReportStatus.OPEN)
+        .group_by(report.is_crisis)
+    ):
+        actual[(OPEN, TOTAL)] = actual.get((OPEN, TOTAL), 0) + count
+        if is_crisis:
+            actual[(CRISIS_OPEN, TOTAL)] = actual.get((CRISIS_OPEN, TOTAL), 0) + count
+    closed_day = func.date(report.resolved_at, "unixepoch", "localtime")
+    for status, day, count in (
+        db.query(report.status, closed_day, func.count(report.id))
+        .filter(report.status != models.ReportStatus.OPEN, report.resolved_at.isnot(None))
+        .group_by(report.status, closed_day)
+    ):
+        actual[(status.value, day)] = count
+
+    existing = {(row.name, row.day): row for row in db.query(models.ModerationCounter).all()}
+    drifted = []
+    for key in sorted(set(actual) | set(existing) | {(name, TOTAL) for name in TOTALS}):
+        value = actual.get(key, 0)
+        row = existing.get(key)
+        if row is None:
+            row = models.ModerationCounter(name=key[0], day=key[1], value=0)
+            db.add(row)
+        if (row.value or 0) != value:
+            drifted.append((key[0], key[1], row.value or 0, value))
+            row.value = value
+    db.commit()
+    return drifted
@@ -0,0 +1,199 @@
+"""
+Issuing, refreshing and revoking tokens.
+
+By default login returns a long-lived access token carrying only the
+user id, and every request looks the user up. With STATELESS_AUTH on,
+login returns a short-lived access token that also carries the user's
+role and status, so get_current_principal can authorize from the token
+alone, plus a refresh token to get the next one from /accounts/refresh.
+
+Refreshing reads the user afresh, so a role change reaches the user's
+tokens within CLAIMS_TOKEN_EXPIRE_MINUTES. Banning or deleting a user
+revokes their refresh tokens and, through app.revocation, their access
+tokens in either mode.
+
+Board event streams are opened by browsers' EventSource, which can't send
+an Authorization header, so a signed-in user trades their token for a
+stream ticket: a short-lived token for one board's stream, carried in the
+URL. It has no sub claim, so it is never accepted as an access token.
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..principals import Principal
+from ..revocation import revocation_list
+from .auth_service import create_access_token
+
+
+STREAM_TICKET = "board_events"
+
+
+def _now() -> float:
+    return datetime.now().timestamp()
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _issue_access_token(db: Session, user_id: int, claims: dict, lifetime: timedelta) -> str:
+    """Create an access token with a jti and record it so it can be revoked; commits with the caller."""
+    jti = secrets.token_hex(16)
+    db.add(models.IssuedToken(jti=jti, user_id=user_id, expires_at=_now() + lifetime.total_seconds()))
+    return create_access_token(data={"sub": str(user_id), "jti": jti, **claims}, expires_delta=lifetime)
+
+
+def issue_session_token(db: Session, user: models.User) -> dict:
+    """A long-lived access token carrying only the user id, for the default auth mode."""
+    token = _issue_access_token(db, user.id, {}, timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    db.commit()
+    return {"access_token": token, "token_type": "bearer"}
+
+
+def create_claims_token(db: Session, user: models.User) -> str:
+    """A short-lived access token carrying what get_current_principal needs."""
+    claims = {
+        "role": user.role.value,
+        "active": bool(user.is_active),
+        "banned": bool(user.is_banned),
+        "name": user.display_name,
+    }
+    return _issue_access_token(db, user.id, claims, timedelta(minutes=settings.CLAIMS_TOKEN_EXPIRE_MINUTES))
+
+
+def principal_from_claims(payload: dict) -> Optional[Principal]:
+    """The principal a claims token describes, or None for a token without claims."""
+    if "role" not in payload:
+        return None
+    return Principal(
+        id=int(payload["sub"]),
+        role=models.UserRole(payload["role"]),
+        is_active=bool(payload.get("active")),
+        is_banned=bool(payload.get("banned")),
+        display_name=payload.get("name"),
+    )
+
+
+def _add_refresh_token(db: Session, user_id: int, family_id: str) -> str:
+    token = secrets.token_urlsafe(32)
+    now = _now()
+    db.add(models.RefreshToken(
+        user_id=user_id,
+        token_hash=_hash(token),
+        family_id=family_id,
+        created_at=now,
+        expires_at=now + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+    ))
+    return token
+
+
+def issue_tokens(db: Session, user: models.User) -> dict:
+    """A claims token and a new refresh token family for a user who just signed in."""
+    refresh_token = _add_refresh_token(db, user.id, secrets.token_hex(16))
+    access_token = create_claims_token(db, user)
+    db.commit()
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": settings.CLAIMS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def refresh(db: Session, refresh_token: str) -> dict:
+    """Exchange a refresh token for a new access token and its successor refresh token."""
+    stored = db.query(models.RefreshToken).filter(models.RefreshToken.token_hash == _hash(refresh_token)).first()
+    if stored is None:
+        raise _invalid_refresh_token()
+    now = _now()
+    if stored.revoked_at is not None:
+        # A rotated token came back, so it was copied; cut off whoever holds its successor too
+        revoke_family(db, stored.family_id)
+        db.commit()
+        raise _invalid_refresh_token()
+    if stored.expires_at <= now:
+        raise _invalid_refresh_token()
+
+    user = db.query(models.User).filter(models.User.id == stored.user_id).first()
+    if user is None or not user.is_active:
+        stored.revoked_at = now
+        db.commit()
+        raise _invalid_refresh_token()
+
+    # Revoke conditionally so two requests racing with the same token can't both rotate it
+    claimed = db.query(models.RefreshToken).filter(
+        models.RefreshToken.id == stored.id,
+        models.RefreshToken.revoked_at.is_(None),
+    ).update({models.RefreshToken.revoked_at: now}, synchronize_session=False)
+    if not claimed:
+        revoke_family(db, stored.family_id)
+        db.commit()
+        raise _invalid_refresh_token()
+    successor = _add_refresh_token(db, user.id, stored.family_id)
+    access_token = create_claims_token(db, user)
+    db.commit()
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": successor,
+        "expires_in": settings.CLAIMS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def revoke_family(db: Session, family_id: str) -> None:
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.family_id == family_id,
+        models.RefreshToken.revoked_at.is_(None),
+    ).update({models.RefreshToken.revoked_at: _now()}, synchronize_session=False)
+
+
+def revoke_user_tokens(db: Session, user_id: int) -> None:
+    """Revoke every access and refresh token a user holds; commits with the caller's transaction."""
+    now = _now()
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.user_id == user_id,
+        models.RefreshToken.revoked_at.is_(None),
+    ).update({models.RefreshToken.revoked_at: now}, synchronize_session=False)
+
+    issued = db.query(models.IssuedToken).filter(
+        models.IssuedToken.user_id == user_id,
+        models.IssuedToken.expires_at > now,
+    ).all()
+    for token in issued:
+        db.add(models.RevokedToken(jti=token.jti, user_id=user_id, expires_at=token.expires_at, revoked_at=now))
+        db.delete(token)
+    revocation_list.add(token.jti for token in issued)
+
+
+def create_stream_ticket(user_id: int, board_id: int) -> str:
+    """A ticket that opens board_id's event stream for user_id within SSE_TICKET_SECONDS."""
+    claims = {"uid": user_id, "board": board_id, "purpose": STREAM_TICKET}
+    return create_access_token(data=claims, expires_delta=timedelta(seconds=settings.SSE_TICKET_SECONDS))
+
+
+def read_stream_ticket(ticket: str, board_id: int) -> Optional[int]:
+    """The user a valid, unexpired ticket for board_id was issued to, or None."""
+    try:
+        payload = jwt.decode(ticket, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("purpose") != STREAM_TICKET or payload.get("board") != board_id:
+        return None
+    user_id = payload.get("uid")
+    return user_id if isinstance(user_id, int) else None
@@ -13,8 +13,11 @@ from typing import Generator
 
 from app.main import app
 from app.db import Base, get_db
-from app.models import User, UserRole
+from app.models import BoardStats, ConditionBoard, User, UserRole
+from app.principals import principal_cache
+from app.revocation import revocation_list
 from app.services.account_service import hash_password, create_access_token
+from app.test.test_helpers import create_reporters
 
 
 # Create an in-memory SQLite database for testing
@@ -49,6 +52,9 @@ def create_test_db():
     app.router.on_startup.clear()
     
     Base.metadata.create_all(bind=engine)
+    # User ids repeat across tests, so cached principals must not outlive one
+    principal_cache.clear()
+    revocation_list.clear()
     yield
     Base.metadata.drop_all(bind=engine)
     
@@ -123,3 +129,20 @@ def mod_auth_headers(test_moderator: User) -> dict:
     """Create authorization headers for a test moderator."""
     token = create_access_token(data={"sub": str(test_moderator.id)})
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture()
+def board(db: Session) -> ConditionBoard:
+    """Create a condition board with its (empty) stats row."""
+    board = ConditionBoard(name="Diabetes", description="d")
+    board.stats = BoardStats(post_count=0)
+    db.add(board)
+    db.commit()
+    db.refresh(board)
+    return board
+
+
+@pytest.fixture()
+def reporters(db: Session) -> list:
+    """Create three users who can file reports."""
+    return create_reporters(db, 3)
@@ -0,0 +1,269 @@
+"""
+Tests for the background redaction of deleted accounts' content.
+"""
+import json as json_lib
+import os
+import socket
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import leases, models, schemas
+from app.config import settings
+from app.db import Base
+from app.services import account_service, anonymization_service, archive_service, crisis_service
+from app.test.conftest import TestSessionLocal
+
+
+def _seed(db, user, posts=3):
+    """Posts, a report, and a crisis escalation by user, plus another user's post and report."""
+    other = models.User(display_name="Other", is_anonymous=False)
+    db.add(other)
+    db.commit()
+    own_posts = [models.Post(author_id=user.id, group_id=1, content=f"my story {i}") for i in range(posts)]
+    other_post = models.Post(author_id=other.id, group_id=1, content="someone else's story")
+    db.add_all(own_posts + [other_post])
+    db.commit()
+    db.add_all([
+        models.Report(reporting_user_id=user.id, post_id=other_post.id, reason=models.ReportReason.SPAM,
+                      details="they keep posting links"),
+        models.Report(reporting_user_id=other.id, post_id=own_posts[0].id, reason=models.ReportReason.SPAM,
+                      details="spam"),
+    ])
+    db.commit()
+    crisis_service.escalate_crisis(
+        db, schemas.CrisisEscalationInput(post_id=own_posts[0].id, content_snip="I can't go on"), user)
+    return other_post
+
+
+def _job(db, user):
+    db.expire_all()
+    return db.query(models.AnonymizationJob).filter(models.AnonymizationJob.user_id == user.id).one()
+
+
+def _delete(db, user):
+    account_service.delete_account(db, user, "leaving")
+    return _job(db, user)
+
+
+def test_deleting_an_account_queues_a_job(client, db, auth_headers, test_user):
+    client.request("DELETE", "/accounts/me/", content=json_lib.dumps({"reason": "bye"}),
+                   headers={**auth_headers, "Content-Type": "application/json"})
+
+    job = _job(db, test_user)
+    assert job.status == models.AnonymizationStatus.PENDING
+    assert job.phase == "posts"
+
+
+def test_job_redacts_only_the_users_content(db, test_user):
+    other_post = _seed(db, test_user)
+    job = _delete(db, test_user)
+
+    anonymization_service.run_job(db, job.id, batch_size=2)
+
+    db.expire_all()
+    assert {post.content for post in db.query(models.Post).filter(models.Post.author_id == test_user.id)} == {
+        anonymization_service.REDACTED}
+    assert db.get(models.Post, other_post.id).content == "someone else's story"
+    reports = db.query(models.Report).all()
+    assert [r.details for r in reports if r.reporting_user_id == test_user.id] == [None, None]
+    assert [r.details for r in reports if r.reporting_user_id != test_user.id] == ["spam"]
+    [escalation] = db.query(models.AuditLogEntry).filter(models.AuditLogEntry.action_type == "crisis_escalation").all()
+    assert escalation.details == anonymization_service.REDACTED
+    job = _job(db, test_user)
+    assert job.status == models.AnonymizationStatus.DONE
+    assert (job.posts_redacted, job.reports_redacted, job.audit_entries_redacted) == (3, 2, 1)
+
+
+def test_each_batch_commits_its_progress(db, test_user):
+    _seed(db, test_user, posts=5)
+    job = _delete(db, test_user)
+
+    # Stop after the first batch, as a restart would
+    anonymization_service.run_job(db, job.id, batch_size=2, keep_going=lambda: False)
+
+    job = _job(db, test_user)
+    assert job.status == models.AnonymizationStatus.PENDING
+    assert (job.phase, job.posts_redacted) == ("posts", 2)
+    redacted = db.query(models.Post).filter(models.Post.content == anonymization_service.REDACTED).count()
+    assert redacted == 2
+
+    anonymization_service.run_job(db, job.id, batch_size=2)
+
+    job = _job(db, test_user)
+    assert job.status == models.AnonymizationStatus.DONE
+    assert job.posts_redacted == 5
+    assert job.attempts == 2
+
+
+def test_interrupted_batch_is_redone(db, test_user, monkeypatch):
+    _seed(db, test_user, posts=4)
+    job = _delete(db, test_user)
+    original = anonymization_service.run_batch
+    calls = []
+
+    def crash_on_second_batch(session, running_job, batch_size=None):
+        calls.append(running_job.last_id)
+        if len(calls) == 2:
+            raise RuntimeError("process died")
+        return original(session, running_job, batch_size)
+
+    monkeypatch.setattr(anonymization_service, "run_batch", crash_on_second_batch)
+    with pytest.raises(RuntimeError):
+        anonymization_service.run_job(db, job.id, batch_size=2)
+    db.rollback()
+    anonymization_service.record_failure(db, job.id, RuntimeError("process died"))
+    monkeypatch.setattr(anonymization_service, "run_batch", original)
+
+    job = _job(db, test_user)
+    assert (job.status, job.posts_redacted) == (models.AnonymizationStatus.PENDING, 2)
+    anonymization_service.run_job(db, job.id, batch_size=2)
+
+    job = _job(db, test_user)
+    assert job.status == models.AnonymizationStatus.DONE
+    assert job.posts_redacted == 4
+    assert job.last_error is None
+
+
+def test_archived_snippets_are_redacted_in_their_segments(db, test_user, test_moderator, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_DIR", str(tmp_path))
+    _seed(db, test_user)
+    db.add(models.AuditLogEntry(actor_id=test_moderator.id, action_type="moderation_warn", target_type="Report",
+                                target_id=1, details="a moderator's note"))
+    db.commit()
+    [segment] = archive_service.archive_audit_log(db, older_than=time.time() + 60)
+    job = _delete(db, test_user)
+
+    anonymization_service.run_job(db, job.id, batch_size=2)
+
+    db.expire_all()
+    segment = db.get(models.AuditSegment, segment.id)
+    details = {record["action_type"]: record["details"] for record in archive_service.read_segment(segment)}
+    assert details["crisis_escalation"] == anonymization_service.REDACTED
+    assert details["moderation_warn"] == "a moderator's note"
+    assert segment.rewritten_at is not None
+    assert not any(name.endswith(".partial") for name in os.listdir(os.path.dirname(tmp_path / segment.path)))
+    job = _job(db, test_user)
+    assert (job.status, job.audit_entries_redacted) == (models.AnonymizationStatus.DONE, 1)
+
+
+def test_only_one_unfinished_job_per_user(db, test_user):
+    first = _delete(db, test_user)
+    anonymization_service.create_job(db, test_user)
+    db.commit()
+
+    assert _job(db, test_user).id == first.id
+
+
+def test_job_exhausts_its_attempts(db, test_user, monkeypatch):
+    job = _delete(db, test_user)
+    monkeypatch.setattr(anonymization_service.settings, "ANONYMIZATION_MAX_ATTEMPTS", 1)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(anonymization_service, "run_batch", broken)
+    assert anonymization_service.run_pending(TestSessionLocal) == 0
+
+    job = _job(db, test_user)
+    assert job.status == models.AnonymizationStatus.FAILED
+    assert "disk full" in job.last_error
+
+
+def test_progress_is_queryable(client, db, mod_auth_headers, test_user):
+    _seed(db, test_user)
+    job = _delete(db, test_user)
+
+    response = client.get(f"/moderation/anonymization-jobs?user_id={test_user.id}", headers=mod_auth_headers)
+    assert response.status_code == 200
+    [item] = response.json()["items"]
+    assert (item["id"], item["status"], item["phase"]) == (job.id, "pending", "posts")
+
+    anonymization_service.run_job(db, job.id)
+    response = client.get("/moderation/anonymization-jobs?status=done", headers=mod_auth_headers)
+    [item] = response.json()["items"]
+    assert (item["phase"], item["posts_redacted"]) == ("done", 3)
+
+
+def test_progress_requires_moderator(client, auth_headers):
+    assert client.get("/moderation/anonymization-jobs", headers=auth_headers).status_code == 403
+
+
+@pytest.fixture()
+def file_sessions(tmp_path):
+    """Sessions on a file database, since the worker commits on its own connection."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'anonymization.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def test_service_resumes_jobs_left_running(monkeypatch, file_sessions):
+    monkeypatch.setattr(leases, "process_alive", lambda pid: pid != 4242)
+    db = file_sessions()
+    try:
+        user = models.User(display_name="Leaving", is_anonymous=False)
+        db.add(user)
+        db.commit()
+        db.add_all([models.Post(author_id=user.id, content=f"post {i}") for i in range(5)])
+        job = anonymization_service.create_job(db, user)
+        db.commit()
+        # A previous process claimed the job, got through one batch and exited
+        job.status = models.AnonymizationStatus.RUNNING
+        job.claimed_by = f"{socket.gethostname()}:4242"
+        job.claimed_at = time.time()
+        job.last_id = 2
+        job.posts_redacted = 2
+        db.commit()
+        job_id = job.id
+    finally:
+        db.close()
+
+    service = anonymization_service.AnonymizationService(file_sessions, batch_size=2, batch_pause_seconds=0,
+                                                         poll_seconds=60)
+    monkeypatch.setattr(anonymization_service, "service", service)
+    service.start()
+    try:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            db = file_sessions()
+            try:
+                job = db.get(models.AnonymizationJob, job_id)
+                if job.status == models.AnonymizationStatus.DONE:
+                    break
+            finally:
+                db.close()
+            time.sleep(0.02)
+    finally:
+        service.stop()
+
+    assert job.status == models.AnonymizationStatus.DONE
+    # Rows before the resume point aren't revisited
+    assert job.posts_redacted == 5
+
+
+def test_jobs_a_live_worker_holds_are_left_alone(db, monkeypatch):
+    monkeypatch.setattr(leases, "process_alive", lambda pid: True)
+    user = models.User(display_name="Leaving", is_anonymous=False)
+    db.add(user)
+    db.commit()
+    db.add(models.Post(author_id=user.id, content="post"))
+    job = anonymization_service.create_job(db, user)
+    job.status = models.AnonymizationStatus.RUNNING
+    job.claimed_by = f"{socket.gethostname()}:4343"
+    job.claimed_at = time.time()
+    db.commit()
+
+    assert anonymization_service.run_pending(TestSessionLocal) == 0
+    db.refresh(job)
+    assert job.status == models.AnonymizationStatus.RUNNING
+
+    # Once the claim is older than the lease the job is taken over and finished
+    job.claimed_at = time.time() - settings.ANONYMIZATION_LEASE_SECONDS - 1
+    db.commit()
+    assert anonymization_service.run_pending(TestSessionLocal) == 1
+    db.refresh(job)
+    assert job.status == models.AnonymizationStatus.DONE
+    assert job.claimed_by == leases.owner_id()
@@ -0,0 +1,102 @@
+"""
+Tests for archiving old audit entries into compressed segment files.
+"""
+import gzip
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.config import settings
+from app.services import archive_service
+from app.test.test_helpers import walk_pages
+
+AUDIT = "/moderation/audit"
+
+DAY_ONE = datetime(2024, 1, 1, 9).timestamp()
+DAY_TWO = datetime(2024, 1, 2, 9).timestamp()
+RECENT = datetime(2024, 6, 1, 9).timestamp()
+CUTOFF = datetime(2024, 3, 1).timestamp()
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture()
+def entries(db, test_user, test_moderator):
+    """Two entries on each of two old days and two recent ones, oldest first."""
+    specs = [
+        (test_moderator.id, "moderation_ban", DAY_ONE),
+        (test_user.id, "delete_account", DAY_ONE + 60),
+        (test_moderator.id, "moderation_dismiss", DAY_TWO),
+        (test_moderator.id, "moderation_warn", DAY_TWO + 60),
+        (test_moderator.id, "moderation_dismiss", RECENT),
+        (test_user.id, "delete_account", RECENT + 60),
+    ]
+    rows = [
+        models.AuditLogEntry(actor_id=actor_id, action_type=action_type, target_type="Report", target_id=i,
+                             created_at=created_at)
+        for i, (actor_id, action_type, created_at) in enumerate(specs)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def test_old_entries_move_to_daily_segments(db, entries, archive_dir, test_user, test_moderator):
+    segments = archive_service.archive_audit_log(db, CUTOFF)
+
+    assert [(s.day, s.entry_count) for s in segments] == [("2024-01-01", 2), ("2024-01-02", 2)]
+    assert json.loads(segments[0].actor_ids) == sorted([test_user.id, test_moderator.id])
+    assert [row.id for row in db.query(models.AuditLogEntry).order_by(models.AuditLogEntry.id)] == entries[4:]
+    with gzip.open(os.path.join(archive_dir, segments[0].path), "rt") as segment:
+        assert [json.loads(line)["id"] for line in segment] == entries[:2]
+    assert not any(name.endswith(".partial") for _, _, names in os.walk(archive_dir) for name in names)
+
+
+def test_archiving_again_writes_nothing(db, entries):
+    archive_service.archive_audit_log(db, CUTOFF)
+
+    assert archive_service.archive_audit_log(db, CUTOFF) == []
+    assert db.query(models.AuditSegment).count() == 2
+
+
+def test_query_reads_through_to_archive(client, db, entries, mod_auth_headers):
+    archive_service.archive_audit_log(db, CUTOFF)
+
+    assert walk_pages(client, mod_auth_headers, AUDIT, "limit=2") == entries[::-1]
+    query = f"created_before={CUTOFF}&action_type=moderation_dismiss"
+    assert walk_pages(client, mod_auth_headers, AUDIT, query) == [entries[2]]
+    assert walk_pages(client, mod_auth_headers, AUDIT, "target_type=Report&target_id=1") == [entries[1]]
+
+
+def test_segments_outside_the_filters_are_not_opened(db, entries, test_user, monkeypatch):
+    archive_service.archive_audit_log(db, CUTOFF)
+    opened = []
+    read_segment = archive_service.read_segment
+
+    def tracking_read(segment, archive_dir=None):
+        opened.append(segment.day)
+        return read_segment(segment, archive_dir)
+
+    monkeypatch.setattr(archive_service, "read_segment", tracking_read)
+
+    found = archive_service.archived_entries(db, 10, actor_id=test_user.id)
+    assert [entry.id for entry in found] == [entries[1]]
+    assert opened == ["2024-01-01"]
+
+    opened.clear()
+    archive_service.archived_entries(db, 10, created_after=DAY_TWO)
+    assert opened == ["2024-01-02"]
+
+
+def test_recent_pages_skip_the_archive(db, entries, monkeypatch):
+    archive_service.archive_audit_log(db, CUTOFF)
+    monkeypatch.setattr(archive_service, "read_segment", lambda *args: pytest.fail("archive read"))
+
+    archive_service.archived_entries(db, 10, created_after=RECENT)
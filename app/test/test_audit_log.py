@@ -0,0 +1,82 @@
+"""
+Tests for the audit log query API.
+"""
+from app import models
+from app.services.account_service import create_access_token
+from app.test.test_helpers import walk_pages
+
+AUDIT = "/moderation/audit"
+
+
+def _seed(db, actor, specs):
+    """Create one entry per (action_type, target_type, target_id, created_at) spec."""
+    entries = [
+        models.AuditLogEntry(actor_id=actor.id, action_type=action_type, target_type=target_type,
+                             target_id=target_id, created_at=created_at)
+        for action_type, target_type, target_id, created_at in specs
+    ]
+    db.add_all(entries)
+    db.commit()
+    return [entry.id for entry in entries]
+
+
+def _get(client, headers, query=""):
+    response = client.get(f"{AUDIT}?{query}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_pages_walk_every_entry_newest_first(client, db, mod_auth_headers, test_moderator):
+    # Pairs of entries share a timestamp, so pages must break ties on id
+    times = [100.0 + i // 2 for i in range(7)]
+    ids = _seed(db, test_moderator, [("moderation_dismiss", "Report", i, t) for i, t in enumerate(times)])
+
+    newest_first = [i for _, i in sorted(zip(times, ids), reverse=True)]
+    assert walk_pages(client, mod_auth_headers, AUDIT, "limit=3") == newest_first
+
+
+def test_filters(client, db, mod_auth_headers, test_moderator, test_user):
+    ids = _seed(db, test_moderator, [
+        ("moderation_ban", "Report", 1, 100.0),
+        ("delete_post", "Post", 5, 200.0),
+        ("moderation_dismiss", "Report", 2, 300.0),
+        ("moderation_dismiss", "Report", 1, 400.0),
+    ])
+    own = _seed(db, test_user, [("delete_account", "User", test_user.id, 500.0)])
+
+    assert walk_pages(client, mod_auth_headers, AUDIT, f"actor_id={test_user.id}") == own
+    assert walk_pages(client, mod_auth_headers, AUDIT, "action_type=moderation_dismiss") == [ids[3], ids[2]]
+    assert walk_pages(client, mod_auth_headers, AUDIT, "target_type=Report&target_id=1") == [ids[3], ids[0]]
+    assert walk_pages(client, mod_auth_headers, AUDIT, "created_after=200&created_before=400") == [ids[2], ids[1]]
+
+
+def test_target_id_needs_target_type(client, mod_auth_headers):
+    response = client.get("/moderation/audit?target_id=1", headers=mod_auth_headers)
+    assert response.status_code == 400
+
+
+def test_moderation_actions_are_queryable(client, db, mod_auth_headers, test_moderator, test_user):
+    report = models.Report(reporting_user_id=test_moderator.id, reported_user_id=test_user.id,
+                           reason=models.ReportReason.SPAM, created_at=1.0)
+    db.add(report)
+    db.commit()
+    client.post("/moderation/determine-action", json={"report_id": report.id, "action": "warn"},
+                headers=mod_auth_headers)
+
+    [entry] = _get(client, mod_auth_headers, f"target_type=Report&target_id={report.id}")["items"]
+    assert entry["action_type"] == "moderation_warn"
+    assert entry["actor_id"] == test_moderator.id
+
+
+def test_admins_can_read(client, db):
+    admin = models.User(email="admin@example.com", display_name="Admin", is_anonymous=False,
+                        role=models.UserRole.ADMIN)
+    db.add(admin)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(admin.id)})}"}
+
+    assert client.get("/moderation/audit", headers=headers).status_code == 200
+
+
+def test_requires_moderator(client, auth_headers):
+    assert client.get("/moderation/audit", headers=auth_headers).status_code == 403
@@ -0,0 +1,154 @@
+"""
+Tests for the write-behind audit log writer.
+"""
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, schemas
+from app.db import Base, count_statements
+from app.services import audit_service, crisis_service
+
+
+@pytest.fixture()
+def file_sessions(tmp_path):
+    """Sessions on a file database, since the writer commits on its own connection."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def _writer(monkeypatch, session_factory, batch_size=100, flush_seconds=60.0, max_pending=1000):
+    """A running writer installed as the one record() buffers for; it only flushes when told to."""
+    writer = audit_service.AuditWriter(session_factory, batch_size=batch_size, flush_seconds=flush_seconds,
+                                       max_pending=max_pending)
+    monkeypatch.setattr(audit_service, "writer", writer)
+    writer.start()
+    return writer
+
+
+@pytest.fixture()
+def writer(monkeypatch, file_sessions):
+    writer = _writer(monkeypatch, file_sessions)
+    yield writer
+    writer.stop()
+
+
+def _log(session_factory, count=1, commit=True, **kwargs):
+    db = session_factory()
+    try:
+        for i in range(count):
+            audit_service.record(db, actor_id=None, action_type="test_action", target_type="Report", target_id=i,
+                                 **kwargs)
+        if commit:
+            db.commit()
+        else:
+            db.rollback()
+    finally:
+        db.close()
+
+
+def _logged(session_factory):
+    db = session_factory()
+    try:
+        return db.query(models.AuditLogEntry).count()
+    finally:
+        db.close()
+
+
+def test_entries_are_written_after_commit_in_batches(writer, file_sessions):
+    _log(file_sessions, count=3)
+
+    assert writer.pending == 3
+    assert _logged(file_sessions) == 0
+    with count_statements() as counter:
+        assert writer.flush() == 3
+    assert counter.count == 1
+    assert writer.pending == 0
+    assert _logged(file_sessions) == 3
+
+
+def test_rolled_back_entries_are_dropped(writer, file_sessions):
+    _log(file_sessions, commit=False)
+    _log(file_sessions)
+
+    assert writer.pending == 1
+
+
+def test_durable_entries_commit_with_the_transaction(writer, file_sessions):
+    db = file_sessions()
+    try:
+        user = models.User(display_name="Poster", is_anonymous=False)
+        db.add(user)
+        db.commit()
+        crisis_service.escalate_crisis(db, schemas.CrisisEscalationInput(content_snip="help"), user)
+    finally:
+        db.close()
+
+    assert writer.pending == 0
+    assert _logged(file_sessions) == 1
+
+
+def test_stop_writes_everything_buffered(monkeypatch, file_sessions):
+    writer = _writer(monkeypatch, file_sessions, batch_size=2)
+    _log(file_sessions, count=5)
+
+    writer.stop()
+
+    assert writer.pending == 0
+    assert _logged(file_sessions) == 5
+
+
+def test_writer_flushes_on_its_interval(monkeypatch, file_sessions):
+    writer = _writer(monkeypatch, file_sessions, flush_seconds=0.05)
+    try:
+        _log(file_sessions, count=2)
+        deadline = time.monotonic() + 5
+        while writer.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert writer.pending == 0
+        assert _logged(file_sessions) == 2
+    finally:
+        writer.stop()
+
+
+def test_full_buffer_is_flushed_by_the_caller(monkeypatch, file_sessions):
+    writer = _writer(monkeypatch, file_sessions, batch_size=2, max_pending=3)
+    try:
+        _log(file_sessions, count=3)
+        assert _logged(file_sessions) == 2
+        assert writer.pending == 1
+    finally:
+        writer.stop()
+
+
+def test_failed_batch_stays_buffered(writer, file_sessions):
+    _log(file_sessions, count=2)
+    failures = audit_service.flush_failures.value
+
+    def locked(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    def broken_session():
+        session = file_sessions()
+        session.execute = locked
+        return session
+
+    writer._session_factory = broken_session
+    with pytest.raises(RuntimeError):
+        writer.flush()
+
+    assert writer.pending == 2
+    assert audit_service.flush_failures.value == failures + 1
+    writer._session_factory = file_sessions
+    assert writer.flush() == 2
+
+
+def test_entries_are_synchronous_when_writer_is_stopped(db, test_user):
+    audit_service.record(db, actor_id=test_user.id, action_type="test_action")
+    db.commit()
+
+    assert db.query(models.AuditLogEntry).count() == 1
@@ -0,0 +1,170 @@
+"""
+Tests for the board event hub and the SSE endpoint.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app import models
+from app.event_hub import EventHub
+
+
+def _run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=5))
+
+
+def test_publish_from_another_thread_reaches_subscriber():
+    hub = EventHub(buffer_size=10, queue_size=10)
+
+    async def scenario():
+        stream = hub.stream(1)
+        assert (await stream.__anext__()).startswith("retry:")
+        waiter = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        thread = threading.Thread(target=hub.publish, args=(1, "post_created", {"id": 7}))
+        thread.start()
+        frame = await waiter
+        thread.join()
+        await stream.aclose()
+        return frame
+
+    frame = _run(scenario())
+    assert "event: post_created" in frame
+    assert 'data: {"id": 7}' in frame
+    assert hub.subscriber_count() == 0
+
+
+def test_events_for_other_boards_are_not_delivered():
+    hub = EventHub(buffer_size=10, queue_size=10)
+
+    async def scenario():
+        sub, _, _ = hub.subscribe(1)
+        hub.publish(2, "post_created", {"id": 1})
+        await asyncio.sleep(0)
+        empty = sub.queue.empty()
+        hub.unsubscribe(sub)
+        return empty
+
+    assert _run(scenario())
+
+
+def test_resume_from_last_event_id_replays_missed_events():
+    hub = EventHub(buffer_size=10, queue_size=10)
+    hub.publish(1, "post_created", {"id": 1})
+    hub.publish(2, "post_created", {"id": 99})
+    hub.publish(1, "post_created", {"id": 2})
+    hub.publish(1, "post_deleted", {"id": 1})
+    first_id = hub._buffers[1][0].id
+
+    async def scenario():
+        sub, backlog, reset = hub.subscribe(1, first_id)
+        hub.unsubscribe(sub)
+        return backlog, reset
+
+    backlog, reset = _run(scenario())
+    assert not reset
+    assert [(e.event, e.data["id"]) for e in backlog] == [("post_created", 2), ("post_deleted", 1)]
+
+
+@pytest.mark.parametrize("last_event_id", ["0-1", "garbage"])
+def test_unknown_last_event_id_requests_reset(last_event_id):
+    hub = EventHub(buffer_size=10, queue_size=10)
+
+    async def scenario():
+        sub, backlog, reset = hub.subscribe(1, last_event_id)
+        hub.unsubscribe(sub)
+        return backlog, reset
+
+    assert _run(scenario()) == ([], True)
+
+
+def test_evicted_position_requests_reset():
+    hub = EventHub(buffer_size=2, queue_size=10)
+    for i in range(4):
+        hub.publish(1, "post_created", {"id": i})
+    too_old = f"{hub.epoch}-1"
+
+    async def scenario():
+        sub, backlog, reset = hub.subscribe(1, too_old)
+        hub.unsubscribe(sub)
+        return reset
+
+    assert _run(scenario()) is True
+
+
+def test_slow_subscriber_is_disconnected_on_overflow():
+    hub = EventHub(buffer_size=10, queue_size=2)
+
+    async def scenario():
+        stream = hub.stream(1)
+        await stream.__anext__()
+        for i in range(5):
+            hub.publish(1, "post_created", {"id": i})
+        await asyncio.sleep(0)
+        return [frame async for frame in stream]
+
+    frames = _run(scenario())
+    # Queue held events 0 and 1; event 2 overflowed it, so the oldest is dropped and the stream ends
+    assert len(frames) == 1
+    assert '"id": 1' in frames[0]
+    assert hub.subscriber_count() == 0
+
+
+def test_post_and_delete_publish_events(client, db, auth_headers, monkeypatch):
+    from app import event_hub
+
+    published = []
+    monkeypatch.setattr(event_hub, "publish", lambda board_id, event, data: published.append((board_id, event, data)))
+
+    response = client.post("/posts/", json={"group_id": 3, "content": "live", "posttime": 1.0}, headers=auth_headers)
+    post_id = response.json()["id"]
+    client.delete(f"/posts/{post_id}", headers=auth_headers)
+
+    assert [(b, e) for b, e, _ in published] == [(3, "post_created"), (3, "post_deleted")]
+    assert published[0][2]["content"] == "live"
+    assert published[0][2]["author"]["display_name"] == "Test User"
+
+
+def test_events_endpoint_unknown_board_returns_404(client, auth_headers):
+    assert client.get("/boards/999/events", headers=auth_headers).status_code == 404
+
+
+def test_events_endpoint_requires_authentication(client):
+    assert client.get("/boards/1/events").status_code == 401
+
+
+def _ticket(client, headers, board_id):
+    response = client.post(f"/boards/{board_id}/events/ticket", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["ticket"]
+
+
+def test_events_endpoint_accepts_ticket_for_its_board(client, auth_headers, board, monkeypatch):
+    from app.services import board_service
+
+    ticket = _ticket(client, auth_headers, board.id)
+    # Stop at the board lookup, after authentication, rather than open an endless stream
+    monkeypatch.setattr(board_service, "get_board", lambda db, board_id: None)
+    assert client.get(f"/boards/{board.id}/events?ticket={ticket}").status_code == 404
+    assert client.get(f"/boards/{board.id + 1}/events?ticket={ticket}").status_code == 401
+    assert client.get(f"/boards/{board.id}/events?ticket=not-a-ticket").status_code == 401
+
+
+def test_ticket_is_not_an_access_token(client, auth_headers, board):
+    ticket = _ticket(client, auth_headers, board.id)
+    assert client.get("/boards/", headers={"Authorization": f"Bearer {ticket}"}).status_code == 401
+
+
+def test_expired_ticket_is_rejected(test_user, monkeypatch):
+    from app.config import settings
+    from app.services import token_service
+
+    monkeypatch.setattr(settings, "SSE_TICKET_SECONDS", -1)
+    ticket = token_service.create_stream_ticket(test_user.id, 1)
+    assert token_service.read_stream_ticket(ticket, 1) is None
+
+
+def test_ticket_endpoint_requires_authentication_and_a_board(client, auth_headers):
+    assert client.post("/boards/1/events/ticket").status_code == 401
+    assert client.post("/boards/999/events/ticket", headers=auth_headers).status_code == 404
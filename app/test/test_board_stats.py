@@ -0,0 +1,79 @@
+"""
+Tests for the incrementally maintained board statistics.
+"""
+from app import models
+from app.services import board_service
+from app.test.test_helpers import create_post
+
+
+def _stats_for(client, headers, board_id):
+    response = client.get("/boards/stats", headers=headers)
+    assert response.status_code == 200
+    return next(s for s in response.json() if s["board_id"] == board_id)
+
+
+def test_stats_start_at_zero(client, auth_headers, board):
+    stats = _stats_for(client, auth_headers, board.id)
+    assert stats == {"board_id": board.id, "post_count": 0, "latest_post_at": None}
+
+
+def test_post_create_and_delete_update_counters(client, auth_headers, board):
+    first = create_post(client, auth_headers, board.id, posttime=100.0)["id"]
+    second = create_post(client, auth_headers, board.id, posttime=200.0)["id"]
+
+    stats = _stats_for(client, auth_headers, board.id)
+    assert stats["post_count"] == 2
+    assert stats["latest_post_at"] == 200.0
+
+    assert client.delete(f"/posts/{second}", headers=auth_headers).status_code == 200
+    stats = _stats_for(client, auth_headers, board.id)
+    assert stats["post_count"] == 1
+    assert stats["latest_post_at"] == 100.0
+
+    assert client.delete(f"/posts/{first}", headers=auth_headers).status_code == 200
+    stats = _stats_for(client, auth_headers, board.id)
+    assert stats["post_count"] == 0
+    assert stats["latest_post_at"] is None
+
+
+def test_moderator_delete_updates_counters(client, auth_headers, mod_auth_headers, board):
+    post_id = create_post(client, auth_headers, board.id, posttime=100.0)["id"]
+
+    response = client.post(f"/moderation/delete-post/{post_id}?reason=spam", headers=mod_auth_headers)
+    assert response.status_code == 200
+
+    assert _stats_for(client, auth_headers, board.id)["post_count"] == 0
+
+
+def test_lazily_creates_stats_row_for_board_without_one(client, db, auth_headers):
+    board = models.ConditionBoard(name="Legacy")
+    db.add(board)
+    db.commit()
+
+    create_post(client, auth_headers, board.id, posttime=50.0)["id"]
+
+    stats = _stats_for(client, auth_headers, board.id)
+    assert stats["post_count"] == 1
+    assert stats["latest_post_at"] == 50.0
+
+
+def test_rebuild_corrects_drift(db, board, test_user):
+    db.add_all([
+        models.Post(author_id=test_user.id, group_id=board.id, content="a", created_at=10.0),
+        models.Post(author_id=test_user.id, group_id=board.id, content="b", created_at=20.0),
+        models.Post(author_id=test_user.id, group_id=board.id, content="c", created_at=30.0,
+                    status=models.PostStatus.DELETED),
+    ])
+    db.commit()
+
+    drifted = board_service.rebuild_board_stats(db)
+
+    assert drifted == [(board.id, 0, 2)]
+    db.refresh(board.stats)
+    assert board.stats.post_count == 2
+    assert board.stats.latest_post_at == 20.0
+    assert board_service.rebuild_board_stats(db) == []
+
+
+def test_stats_requires_authentication(client):
+    assert client.get("/boards/stats").status_code == 401
@@ -0,0 +1,166 @@
+"""
+Tests for bulk moderation actions.
+"""
+import pytest
+
+from app import models
+from app.services import moderation_service, summary_service
+from app.test.test_helpers import create_post
+
+
+def _report(db, reporter, author, post_id=None, is_crisis=False, status=models.ReportStatus.OPEN):
+    report = models.Report(
+        reporting_user_id=reporter.id,
+        reported_user_id=author.id,
+        post_id=post_id,
+        reason=models.ReportReason.CRISIS if is_crisis else models.ReportReason.SPAM,
+        is_crisis=is_crisis,
+        status=status,
+        created_at=1.0,
+    )
+    db.add(report)
+    db.commit()
+    return report.id
+
+
+def _bulk(client, headers, **body):
+    return client.post("/moderation/bulk-action", json=body, headers=headers)
+
+
+def _outcomes(response):
+    assert response.status_code == 200, response.text
+    return {result["report_id"]: result["outcome"] for result in response.json()["results"]}
+
+
+def _audit_count(db):
+    return db.query(models.AuditLogEntry).filter(models.AuditLogEntry.target_type == "Report").count()
+
+
+def test_dismisses_reports_by_id(client, db, mod_auth_headers, test_user, test_moderator):
+    ids = [_report(db, test_moderator, test_user) for _ in range(5)]
+
+    response = _bulk(client, mod_auth_headers, action="dismiss", report_ids=ids, mod_note="spam wave")
+
+    assert _outcomes(response) == {report_id: "applied" for report_id in ids}
+    assert response.json()["applied"] == 5
+    db.expire_all()
+    assert {r.status for r in db.query(models.Report).all()} == {models.ReportStatus.DISMISSED}
+    assert _audit_count(db) == 5
+
+
+def test_statement_count_does_not_grow_with_reports(client, db, mod_auth_headers, test_user, test_moderator):
+    small = [_report(db, test_moderator, test_user) for _ in range(3)]
+    large = [_report(db, test_moderator, test_user) for _ in range(60)]
+    # Caches the moderator's principal; count later requests
+    _bulk(client, mod_auth_headers, action="dismiss", report_ids=[9999])
+
+    counts = [
+        int(_bulk(client, mod_auth_headers, action="dismiss", report_ids=ids).headers["X-SQL-Statements"])
+        for ids in (small, large)
+    ]
+
+    assert counts[0] == counts[1]
+
+
+def test_reports_unknown_closed_and_crisis_outcomes(client, db, mod_auth_headers, test_user, test_moderator):
+    open_id = _report(db, test_moderator, test_user)
+    closed_id = _report(db, test_moderator, test_user, status=models.ReportStatus.RESOLVED)
+    crisis_id = _report(db, test_moderator, test_user, is_crisis=True)
+
+    response = _bulk(client, mod_auth_headers, action="ban", report_ids=[open_id, closed_id, crisis_id, 9999])
+
+    assert _outcomes(response) == {open_id: "applied", closed_id: "not_open", crisis_id: "rejected", 9999: "not_found"}
+    db.expire_all()
+    assert db.get(models.Report, crisis_id).status == models.ReportStatus.OPEN
+    assert db.get(models.User, test_user.id).is_banned is True
+
+
+def test_delete_post_resolves_every_open_report_on_post(client, db, auth_headers, mod_auth_headers, test_user,
+                                                       test_moderator, board):
+    post_id = create_post(client, auth_headers, board.id, content="spam")["id"]
+    other_post_id = create_post(client, auth_headers, board.id, content="spam", posttime=2.0)["id"]
+    on_post = [_report(db, test_moderator, test_user, post_id) for _ in range(3)]
+    elsewhere = _report(db, test_moderator, test_user, other_post_id)
+
+    response = _bulk(client, mod_auth_headers, action="delete_post", post_id=post_id)
+
+    assert _outcomes(response) == {report_id: "applied" for report_id in on_post}
+    db.expire_all()
+    assert db.get(models.Post, post_id).status == models.PostStatus.DELETED
+    assert db.get(models.Report, elsewhere).status == models.ReportStatus.OPEN
+    assert {db.get(models.Report, i).resolution_impact for i in on_post} == {"post_deleted_user_warned"}
+    stats = db.get(models.BoardStats, board.id)
+    assert stats.post_count == 1
+    assert stats.latest_post_at == 2.0
+
+
+def test_ban_by_user_blocks_posting(client, db, auth_headers, mod_auth_headers, test_user, test_moderator):
+    ids = [_report(db, test_moderator, test_user) for _ in range(2)]
+
+    assert set(_outcomes(_bulk(client, mod_auth_headers, action="ban", reported_user_id=test_user.id))) == set(ids)
+
+    response = client.post("/posts/", json={"group_id": 1, "content": "hi", "posttime": 1.0}, headers=auth_headers)
+    assert response.status_code == 403
+
+
+def test_delete_account_deletes_each_user_once(client, db, auth_headers, mod_auth_headers, test_user, test_moderator):
+    ids = [_report(db, test_moderator, test_user) for _ in range(2)]
+
+    _outcomes(_bulk(client, mod_auth_headers, action="delete_account", report_ids=ids))
+
+    db.expire_all()
+    user = db.get(models.User, test_user.id)
+    assert user.is_active is False and user.is_banned is True
+    assert db.query(models.AuditLogEntry).filter(models.AuditLogEntry.action_type == "delete_account").count() == 1
+    assert client.get("/boards/stats", headers=auth_headers).status_code == 403
+
+
+@pytest.mark.parametrize("body", [
+    {"action": "dismiss"},
+    {"action": "dismiss", "report_ids": [1], "post_id": 1},
+    {"action": "explode", "report_ids": [1]},
+])
+def test_rejects_bad_requests(client, mod_auth_headers, body):
+    assert client.post("/moderation/bulk-action", json=body, headers=mod_auth_headers).status_code == 400
+
+
+def test_reports_resolved_meanwhile_are_not_applied(client, db, mod_auth_headers, test_user, test_moderator,
+                                                   monkeypatch):
+    ids = [_report(db, test_moderator, test_user) for _ in range(3)]
+    select_targets = moderation_service._bulk_targets
+
+    def targets_then_resolved_elsewhere(db, data):
+        targets = select_targets(db, data)
+        # Another moderator closes a report after this action read it as open
+        db.query(models.Report).filter(models.Report.id == ids[1]).update(
+            {models.Report.status: models.ReportStatus.RESOLVED, models.Report.resolved_at: 5.0})
+        return targets
+
+    monkeypatch.setattr(moderation_service, "_bulk_targets", targets_then_resolved_elsewhere)
+    open_before = summary_service.summary(db)["open"]
+
+    response = _bulk(client, mod_auth_headers, action="dismiss", report_ids=ids)
+
+    assert _outcomes(response) == {ids[0]: "applied", ids[1]: "not_open", ids[2]: "applied"}
+    assert response.json()["applied"] == 2
+    assert _audit_count(db) == 2
+    assert summary_service.summary(db)["open"] == open_before - 2
+    db.expire_all()
+    assert db.get(models.Report, ids[1]).resolved_at == 5.0
+
+
+def test_acting_on_a_closed_report_keeps_its_resolved_at(client, db, mod_auth_headers, test_user, test_moderator):
+    report_id = _report(db, test_moderator, test_user, status=models.ReportStatus.RESOLVED)
+    db.get(models.Report, report_id).resolved_at = 5.0
+    db.commit()
+
+    response = client.post("/moderation/determine-action", json={"report_id": report_id, "action": "dismiss"},
+                           headers=mod_auth_headers)
+
+    assert response.status_code == 200, response.text
+    db.expire_all()
+    assert db.get(models.Report, report_id).resolved_at == 5.0
+
+
+def test_requires_moderator(client, auth_headers):
+    assert _bulk(client, auth_headers, action="dismiss", report_ids=[1]).status_code == 403
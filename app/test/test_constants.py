@@ -3,7 +3,7 @@ Tests for centralized constants and utility functions.
 """
 import pytest
 
-from app.constants import CRISIS_KEYWORDS, detect_crisis
+from app.constants import CRISIS_KEYWORDS, detect_crisis, find_crisis_keywords
 
 
 class TestCrisisDetection:
@@ -51,7 +51,14 @@ class TestCrisisDetection:
             assert detect_crisis(keyword) is True, f"Keyword '{keyword}' should trigger detection"
     
     def test_partial_keyword_match(self):
-        """Test that partial matches within words also trigger."""
-        # 'suicidal' contains 'suicide' but we want exact phrase matching
-        # This tests the current behavior
+        """Test that keywords match whole words only."""
         assert detect_crisis("suicidal thoughts") is True
+        assert detect_crisis("Tracking pending items") is False
+        assert detect_crisis("I'm feeling   DOWN, again") is True
+
+    def test_find_crisis_keywords_reports_spans(self):
+        """Test that matches carry the keyword and where it occurs."""
+        content = "Honestly I want to die. Suicidal."
+        matches = find_crisis_keywords(content)
+        assert [m.keyword for m in matches] == ["want to die", "suicidal"]
+        assert [content[m.start:m.end] for m in matches] == ["want to die", "Suicidal"]
@@ -3,6 +3,9 @@ Tests for crisis escalation functionality.
 """
 import pytest
 
+from app import models, schemas
+from app.services import crisis_service, report_service
+
 
 def test_crisis_escalation_valid(client, auth_headers):
     """Test valid crisis escalation request."""
@@ -54,3 +57,39 @@ def test_crisis_content_truncated(client, auth_headers):
     )
     # Should succeed - content is truncated in service layer
     assert response.status_code == 200
+
+
+def _fail_on_audit_entry(monkeypatch, service):
+    def explode(**kwargs):
+        raise RuntimeError("audit write failed")
+    monkeypatch.setattr(service.models, "AuditLogEntry", explode)
+
+
+def _crisis_rows(db):
+    db.rollback()
+    return db.query(models.Report).count(), db.query(models.CrisisTicket).count()
+
+
+def test_crisis_escalation_is_all_or_nothing(db, test_user, monkeypatch):
+    """Test that a failure late in escalation leaves no report or ticket behind."""
+    _fail_on_audit_entry(monkeypatch, crisis_service)
+    data = schemas.CrisisEscalationInput(content_snip="I feel unsafe.")
+
+    with pytest.raises(RuntimeError):
+        crisis_service.escalate_crisis(db, data, test_user)
+
+    assert _crisis_rows(db) == (0, 0)
+
+
+def test_crisis_report_is_all_or_nothing(db, test_user, test_moderator, monkeypatch):
+    """Test that a crisis report and its ticket are created together or not at all."""
+    post = models.Post(author_id=test_moderator.id, group_id=1, content="hard day", created_at=1.0)
+    db.add(post)
+    db.commit()
+    _fail_on_audit_entry(monkeypatch, report_service)
+    data = schemas.ReportCreate(reason=models.ReportReason.CRISIS)
+
+    with pytest.raises(RuntimeError):
+        report_service.create_report(db, test_user, post.id, data)
+
+    assert _crisis_rows(db) == (0, 0)
@@ -0,0 +1,84 @@
+"""
+Tests for ETag / If-None-Match conditional responses.
+"""
+from app.etag import etag_matches, make_etag
+from app.test.test_helpers import create_post
+
+
+def _revalidate(client, url, headers, etag):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+def test_etag_matches_handles_lists_weak_and_star():
+    etag = make_etag("x", 1)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_board_feed_returns_304_without_running_feed_query(client, auth_headers, board):
+    url = f"/posts/?group_id={board.id}"
+    first = client.get(url, headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    second = _revalidate(client, url, auth_headers, etag)
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.content == b""
+    # The caller comes from the principal cache; only the board version is read, no feed SELECT
+    assert int(second.headers["X-SQL-Statements"]) == 1
+
+
+def test_board_feed_etag_differs_per_page(client, auth_headers, board):
+    full = client.get(f"/posts/?group_id={board.id}", headers=auth_headers).headers["ETag"]
+    paged = client.get(f"/posts/?group_id={board.id}&limit=5", headers=auth_headers).headers["ETag"]
+    assert full != paged
+
+
+def test_new_post_changes_etag(client, auth_headers, board):
+    url = f"/posts/?group_id={board.id}"
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+
+    create_post(client, auth_headers, board.id, posttime=100.0)
+
+    response = _revalidate(client, url, auth_headers, etag)
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+
+def test_moderation_delete_changes_etag(client, auth_headers, mod_auth_headers, board):
+    post_id = create_post(client, auth_headers, board.id, posttime=100.0)["id"]
+    url = f"/posts/?group_id={board.id}"
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+
+    assert client.post(f"/moderation/delete-post/{post_id}?reason=x", headers=mod_auth_headers).status_code == 200
+
+    response = _revalidate(client, url, auth_headers, etag)
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_author_rename_changes_etag(client, auth_headers, board):
+    create_post(client, auth_headers, board.id, posttime=100.0)
+    url = f"/posts/?group_id={board.id}"
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+
+    assert client.patch("/accounts/me/", json={"display_name": "Renamed"}, headers=auth_headers).status_code == 200
+
+    response = _revalidate(client, url, auth_headers, etag)
+    assert response.status_code == 200
+    assert response.json()[0]["author"]["display_name"] == "Renamed"
+
+
+def test_boards_list_etag(client, auth_headers, mod_auth_headers, board):
+    etag = client.get("/boards/", headers=auth_headers).headers["ETag"]
+    assert _revalidate(client, "/boards/", auth_headers, etag).status_code == 304
+
+    client.post("/boards/", json={"name": "New Board"}, headers=mod_auth_headers)
+
+    response = _revalidate(client, "/boards/", auth_headers, etag)
+    assert response.status_code == 200
+    assert len(response.json()) == 2
@@ -0,0 +1,83 @@
+"""
+Tests for the bounded password hashing pool.
+"""
+import threading
+
+import pytest
+
+from app.services import auth_service, hashing_service
+from app.services.hashing_service import HashingBusy, HashingPool
+
+
+def _login(client, password="testpassword"):
+    return client.post("/accounts/login", json={"email": "testuser@example.com", "password": password})
+
+
+def test_pool_hashes_and_verifies_in_worker_process():
+    pool = HashingPool(workers=1, queue_limit=0)
+    try:
+        hashed = pool.run(auth_service.hash_password, "secret")
+        assert pool.run(auth_service.verify_password, "secret", hashed) is True
+        assert pool.run(auth_service.verify_password, "other", hashed) is False
+    finally:
+        pool.shutdown()
+
+
+def test_pool_rejects_calls_beyond_its_limit():
+    pool = HashingPool(workers=0, queue_limit=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(pool.run(slow)))
+    worker.start()
+    started.wait(5)
+    rejected_before = hashing_service.hash_rejected.value
+
+    assert pool.in_flight == 1
+    with pytest.raises(HashingBusy) as busy:
+        pool.run(slow)
+    assert busy.value.retry_after >= 1
+    assert hashing_service.hash_rejected.value == rejected_before + 1
+
+    release.set()
+    worker.join(5)
+    assert results == ["done"]
+    assert pool.in_flight == 0
+
+
+def test_pool_records_latency():
+    pool = HashingPool(workers=0, queue_limit=1)
+    observed = hashing_service.hash_seconds.count
+
+    pool.run(auth_service.hash_password, "secret")
+
+    assert hashing_service.hash_seconds.count == observed + 1
+
+
+def test_login_through_pool(client, test_user):
+    assert _login(client).status_code == 200
+    assert _login(client, "wrong").status_code == 401
+
+
+def test_login_returns_429_when_queue_is_full(client, test_user, monkeypatch):
+    monkeypatch.setattr(hashing_service, "pool", HashingPool(workers=0, queue_limit=0))
+
+    response = _login(client)
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_register_returns_429_when_queue_is_full(client, monkeypatch):
+    monkeypatch.setattr(hashing_service, "pool", HashingPool(workers=0, queue_limit=0))
+
+    response = client.post("/accounts/register", json={
+        "email": "new@example.com", "password": "password123", "display_name": "New",
+    })
+
+    assert response.status_code == 429
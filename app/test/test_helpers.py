@@ -6,6 +6,9 @@ code duplication across test files and ensure consistent testing patterns.
 """
 from typing import Any, Dict, List, Optional, Type
 
+from app import models, schemas
+from app.services import report_service
+
 
 class FakeQuery:
     """
@@ -23,10 +26,18 @@ class FakeQuery:
         """Ignore filters; tests control which objects are present."""
         return self
 
+    def options(self, *args, **kwargs) -> 'FakeQuery':
+        """Ignore loader options; return self for chaining."""
+        return self
+
     def order_by(self, *args, **kwargs) -> 'FakeQuery':
         """Ignore ordering; return self for chaining."""
         return self
 
+    def limit(self, *args, **kwargs) -> 'FakeQuery':
+        """Ignore limits; return self for chaining."""
+        return self
+
     def all(self) -> List:
         """Return all objects in the data list."""
         return list(self._data_list)
@@ -37,6 +48,14 @@ class FakeQuery:
             return self._first_result
         return self._data_list[0] if self._data_list else None
 
+    def scalar(self) -> Optional[Any]:
+        """Return the first object, mirroring a single-column result."""
+        return self.first()
+
+    def update(self, *args, **kwargs) -> int:
+        """Pretend no rows matched a bulk UPDATE."""
+        return 0
+
     def count(self) -> int:
         """Return count of objects."""
         return len(self._data_list)
@@ -64,6 +83,7 @@ class FakeSession:
         self.data: Dict[Type, List] = data or {}
         self.committed = False
         self._added_objects: List = []
+        self.executed: List = []
 
     def query(self, model: Type) -> FakeQuery:
         """Return a FakeQuery for the given model class."""
@@ -75,6 +95,14 @@ class FakeSession:
         self._added_objects.append(obj)
         self.data.setdefault(obj.__class__, []).append(obj)
 
+    def flush(self) -> None:
+        """No-op for tests - simulates flushing pending objects."""
+        pass
+
+    def execute(self, statement: Any, params: Any = None) -> None:
+        """Record a Core statement (e.g. an upsert) without running it."""
+        self.executed.append(statement)
+
     def commit(self) -> None:
         """Mark the session as committed."""
         self.committed = True
@@ -110,3 +138,66 @@ class FakeDB:
             data_list=self._result_list, 
             first_result=self._first_result
         )
+
+
+def create_post(client, headers: Dict[str, str], group_id: Optional[int] = 1, content: str = "hello",
+                posttime: float = 1.0) -> dict:
+    """
+    Create a post through POST /posts/ and return it as JSON.
+
+    Usage:
+        post_id = create_post(client, auth_headers, board.id)["id"]
+    """
+    response = client.post("/posts/", json={"group_id": group_id, "content": content, "posttime": posttime},
+                           headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def create_reporters(db, count: int, prefix: str = "reporter") -> List[Any]:
+    """
+    Add count users who can file reports, with emails prefix0@example.com and up.
+
+    Usage:
+        first, second = create_reporters(db, 2)
+    """
+    users = [
+        models.User(email=f"{prefix}{i}@example.com", display_name=f"Reporter {i}", is_anonymous=False)
+        for i in range(count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def create_report(db, reporter, post, reason=None) -> int:
+    """
+    File a report on post through report_service, as the app does, and return its id.
+    reason defaults to spam.
+
+    Usage:
+        report_id = create_report(db, reporter, post, models.ReportReason.CRISIS)
+    """
+    data = schemas.ReportCreate(reason=reason or models.ReportReason.SPAM)
+    return report_service.create_report(db, reporter, post.id, data).id
+
+
+def walk_pages(client, headers: Dict[str, str], path: str, query: str = "", field: str = "id") -> List[Any]:
+    """
+    Follow next_cursor through a cursor-paged endpoint from its first page to its last.
+
+    Usage:
+        ids = walk_pages(client, mod_auth_headers, "/moderation/reports", "limit=3")
+
+    Returns:
+        The given field of every item, in the order the pages returned them.
+    """
+    values, cursor = [], None
+    while True:
+        response = client.get(f"{path}?{query}" + (f"&cursor={cursor}" if cursor else ""), headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        values.extend(item[field] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return values
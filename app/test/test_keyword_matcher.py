@@ -0,0 +1,62 @@
+"""
+Tests for the Aho-Corasick keyword matcher.
+"""
+import pytest
+
+from app.keyword_matcher import KeywordMatch, KeywordMatcher
+
+
+def spans(matcher, text):
+    return [(m.keyword, text[m.start:m.end]) for m in matcher.finditer(text)]
+
+
+def test_reports_overlapping_and_nested_phrases():
+    matcher = KeywordMatcher(["want to die", "to die", "die", "i want"])
+    text = "I want to die"
+    assert spans(matcher, text) == [
+        ("i want", "I want"),
+        ("want to die", "want to die"),
+        ("to die", "to die"),
+        ("die", "die"),
+    ]
+
+
+def test_follows_failure_links_after_partial_match():
+    matcher = KeywordMatcher(["kill myself", "myself tonight"])
+    assert spans(matcher, "kill kill myself tonight") == [
+        ("kill myself", "kill myself"),
+        ("myself tonight", "myself tonight"),
+    ]
+
+
+def test_matches_whole_words_only():
+    matcher = KeywordMatcher(["ending it", "die"])
+    assert matcher.find_all("pending items, diet, studied") == []
+    assert matcher.search("ending it.") is True
+
+
+def test_ignores_case_punctuation_and_spacing_between_words():
+    matcher = KeywordMatcher(["Feeling Down"])
+    assert matcher.find_all("so...FEELING\n\tdown!") == [KeywordMatch("Feeling Down", 5, 18)]
+
+
+def test_matches_non_ascii_phrases():
+    matcher = KeywordMatcher(["quiero morir", "Selbstmord"])
+    text = "A veces QUIERO morir. selbstmord?"
+    assert [m.keyword for m in matcher.finditer(text)] == ["quiero morir", "Selbstmord"]
+
+
+def test_no_keywords_matches_nothing():
+    assert KeywordMatcher([]).search("anything at all") is False
+
+
+def test_rejects_keyword_without_words():
+    with pytest.raises(ValueError):
+        KeywordMatcher(["..."])
+
+
+def test_offsets_survive_case_folding_that_changes_length():
+    matcher = KeywordMatcher(["want to die"])
+    text = "STRASSE Straße I want to die😢"
+    [match] = matcher.find_all(text)
+    assert text[match.start:match.end] == "want to die"
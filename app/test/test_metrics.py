@@ -0,0 +1,138 @@
+"""
+Tests for the metrics registry, its Prometheus rendering, and /metrics.
+"""
+import json
+import os
+
+import pytest
+
+from app import db as app_db, instrumentation, metrics
+
+
+def _registry():
+    registry = metrics.Registry()
+    requests = registry.counter("requests_total", "Requests", labelnames=("route",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), labelnames=("route",))
+    in_flight = registry.gauge("in_flight", "In flight")
+    return registry, requests, latency, in_flight
+
+
+def test_render_prometheus_text():
+    registry, requests, latency, in_flight = _registry()
+    requests.labels("/posts/{post_id}").inc(2)
+    requests.labels('say "hi"\\').inc()
+    for value in (0.05, 0.5, 5.0):
+        latency.labels("/boards/").observe(value)
+    in_flight.set(3)
+
+    text = metrics.render(registry.dump())
+
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/posts/{post_id}"} 2' in text
+    assert 'requests_total{route="say \\"hi\\"\\\\"} 1' in text
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{route="/boards/",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/boards/",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/boards/",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{route="/boards/"} 5.55' in text
+    assert 'latency_seconds_count{route="/boards/"} 3' in text
+    assert "in_flight 3" in text
+
+
+def test_labels_must_match_labelnames():
+    registry, requests, _, _ = _registry()
+    with pytest.raises(ValueError):
+        requests.labels("a", "b")
+    assert requests.labels("a") is requests.labels("a")
+
+
+def test_merge_sums_samples():
+    first, requests, latency, in_flight = _registry()
+    requests.labels("/a").inc(2)
+    latency.labels("/a").observe(0.05)
+    in_flight.set(1)
+    second, requests, latency, in_flight = _registry()
+    requests.labels("/a").inc(3)
+    requests.labels("/b").inc()
+    latency.labels("/a").observe(0.5)
+    in_flight.set(2)
+
+    text = metrics.render(metrics.merge([first.dump(), second.dump()]))
+
+    assert 'requests_total{route="/a"} 5' in text
+    assert 'requests_total{route="/b"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert "in_flight 3" in text
+
+
+def test_exporter_sums_processes_and_drops_gauges_of_exited_ones(tmp_path, monkeypatch):
+    registry, requests, _, in_flight = _registry()
+    requests.labels("/a").inc()
+    in_flight.set(1)
+    other, other_requests, _, other_in_flight = _registry()
+    other_requests.labels("/a").inc(4)
+    other_in_flight.set(5)
+    (tmp_path / "metrics-111.json").write_text(json.dumps(other.dump()))
+    (tmp_path / "metrics-222.json").write_text(json.dumps(other.dump()))
+    monkeypatch.setattr(metrics, "process_alive", lambda pid: pid in (111, os.getpid()))
+
+    exporter = metrics.MultiprocessExporter(registry, str(tmp_path), sync_seconds=60)
+    exporter.start()
+    try:
+        text = metrics.render(exporter.collect())
+    finally:
+        exporter.stop()
+
+    # Counters of the exited process 222 still count; its gauge doesn't
+    assert 'requests_total{route="/a"} 9' in text
+    assert "in_flight 6" in text
+    assert json.loads(open(exporter.path).read())["in_flight"]["samples"] == [[[], 1]]
+
+
+def test_totals_never_go_back_when_scrapes_alternate_workers(tmp_path, monkeypatch):
+    workers = []
+    for pid in (301, 302):
+        registry, requests, _, _ = _registry()
+        workers.append((pid, requests, metrics.MultiprocessExporter(registry, str(tmp_path), sync_seconds=60)))
+    monkeypatch.setattr(metrics, "process_alive", lambda pid: True)
+
+    def scrape(worker):
+        pid, _, exporter = worker
+        monkeypatch.setattr(metrics.os, "getpid", lambda: pid)
+        return metrics.render(exporter.collect())
+
+    workers[0][1].labels("/a").inc(10)
+    assert 'requests_total{route="/a"} 10' in scrape(workers[0])
+    assert 'requests_total{route="/a"} 10' in scrape(workers[1])
+    workers[1][1].labels("/a").inc(2)
+    assert 'requests_total{route="/a"} 12' in scrape(workers[1])
+    assert 'requests_total{route="/a"} 12' in scrape(workers[0])
+
+
+def test_metrics_endpoint_reports_routes_and_statements(client, auth_headers):
+    client.get("/boards/", headers=auth_headers)
+    route_requests = instrumentation.requests_total.labels("GET", "/boards/", "200")
+    route_statements = app_db.statements_total.labels("/boards/")
+    before = route_requests.value, route_statements.value
+
+    response = client.get("/boards/", headers=auth_headers)
+
+    assert route_requests.value == before[0] + 1
+    assert route_statements.value == before[1] + int(response.headers["X-SQL-Statements"])
+    scrape = client.get("/metrics")
+    assert scrape.status_code == 200
+    assert scrape.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/boards/",status="200"}' in scrape.text
+    assert 'db_statement_duration_seconds_count{route="/boards/"}' in scrape.text
+    assert "http_requests_in_flight 1" in scrape.text
+    assert "db_pool_checkouts_total" in scrape.text
+    assert "db_commit_duration_seconds_count" in scrape.text
+
+
+def test_unmatched_paths_share_a_label(client):
+    unmatched = instrumentation.requests_total.labels("GET", instrumentation.UNMATCHED_ROUTE, "404")
+    before = unmatched.value
+
+    client.get("/no-such-page/12345")
+
+    assert unmatched.value == before + 1
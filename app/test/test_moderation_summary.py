@@ -0,0 +1,143 @@
+"""
+Tests for the moderation dashboard summary counters.
+"""
+import pytest
+
+from app import models, schemas
+from app.services import crisis_service, moderation_service, summary_service
+from app.test.conftest import TestSessionLocal
+from app.test.test_helpers import create_report
+
+CRISIS = models.ReportReason.CRISIS
+
+
+@pytest.fixture()
+def posts(db, test_user):
+    posts = [models.Post(author_id=test_user.id, group_id=1, content=f"post {i}", created_at=1.0) for i in range(3)]
+    db.add_all(posts)
+    db.commit()
+    return posts
+
+
+def _summary(client, headers):
+    response = client.get("/moderation/summary", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _act(client, headers, report_id, action):
+    response = client.post("/moderation/determine-action", json={"report_id": report_id, "action": action},
+                           headers=headers)
+    assert response.status_code == 200, response.text
+
+
+def test_new_reports_are_counted(client, db, mod_auth_headers, test_user, posts, reporters):
+    create_report(db, reporters[0], posts[0])
+    create_report(db, reporters[1], posts[0], CRISIS)
+    crisis_service.escalate_crisis(db, schemas.CrisisEscalationInput(post_id=posts[1].id), test_user)
+
+    assert _summary(client, mod_auth_headers) == {
+        "open": 3, "crisis_open": 2, "resolved_today": 0, "dismissed_today": 0,
+    }
+
+
+def test_actions_move_reports_to_today(client, db, mod_auth_headers, posts, reporters):
+    spam = create_report(db, reporters[0], posts[0])
+    crisis = create_report(db, reporters[1], posts[1], CRISIS)
+    create_report(db, reporters[2], posts[2])
+
+    _act(client, mod_auth_headers, spam, "warn")
+    _act(client, mod_auth_headers, crisis, "dismiss")
+    # Acting on a closed report again must not count it twice
+    _act(client, mod_auth_headers, spam, "warn")
+
+    assert _summary(client, mod_auth_headers) == {
+        "open": 1, "crisis_open": 0, "resolved_today": 1, "dismissed_today": 1,
+    }
+    db.expire_all()
+    assert db.get(models.Report, spam).resolved_at is not None
+
+
+def test_report_closed_meanwhile_is_counted_once(client, db, mod_auth_headers, test_moderator, posts, reporters):
+    report_id = create_report(db, reporters[0], posts[0])
+    # This session still sees the report open while another moderator dismisses it
+    assert db.get(models.Report, report_id).status == models.ReportStatus.OPEN
+    other = TestSessionLocal()
+    try:
+        moderation_service.determine_action(
+            other, test_moderator, schemas.DetermineActionInput(report_id=report_id, action="dismiss"))
+    finally:
+        other.close()
+
+    report = moderation_service.determine_action(
+        db, test_moderator, schemas.DetermineActionInput(report_id=report_id, action="warn"))
+
+    assert report.status == models.ReportStatus.DISMISSED
+    assert _summary(client, mod_auth_headers) == {
+        "open": 0, "crisis_open": 0, "resolved_today": 0, "dismissed_today": 1,
+    }
+    audited = db.query(models.AuditLogEntry).filter(
+        models.AuditLogEntry.target_type == "Report", models.AuditLogEntry.target_id == report_id).all()
+    assert [entry.action_type for entry in audited] == ["moderation_dismiss"]
+
+
+def test_bulk_and_cluster_actions_are_counted(client, db, mod_auth_headers, posts, reporters):
+    for reporter in reporters:
+        create_report(db, reporter, posts[0])
+    ids = [create_report(db, reporter, posts[1]) for reporter in reporters[:2]]
+
+    response = client.post("/moderation/bulk-action", json={"action": "dismiss", "report_ids": ids},
+                           headers=mod_auth_headers)
+    assert response.status_code == 200
+    cluster = db.query(models.ReportCluster).filter(models.ReportCluster.post_id == posts[0].id).one()
+    response = client.post(f"/moderation/clusters/{cluster.id}/action", json={"action": "warn"},
+                           headers=mod_auth_headers)
+    assert response.status_code == 200
+
+    assert _summary(client, mod_auth_headers) == {
+        "open": 0, "crisis_open": 0, "resolved_today": 3, "dismissed_today": 2,
+    }
+
+
+def test_delete_post_with_report_resolves_it(client, db, mod_auth_headers, posts, reporters):
+    report_id = create_report(db, reporters[0], posts[0])
+
+    response = client.post(f"/moderation/delete-post/{posts[0].id}?reason=spam&report_id={report_id}",
+                           headers=mod_auth_headers)
+    assert response.status_code == 200
+
+    assert _summary(client, mod_auth_headers)["resolved_today"] == 1
+
+
+def test_reconcile_agrees_with_maintained_counters(client, db, mod_auth_headers, posts, reporters):
+    spam = create_report(db, reporters[0], posts[0])
+    create_report(db, reporters[1], posts[1], CRISIS)
+    _act(client, mod_auth_headers, spam, "dismiss")
+
+    assert summary_service.reconcile(db) == []
+
+
+def test_reconcile_corrects_drift(db, posts, reporters):
+    db.add(models.Report(reporting_user_id=reporters[0].id, post_id=posts[0].id, reason=CRISIS, is_crisis=True,
+                         created_at=1.0))
+    db.commit()
+
+    drifted = summary_service.reconcile(db)
+
+    assert drifted == [("crisis_open", "", 0, 1), ("open", "", 0, 1)]
+    assert summary_service.summary(db)["crisis_open"] == 1
+    assert summary_service.reconcile(db) == []
+
+
+def test_summary_is_one_statement(client, db, mod_auth_headers, posts, reporters):
+    # Caches the moderator's principal; count later requests
+    _summary(client, mod_auth_headers)
+    for reporter in reporters:
+        create_report(db, reporter, posts[0])
+
+    response = client.get("/moderation/summary", headers=mod_auth_headers)
+    assert response.headers["X-SQL-Statements"] == "1"
+
+
+def test_requires_moderator(client, auth_headers):
+    assert client.get("/moderation/summary", headers=auth_headers).status_code == 403
@@ -0,0 +1,105 @@
+"""
+Tests for cursor pagination helpers and the paged post feed.
+"""
+import pytest
+from fastapi import HTTPException
+
+from app import models
+from app.pagination import clamp_page_size, decode_cursor, encode_cursor
+from app.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+def _seed_posts(db, author, count, group_id=1, created_at=1000.0):
+    posts = []
+    for i in range(count):
+        post = models.Post(
+            author_id=author.id,
+            group_id=group_id,
+            content=f"post {i}",
+            created_at=created_at + i,
+        )
+        db.add(post)
+        posts.append(post)
+    db.commit()
+    return posts
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(1700000000.123456, 42)
+    assert decode_cursor(cursor, float, int) == (1700000000.123456, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(1.0), encode_cursor("x", 1)])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, float, int)
+    assert exc.value.status_code == 400
+
+
+def test_clamp_page_size():
+    assert clamp_page_size(None) == DEFAULT_PAGE_SIZE
+    assert clamp_page_size(0) == 1
+    assert clamp_page_size(MAX_PAGE_SIZE * 10) == MAX_PAGE_SIZE
+
+
+def test_feed_without_limit_returns_full_list(client, db, auth_headers, test_user):
+    _seed_posts(db, test_user, 3)
+
+    response = client.get("/posts/?group_id=1", headers=auth_headers)
+    assert response.status_code == 200
+    assert [p["content"] for p in response.json()] == ["post 2", "post 1", "post 0"]
+
+
+def test_feed_pages_walk_every_post_once(client, db, auth_headers, test_user):
+    _seed_posts(db, test_user, 7)
+    _seed_posts(db, test_user, 2, group_id=2)
+
+    seen = []
+    cursor = None
+    while True:
+        url = "/posts/?group_id=1&limit=3"
+        if cursor:
+            url += f"&cursor={cursor}"
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 3
+        seen.extend(p["content"] for p in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [f"post {i}" for i in reversed(range(7))]
+
+
+def test_feed_paging_breaks_created_at_ties_by_id(client, db, auth_headers, test_user):
+    for i in range(4):
+        db.add(models.Post(author_id=test_user.id, group_id=1, content=f"tie {i}", created_at=5.0))
+    db.commit()
+
+    first = client.get("/posts/?group_id=1&limit=2", headers=auth_headers).json()
+    second = client.get(f"/posts/?group_id=1&limit=2&cursor={first['next_cursor']}", headers=auth_headers).json()
+
+    ids = [p["id"] for p in first["items"] + second["items"]]
+    assert ids == sorted(ids, reverse=True)
+    assert len(set(ids)) == 4
+    assert second["next_cursor"] is None
+
+
+def test_feed_paging_skips_deleted_posts(client, db, auth_headers, test_user):
+    posts = _seed_posts(db, test_user, 3)
+    posts[1].status = models.PostStatus.DELETED
+    db.commit()
+
+    page = client.get("/posts/?group_id=1&limit=10", headers=auth_headers).json()
+    assert [p["content"] for p in page["items"]] == ["post 2", "post 0"]
+
+
+def test_feed_invalid_cursor_returns_400(client, auth_headers):
+    response = client.get("/posts/?cursor=garbage", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_feed_limit_above_cap_rejected(client, auth_headers):
+    response = client.get(f"/posts/?limit={MAX_PAGE_SIZE + 1}", headers=auth_headers)
+    assert response.status_code == 422
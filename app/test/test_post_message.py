@@ -20,6 +20,20 @@ def test_create_valid_post(client, auth_headers, db):
     data = response.json()
     assert data["content"] == "Hello everyone!"
     assert data["status"] == "active"
+    assert data["crisis_detected"] is False
+
+
+@pytest.mark.parametrize("content, detected", [
+    ("I want to die", True),
+    ("thinking about suicides", False),
+    ("feeling downcast", False),
+])
+def test_post_reports_crisis_detection(client, auth_headers, content, detected):
+    """The server's whole-word match decides whether the client says moderators were alerted."""
+    response = client.post("/posts/", json={"group_id": 1, "content": content, "posttime": 1.0},
+                           headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["crisis_detected"] is detected
 
 
 def test_empty_content_post(client, auth_headers):
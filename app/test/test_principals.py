@@ -0,0 +1,107 @@
+"""
+Tests for the authenticated-principal cache.
+"""
+from app import models, principals
+from app.principals import Principal, PrincipalCache, principal_cache
+
+
+def _principal(user_id, role=models.UserRole.USER):
+    return Principal(id=user_id, role=role, is_active=True, is_banned=False, display_name=f"User {user_id}")
+
+
+def _statements(response):
+    return int(response.headers["X-SQL-Statements"])
+
+
+def _post(client, headers):
+    return client.post("/posts/", json={"group_id": 1, "content": "hello", "posttime": 1.0}, headers=headers)
+
+
+def _report_against(db, user, reporter):
+    report = models.Report(reporting_user_id=reporter.id, reported_user_id=user.id,
+                           reason=models.ReportReason.SPAM, created_at=1.0)
+    db.add(report)
+    db.commit()
+    return report.id
+
+
+def test_cache_evicts_least_recently_used():
+    cache = PrincipalCache(max_entries=2, ttl_seconds=60)
+    cache.put(_principal(1))
+    cache.put(_principal(2))
+    cache.get(1)
+    cache.put(_principal(3))
+
+    assert cache.get(1) is not None
+    assert cache.get(2) is None
+    assert cache.get(3) is not None
+
+
+def test_cache_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(principals.time, "monotonic", lambda: now[0])
+    cache = PrincipalCache(max_entries=10, ttl_seconds=60)
+    cache.put(_principal(1))
+
+    now[0] += 59
+    assert cache.get(1) is not None
+    now[0] += 2
+    assert cache.get(1) is None
+
+
+def test_put_after_invalidation_is_dropped():
+    cache = PrincipalCache(max_entries=10, ttl_seconds=60)
+    generation = cache.generation
+    cache.invalidate(1)  # e.g. a ban committed while the lookup was reading the old row
+
+    cache.put(_principal(1), generation)
+    assert cache.get(1) is None
+
+
+def test_repeat_requests_skip_user_lookup(client, auth_headers):
+    first = client.get("/boards/stats", headers=auth_headers)
+    second = client.get("/boards/stats", headers=auth_headers)
+
+    assert _statements(first) == _statements(second) + 1
+
+
+def test_account_update_refreshes_principal(client, auth_headers, test_user):
+    client.get("/boards/stats", headers=auth_headers)
+    assert principal_cache.get(test_user.id).display_name == "Test User"
+
+    client.patch("/accounts/me/", json={"display_name": "Renamed"}, headers=auth_headers)
+    client.get("/boards/stats", headers=auth_headers)
+
+    assert principal_cache.get(test_user.id).display_name == "Renamed"
+
+
+def test_ban_takes_effect_immediately(client, db, auth_headers, mod_auth_headers, test_user, test_moderator):
+    assert _post(client, auth_headers).status_code == 200
+    report_id = _report_against(db, test_user, test_moderator)
+
+    response = client.post("/moderation/determine-action", json={"report_id": report_id, "action": "ban"},
+                           headers=mod_auth_headers)
+    assert response.status_code == 200
+
+    assert _post(client, auth_headers).status_code == 403
+
+
+def test_moderator_account_deletion_takes_effect_immediately(client, db, auth_headers, mod_auth_headers, test_user,
+                                                            test_moderator):
+    assert client.get("/boards/stats", headers=auth_headers).status_code == 200
+    report_id = _report_against(db, test_user, test_moderator)
+
+    response = client.post("/moderation/determine-action", json={"report_id": report_id, "action": "delete_account"},
+                           headers=mod_auth_headers)
+    assert response.status_code == 200
+
+    assert client.get("/boards/stats", headers=auth_headers).status_code == 403
+
+
+def test_own_account_deletion_takes_effect_immediately(client, auth_headers):
+    assert client.get("/boards/stats", headers=auth_headers).status_code == 200
+
+    response = client.request("DELETE", "/accounts/me/", json={"reason": "leaving"}, headers=auth_headers)
+    assert response.status_code == 200
+
+    assert client.get("/boards/stats", headers=auth_headers).status_code == 403
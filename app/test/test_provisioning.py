@@ -0,0 +1,180 @@
+"""
+Tests for bulk user provisioning.
+"""
+import csv
+import json
+
+import pytest
+
+from app import models
+from app.db import count_statements
+from app.services import auth_service, provisioning_service
+
+
+def _fake_hash(passwords):
+    return [f"hashed:{password}" for password in passwords]
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="") as target:
+        writer = csv.DictWriter(target, fieldnames=["email", "password", "display_name", "role"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def _patients(count, start=0):
+    return [
+        {"email": f"patient{i}@example.com", "password": f"secret{i}", "display_name": f"Patient {i}", "role": ""}
+        for i in range(start, start + count)
+    ]
+
+
+def _emails(db):
+    db.expire_all()
+    return sorted(email for (email,) in db.query(models.User.email).filter(models.User.email.like("patient%")))
+
+
+def test_csv_users_are_created_in_batches(db, tmp_path):
+    path = _write_csv(tmp_path / "cohort.csv", _patients(5))
+
+    run = provisioning_service.provision_file(db, path, batch_size=2, hash_many=_fake_hash)
+
+    assert (run.created, run.skipped, run.rejected, run.records_committed) == (5, 0, 0, 5)
+    assert run.finished_at is not None
+    user = db.query(models.User).filter(models.User.email == "patient3@example.com").one()
+    assert (user.hashed_password, user.display_name) == ("hashed:secret3", "Patient 3")
+    assert user.role == models.UserRole.USER
+    assert user.is_anonymous is False and user.is_active is True
+
+
+def test_each_batch_is_one_lookup_and_one_insert(db, tmp_path):
+    path = _write_csv(tmp_path / "cohort.csv", _patients(50))
+    run = provisioning_service.start_run(db, path)
+    records = list(provisioning_service.read_records(path))
+    db.refresh(run)
+
+    with count_statements() as counter:
+        provisioning_service.provision_batch(db, run, records, _fake_hash)
+
+    # The email lookup, the INSERT, and the checkpoint UPDATE
+    assert counter.count == 3
+    assert len(_emails(db)) == 50
+
+
+def test_existing_and_repeated_emails_are_skipped(db, tmp_path, test_user):
+    rows = _patients(3) + _patients(1) + [
+        {"email": test_user.email, "password": "secret", "display_name": "Again", "role": ""}]
+    path = _write_csv(tmp_path / "cohort.csv", rows)
+
+    run = provisioning_service.provision_file(db, path, batch_size=10, hash_many=_fake_hash)
+
+    assert (run.created, run.skipped) == (3, 2)
+    assert db.query(models.User).filter(models.User.email == test_user.email).count() == 1
+
+
+def test_invalid_records_are_rejected(db, tmp_path):
+    path = tmp_path / "cohort.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"email": "patient0@example.com", "password": "secret0", "displayname": "Zero"}),
+        json.dumps({"email": "patient1@example.com", "password": "short", "display_name": "One"}),
+        "not json",
+        json.dumps({"email": "patient2@example.com", "password": "secret2", "display_name": "Two", "role": "admin"}),
+        json.dumps({"email": "patient3@example.com", "password": "secret3", "display_name": "Three", "role": "owner"}),
+        "",
+    ]))
+    results = []
+
+    run = provisioning_service.provision_file(db, str(path), batch_size=10, hash_many=_fake_hash,
+                                              on_batch=lambda run, result: results.append(result))
+
+    assert (run.created, run.rejected) == (2, 3)
+    assert [number for number, _ in results[0].rejected] == [2, 3, 5]
+    assert "password" in results[0].rejected[0][1]
+    assert db.query(models.User.role).filter(models.User.email == "patient2@example.com").scalar() == \
+        models.UserRole.ADMIN
+
+
+def test_malformed_records_are_rejected_not_fatal(db, tmp_path):
+    path = tmp_path / "cohort.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"email": "patient0@example.com", "password": "secret0", "display_name": "Zero", "role": 1}),
+        json.dumps({"email": "patient1@example.com", "password": "secret1", "display_name": "One"}),
+    ]))
+    csv_path = tmp_path / "cohort.csv"
+    # A spreadsheet export: byte order mark, and a row with a stray extra cell
+    csv_path.write_text("\ufeffemail,password,display_name\n"
+                        "patient2@example.com,secret2,Two,extra\n"
+                        "patient3@example.com,secret3,Three\n", encoding="utf-8")
+    results = []
+
+    for source in (path, csv_path):
+        provisioning_service.provision_file(db, str(source), batch_size=10, hash_many=_fake_hash,
+                                            on_batch=lambda run, result: results.append(result))
+
+    assert [result.rejected for result in results] == [
+        [(1, "role: must be a string")], [(1, "more fields than the header has columns")]]
+    assert _emails(db) == ["patient1@example.com", "patient3@example.com"]
+
+
+def test_email_registered_during_the_batch_is_rejected(db, tmp_path):
+    path = _write_csv(tmp_path / "cohort.csv", _patients(3))
+
+    def hash_while_someone_registers(passwords):
+        db.add(models.User(email="patient1@example.com", hashed_password="x", display_name="Early",
+                           is_anonymous=False, role=models.UserRole.USER))
+        db.commit()
+        return _fake_hash(passwords)
+
+    results = []
+    run = provisioning_service.provision_file(db, path, batch_size=10, hash_many=hash_while_someone_registers,
+                                              on_batch=lambda run, result: results.append(result))
+
+    assert (run.created, run.skipped, run.rejected, run.records_committed) == (2, 0, 1, 3)
+    assert results[0].rejected == [(2, "email was registered while the batch ran")]
+    assert len(_emails(db)) == 3
+
+
+def test_rerun_resumes_after_the_last_committed_batch(db, tmp_path):
+    path = _write_csv(tmp_path / "cohort.csv", _patients(7))
+    hashed = []
+
+    def failing_hash(passwords):
+        if len(hashed) >= 4:
+            raise RuntimeError("interrupted")
+        hashed.extend(passwords)
+        return _fake_hash(passwords)
+
+    with pytest.raises(RuntimeError):
+        provisioning_service.provision_file(db, path, batch_size=2, hash_many=failing_hash)
+    db.rollback()
+    assert len(_emails(db)) == 4
+
+    hashed_again = []
+    run = provisioning_service.provision_file(
+        db, path, batch_size=2, hash_many=lambda passwords: hashed_again.extend(passwords) or _fake_hash(passwords))
+
+    assert hashed_again == ["secret4", "secret5", "secret6"]
+    assert (run.created, run.records_committed) == (7, 7)
+    assert len(_emails(db)) == 7
+    assert db.query(models.ProvisioningRun).count() == 1
+
+
+def test_finished_file_is_not_provisioned_again(db, tmp_path):
+    path = _write_csv(tmp_path / "cohort.csv", _patients(2))
+    provisioning_service.provision_file(db, path, batch_size=10, hash_many=_fake_hash)
+
+    def unexpected(passwords):
+        raise AssertionError("hashed again")
+
+    run = provisioning_service.provision_file(db, path, batch_size=10, hash_many=unexpected)
+    assert run.created == 2
+
+
+def test_provisioned_users_can_log_in(client, db, tmp_path):
+    path = _write_csv(tmp_path / "cohort.csv", _patients(1))
+    provisioning_service.provision_file(
+        db, path, batch_size=10, hash_many=lambda passwords: [auth_service.hash_password(p) for p in passwords])
+
+    response = client.post("/accounts/login", json={"email": "patient0@example.com", "password": "secret0"})
+    assert response.status_code == 200, response.text
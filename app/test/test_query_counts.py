@@ -0,0 +1,67 @@
+"""
+Tests that list endpoints run a constant number of SQL statements per page.
+"""
+import pytest
+
+from app import models
+from app.db import count_statements
+from app.services import cluster_service
+
+
+def _seed(db, rows, prefix):
+    """Create `rows` posts by distinct authors, each reported by a distinct user."""
+    for i in range(rows):
+        author = models.User(email=f"{prefix}-author{i}@example.com", display_name=f"Author {i}", is_anonymous=False)
+        reporter = models.User(email=f"{prefix}-reporter{i}@example.com", display_name=f"Reporter {i}", is_anonymous=False)
+        db.add_all([author, reporter])
+        db.flush()
+        post = models.Post(author_id=author.id, group_id=1, content=f"{prefix} {i}", created_at=100.0 + i)
+        db.add(post)
+        db.flush()
+        report = models.Report(
+            reporting_user_id=reporter.id,
+            reported_user_id=author.id,
+            post_id=post.id,
+            reason=models.ReportReason.SPAM,
+            created_at=200.0 + i,
+        )
+        db.add(report)
+        cluster_service.record_report(db, report)
+    db.commit()
+
+
+def _statements(response):
+    assert response.status_code == 200
+    return int(response.headers["X-SQL-Statements"])
+
+
+@pytest.mark.parametrize("path", [
+    "/posts/?group_id=1",
+    "/posts/?group_id=1&limit=50",
+    "/moderation/reports",
+    "/moderation/reports?limit=50",
+    "/moderation/reports?status=open&sort=oldest&group_id=1&reason=spam&limit=50",
+    "/moderation/clusters?sort=largest&limit=50",
+])
+def test_list_endpoints_do_not_scale_queries_with_rows(client, db, mod_auth_headers, path):
+    _seed(db, 2, "small")
+    # The first request caches the moderator's principal; count later ones
+    client.get(path, headers=mod_auth_headers)
+    small = _statements(client.get(path, headers=mod_auth_headers))
+
+    _seed(db, 20, "large")
+    large = _statements(client.get(path, headers=mod_auth_headers))
+
+    assert large == small
+    # Read the board's ETag version, then the page itself
+    assert large <= 2
+
+
+def test_count_statements_counts_within_context(db):
+    with count_statements() as counter:
+        db.query(models.User).all()
+        db.query(models.Post).all()
+    assert counter.count == 2
+
+    db.query(models.User).all()
+    assert counter.count == 2
@@ -0,0 +1,168 @@
+"""
+Query-plan regression tests for the hot read paths.
+
+Each service query is run through SQLite's EXPLAIN QUERY PLAN against a
+seeded database. A plan that falls back to a full table scan or sorts
+through a temporary B-tree means an index is missing or unusable.
+"""
+import re
+
+import pytest
+
+from app import models
+from app.pagination import encode_cursor
+from app.services import account_service, audit_service, cluster_service, messaging_service, moderation_service, report_service
+
+
+FULL_SCAN = re.compile(r"^SCAN \w+$")
+
+
+def explain(db, query):
+    """Return the detail column of EXPLAIN QUERY PLAN for an ORM query."""
+    compiled = query.statement.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").fetchall()
+    return [row[3] for row in rows]
+
+
+def assert_indexed(plan):
+    for step in plan:
+        assert not FULL_SCAN.match(step), f"full table scan: {plan}"
+        assert "TEMP B-TREE" not in step, f"temp b-tree sort: {plan}"
+
+
+@pytest.fixture()
+def seeded_db(db):
+    users = [models.User(email=f"u{i}@example.com", display_name=f"User {i}", is_anonymous=False) for i in range(20)]
+    boards = [models.ConditionBoard(name=f"Board {i}") for i in range(4)]
+    db.add_all(users + boards)
+    db.flush()
+
+    statuses = [models.PostStatus.ACTIVE, models.PostStatus.ACTIVE, models.PostStatus.DELETED]
+    posts = [
+        models.Post(
+            author_id=users[i % len(users)].id,
+            group_id=boards[i % len(boards)].id,
+            content=f"post {i}",
+            status=statuses[i % len(statuses)],
+            created_at=1000.0 + i,
+        )
+        for i in range(600)
+    ]
+    db.add_all(posts)
+    db.flush()
+
+    reasons = list(models.ReportReason)
+    report_statuses = list(models.ReportStatus)
+    db.add_all([
+        models.Report(
+            reporting_user_id=users[i % len(users)].id,
+            reported_user_id=users[(i + 1) % len(users)].id,
+            post_id=posts[i % len(posts)].id,
+            reason=reasons[i % len(reasons)],
+            is_crisis=reasons[i % len(reasons)] == models.ReportReason.CRISIS,
+            status=report_statuses[i % len(report_statuses)],
+            created_at=2000.0 + i,
+        )
+        for i in range(300)
+    ])
+    action_types = ["moderation_dismiss", "moderation_ban", "delete_post", "delete_account"]
+    db.add_all([
+        models.AuditLogEntry(
+            actor_id=users[i % len(users)].id,
+            action_type=action_types[i % len(action_types)],
+            target_type="Report" if i % 2 else "Post",
+            target_id=i % 50,
+            created_at=3000.0 + i,
+        )
+        for i in range(400)
+    ])
+    db.commit()
+    return db
+
+
+@pytest.mark.parametrize("group_id", [None, 2])
+def test_feed_query_uses_index(seeded_db, group_id):
+    query = messaging_service.feed_query(seeded_db, group_id)
+    assert_indexed(explain(seeded_db, query))
+
+
+@pytest.mark.parametrize("group_id", [None, 2])
+def test_feed_page_query_uses_index(seeded_db, group_id):
+    query = messaging_service.feed_page_query(seeded_db, group_id, encode_cursor(1300.0, 300)).limit(21)
+    assert_indexed(explain(seeded_db, query))
+
+
+@pytest.mark.parametrize("status,include_crisis", [
+    (None, True),
+    ("open", True),
+    (None, False),
+    ("open", False),
+])
+def test_report_queue_query_uses_index(seeded_db, status, include_crisis):
+    query = moderation_service.report_queue_query(seeded_db, status, include_crisis)
+    assert_indexed(explain(seeded_db, query))
+
+
+@pytest.mark.parametrize("filters", [
+    {"status": "open", "oldest_first": True},
+    {"reason": models.ReportReason.SPAM},
+    {"status": "open", "group_id": 2, "oldest_first": True},
+    {"created_after": 2100.0, "created_before": 2200.0},
+])
+def test_report_queue_filters_use_index(seeded_db, filters):
+    query = moderation_service.report_queue_query(seeded_db, **filters).limit(51)
+    assert_indexed(explain(seeded_db, query))
+
+
+def test_duplicate_report_check_uses_index(seeded_db):
+    query = report_service.open_report_query(seeded_db, reporter_id=1, post_id=1)
+    plan = explain(seeded_db, query)
+    assert_indexed(plan)
+    assert any("ix_reports_reporter_post_status" in step for step in plan)
+
+
+@pytest.mark.parametrize("sort", ["newest", "oldest", "largest"])
+def test_cluster_queue_query_uses_index(seeded_db, sort):
+    cluster_service.rebuild_clusters(seeded_db)
+    query = cluster_service.cluster_queue_query(seeded_db, sort=sort).limit(51)
+    assert_indexed(explain(seeded_db, query))
+
+
+def test_cluster_members_query_uses_index(seeded_db):
+    cluster_service.rebuild_clusters(seeded_db)
+    cluster = seeded_db.query(models.ReportCluster).first()
+    plan = explain(seeded_db, cluster_service.members_query(seeded_db, cluster))
+    assert_indexed(plan)
+    assert any("ix_reports_post_reason_status" in step for step in plan)
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"created_after": 3100.0, "created_before": 3200.0},
+    {"actor_id": 3},
+    {"actor_id": 3, "created_after": 3100.0},
+    {"action_type": "moderation_ban"},
+    {"action_type": "moderation_ban", "actor_id": 3},
+    {"target_type": "Report"},
+    {"target_type": "Report", "target_id": 7},
+    {"target_type": "Report", "target_id": 7, "created_before": 3300.0},
+])
+def test_audit_query_uses_index(seeded_db, filters):
+    query = audit_service.audit_query(seeded_db, **filters).limit(51)
+    assert_indexed(explain(seeded_db, query))
+
+
+@pytest.mark.parametrize("q", [None, "us"])
+def test_user_directory_uses_partial_index(seeded_db, q):
+    query = account_service.directory_query(seeded_db, q).limit(51)
+    plan = explain(seeded_db, query)
+    assert_indexed(plan)
+    assert any("ix_users_directory" in step for step in plan)
+
+
+def test_explain_detects_full_scan(seeded_db):
+    """Guard against the checker silently passing everything."""
+    query = seeded_db.query(models.Post).filter(models.Post.content == "post 1")
+    with pytest.raises(AssertionError):
+        assert_indexed(explain(seeded_db, query))
+
@@ -0,0 +1,173 @@
+"""
+Tests for grouping reports into per-post clusters.
+"""
+import pytest
+
+from app import models
+from app.services import cluster_service
+from app.test.test_helpers import create_report, create_reporters, walk_pages
+
+SPAM, HARASSMENT, CRISIS = models.ReportReason.SPAM, models.ReportReason.HARASSMENT, models.ReportReason.CRISIS
+
+
+@pytest.fixture()
+def post(db, test_user):
+    post = models.Post(author_id=test_user.id, group_id=1, content="post", created_at=1.0)
+    db.add(post)
+    db.commit()
+    return post
+
+
+def _clusters(client, headers, query=""):
+    response = client.get(f"/moderation/clusters?{query}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _act(client, headers, cluster_id, action, **body):
+    return client.post(f"/moderation/clusters/{cluster_id}/action", json={"action": action, **body}, headers=headers)
+
+
+def test_reports_on_one_post_share_a_cluster(client, db, mod_auth_headers, post):
+    reporters = create_reporters(db, 3)
+    for reporter in reporters:
+        create_report(db, reporter, post)
+
+    [cluster] = _clusters(client, mod_auth_headers)["items"]
+    assert cluster["post_id"] == post.id
+    assert cluster["report_count"] == 3
+    assert cluster["reporters"] == [reporter.id for reporter in reporters]
+    assert cluster["post"]["content"] == "post"
+
+
+def test_reasons_get_separate_clusters(db, post):
+    first, second = create_reporters(db, 2)
+    create_report(db, first, post, SPAM)
+    create_report(db, second, post, HARASSMENT)
+
+    reasons = {cluster.reason for cluster in db.query(models.ReportCluster).all()}
+    assert reasons == {SPAM, HARASSMENT}
+
+
+def test_reporter_list_is_capped(db, post, monkeypatch):
+    monkeypatch.setattr(cluster_service, "REPORT_CLUSTER_MAX_REPORTERS", 2)
+    for reporter in create_reporters(db, 4):
+        create_report(db, reporter, post)
+
+    cluster = db.query(models.ReportCluster).one()
+    assert cluster.report_count == 4
+    assert len(cluster.reporters) == 2
+
+
+def test_action_resolves_every_member(client, db, mod_auth_headers, post):
+    ids = [create_report(db, reporter, post) for reporter in create_reporters(db, 3)]
+    [cluster] = _clusters(client, mod_auth_headers)["items"]
+
+    response = _act(client, mod_auth_headers, cluster["id"], "delete_post", mod_note="spam wave")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["applied"] == 3
+    assert response.json()["cluster"]["status"] == "resolved"
+    db.expire_all()
+    assert {db.get(models.Report, i).status for i in ids} == {models.ReportStatus.RESOLVED}
+    assert db.get(models.Post, post.id).status == models.PostStatus.DELETED
+    audits = db.query(models.AuditLogEntry).filter(models.AuditLogEntry.target_type == "ReportCluster").all()
+    assert [audit.action_type for audit in audits] == ["moderation_cluster_delete_post"]
+    assert _clusters(client, mod_auth_headers)["items"] == []
+
+
+def test_report_after_closing_opens_new_cluster(client, db, mod_auth_headers, post):
+    first, second = create_reporters(db, 2)
+    create_report(db, first, post)
+    [cluster] = _clusters(client, mod_auth_headers)["items"]
+    assert _act(client, mod_auth_headers, cluster["id"], "dismiss").status_code == 200
+
+    create_report(db, second, post)
+
+    [reopened] = _clusters(client, mod_auth_headers)["items"]
+    assert reopened["id"] != cluster["id"]
+    assert reopened["report_count"] == 1
+
+
+def test_handling_last_member_closes_cluster(client, db, mod_auth_headers, post):
+    ids = [create_report(db, reporter, post) for reporter in create_reporters(db, 2)]
+
+    for report_id in ids:
+        response = client.post("/moderation/determine-action", json={"report_id": report_id, "action": "dismiss"},
+                               headers=mod_auth_headers)
+        assert response.status_code == 200
+        open_clusters = len(_clusters(client, mod_auth_headers)["items"])
+        assert open_clusters == (0 if report_id == ids[-1] else 1)
+
+    cluster = db.query(models.ReportCluster).one()
+    assert cluster.status == models.ReportStatus.DISMISSED
+
+
+def test_bulk_action_closes_cluster(client, db, mod_auth_headers, post):
+    for reporter in create_reporters(db, 2):
+        create_report(db, reporter, post)
+
+    response = client.post("/moderation/bulk-action", json={"action": "dismiss", "post_id": post.id},
+                           headers=mod_auth_headers)
+
+    assert response.status_code == 200
+    assert _clusters(client, mod_auth_headers)["items"] == []
+
+
+def test_largest_first_pages(client, db, mod_auth_headers, test_user):
+    posts = [models.Post(author_id=test_user.id, group_id=1, content=f"post {i}", created_at=1.0) for i in range(4)]
+    db.add_all(posts)
+    db.commit()
+    reporters = create_reporters(db, 4)
+    for size, post in zip([1, 3, 2, 4], posts):
+        for reporter in reporters[:size]:
+            create_report(db, reporter, post)
+
+    counts = walk_pages(client, mod_auth_headers, "/moderation/clusters", "sort=largest&limit=3", field="report_count")
+    assert counts == [4, 3, 2, 1]
+
+
+def test_crisis_cluster_limits_actions(client, db, mod_auth_headers, post):
+    create_report(db, create_reporters(db, 1)[0], post, CRISIS)
+    cluster = db.query(models.ReportCluster).one()
+    assert cluster.is_crisis
+
+    assert _act(client, mod_auth_headers, cluster.id, "ban").status_code == 400
+    assert _act(client, mod_auth_headers, cluster.id, "dismiss").status_code == 200
+    assert _act(client, mod_auth_headers, cluster.id, "dismiss").status_code == 400
+
+
+def test_action_statement_count_does_not_grow_with_members(client, db, mod_auth_headers, test_user):
+    posts = [models.Post(author_id=test_user.id, group_id=1, content="post", created_at=1.0) for _ in range(2)]
+    db.add_all(posts)
+    db.commit()
+    reporters = create_reporters(db, 30)
+    for size, post in zip([2, 30], posts):
+        for reporter in reporters[:size]:
+            create_report(db, reporter, post)
+    clusters = db.query(models.ReportCluster).order_by(models.ReportCluster.report_count).all()
+    # Caches the moderator's principal; count later requests
+    _act(client, mod_auth_headers, 9999, "dismiss")
+
+    counts = [int(_act(client, mod_auth_headers, cluster.id, "dismiss").headers["X-SQL-Statements"])
+              for cluster in clusters]
+
+    assert counts[0] == counts[1]
+
+
+def test_rebuild_clusters_from_existing_reports(db, post):
+    reporters = create_reporters(db, 3)
+    db.add_all([
+        models.Report(reporting_user_id=reporter.id, reported_user_id=post.author_id, post_id=post.id,
+                      reason=SPAM, created_at=10.0 + i)
+        for i, reporter in enumerate(reporters)
+    ])
+    db.commit()
+
+    assert cluster_service.rebuild_clusters(db) == 1
+    cluster = db.query(models.ReportCluster).one()
+    assert (cluster.report_count, cluster.first_reported_at, cluster.last_reported_at) == (3, 10.0, 12.0)
+
+
+def test_requires_moderator(client, auth_headers):
+    assert client.get("/moderation/clusters", headers=auth_headers).status_code == 403
@@ -0,0 +1,83 @@
+"""
+Tests for the paged, filterable moderation report queue.
+"""
+from app import models
+from app.test.test_helpers import walk_pages
+
+REPORTS = "/moderation/reports"
+
+
+def _seed_reports(db, reporter, specs):
+    """Create one post and report per (group_id, reason, status, created_at) spec."""
+    reports = []
+    for group_id, reason, status, created_at in specs:
+        post = models.Post(author_id=reporter.id, group_id=group_id, content="post", created_at=created_at)
+        db.add(post)
+        db.flush()
+        report = models.Report(reporting_user_id=reporter.id, reported_user_id=reporter.id, post_id=post.id,
+                               reason=reason, status=status, created_at=created_at)
+        db.add(report)
+        reports.append(report)
+    db.commit()
+    return [report.id for report in reports]
+
+
+def _get(client, headers, query):
+    response = client.get(f"{REPORTS}?{query}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+OPEN, RESOLVED = models.ReportStatus.OPEN, models.ReportStatus.RESOLVED
+SPAM, HARASSMENT = models.ReportReason.SPAM, models.ReportReason.HARASSMENT
+
+
+def test_pages_walk_every_report_once(client, db, mod_auth_headers, test_moderator):
+    ids = _seed_reports(db, test_moderator, [(1, SPAM, OPEN, 100.0 + i) for i in range(7)])
+
+    assert walk_pages(client, mod_auth_headers, REPORTS, "limit=3") == ids[::-1]
+
+
+def test_oldest_open_first(client, db, mod_auth_headers, test_moderator):
+    ids = _seed_reports(db, test_moderator, [
+        (1, SPAM, OPEN, 300.0),
+        (1, SPAM, RESOLVED, 100.0),
+        (1, SPAM, OPEN, 200.0),
+        (1, SPAM, OPEN, 200.0),
+    ])
+
+    assert walk_pages(client, mod_auth_headers, REPORTS, "status=open&sort=oldest&limit=2") == [ids[2], ids[3], ids[0]]
+
+
+def test_filters_by_reason_board_and_date(client, db, mod_auth_headers, test_moderator):
+    ids = _seed_reports(db, test_moderator, [
+        (1, SPAM, OPEN, 100.0),
+        (2, SPAM, OPEN, 200.0),
+        (1, HARASSMENT, OPEN, 300.0),
+        (1, SPAM, OPEN, 400.0),
+    ])
+
+    assert walk_pages(client, mod_auth_headers, REPORTS, "reason=spam&limit=10") == [ids[3], ids[1], ids[0]]
+    assert walk_pages(client, mod_auth_headers, REPORTS, "group_id=1&limit=10") == [ids[3], ids[2], ids[0]]
+    assert walk_pages(client, mod_auth_headers, REPORTS, "created_after=200&created_before=400&limit=10") == \
+        [ids[2], ids[1]]
+
+
+def test_unknown_reason_is_rejected(client, mod_auth_headers):
+    response = client.get("/moderation/reports?reason=nonsense&limit=10", headers=mod_auth_headers)
+    assert response.status_code == 422
+
+
+def test_without_limit_returns_full_list(client, db, mod_auth_headers, test_moderator):
+    ids = _seed_reports(db, test_moderator, [(1, SPAM, OPEN, 100.0 + i) for i in range(3)])
+
+    response = client.get("/moderation/reports", headers=mod_auth_headers)
+    assert [report["id"] for report in response.json()] == ids[::-1]
+
+
+def test_page_embeds_users_and_post(client, db, mod_auth_headers, test_moderator):
+    _seed_reports(db, test_moderator, [(1, SPAM, OPEN, 100.0)])
+
+    [report] = _get(client, mod_auth_headers, "limit=10")["items"]
+    assert report["reporting_user"]["display_name"] == "Test Moderator"
+    assert report["post"]["content"] == "post"
@@ -0,0 +1,144 @@
+"""
+Tests for access token revocation.
+"""
+from datetime import datetime
+
+from jose import jwt
+
+from app import models, revocation
+from app.config import settings
+from app.revocation import BloomFilter, RevocationList, revocation_list
+
+
+def _login(client):
+    response = client.post("/accounts/login", json={"email": "testuser@example.com", "password": "testpassword"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _jti(headers):
+    token = headers["Authorization"].split()[1]
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])["jti"]
+
+
+def _ban(client, db, user, moderator, mod_headers):
+    report = models.Report(reporting_user_id=moderator.id, reported_user_id=user.id,
+                           reason=models.ReportReason.SPAM, created_at=1.0)
+    db.add(report)
+    db.commit()
+    response = client.post("/moderation/determine-action", json={"report_id": report.id, "action": "ban"},
+                           headers=mod_headers)
+    assert response.status_code == 200, response.text
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"jti-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_login_records_token_id(client, db, test_user):
+    headers = _login(client)
+
+    issued = db.query(models.IssuedToken).one()
+    assert issued.jti == _jti(headers)
+    assert issued.user_id == test_user.id
+
+
+def test_unrevoked_token_skips_confirmation(client, test_user):
+    headers = _login(client)
+    hits = revocation.filter_hits.value
+
+    assert client.get("/boards/stats", headers=headers).status_code == 200
+    assert revocation.filter_hits.value == hits
+
+
+def test_ban_revokes_existing_tokens(client, db, test_user, test_moderator, mod_auth_headers):
+    headers = _login(client)
+    assert client.get("/boards/stats", headers=headers).status_code == 200
+
+    _ban(client, db, test_user, test_moderator, mod_auth_headers)
+
+    assert client.get("/boards/stats", headers=headers).status_code == 401
+    revoked = db.query(models.RevokedToken).one()
+    assert revoked.jti == _jti(headers)
+    assert db.query(models.IssuedToken).count() == 0
+
+
+def test_deleting_account_revokes_existing_tokens(client, test_user):
+    headers = _login(client)
+
+    response = client.request("DELETE", "/accounts/me/", json={"reason": "leaving"}, headers=headers)
+    assert response.status_code == 200
+
+    assert client.get("/boards/stats", headers=headers).status_code == 401
+
+
+def test_revocations_survive_restart(client, db, test_user, test_moderator, mod_auth_headers):
+    headers = _login(client)
+    _ban(client, db, test_user, test_moderator, mod_auth_headers)
+
+    revocation_list.clear()
+    revocation_list.load(db)
+
+    assert client.get("/boards/stats", headers=headers).status_code == 401
+
+
+def test_load_drops_expired_rows(db, test_user):
+    now = datetime.now().timestamp()
+    db.add_all([
+        models.RevokedToken(jti="old", user_id=test_user.id, expires_at=now - 1, revoked_at=now - 10),
+        models.RevokedToken(jti="live", user_id=test_user.id, expires_at=now + 60, revoked_at=now - 10),
+        models.IssuedToken(jti="stale", user_id=test_user.id, expires_at=now - 1),
+    ])
+    db.commit()
+
+    revocation_list.load(db)
+
+    assert [row.jti for row in db.query(models.RevokedToken).all()] == ["live"]
+    assert db.query(models.IssuedToken).count() == 0
+    assert revocation_list.is_revoked(db, "live")
+
+
+def test_sync_picks_up_revocations_from_other_processes(db, test_user):
+    revocations = RevocationList(capacity=100, error_rate=0.01, sync_seconds=0)
+    now = datetime.now().timestamp()
+    assert not revocations.is_revoked(db, "elsewhere")
+
+    db.add(models.RevokedToken(jti="elsewhere", user_id=test_user.id, expires_at=now + 60, revoked_at=now))
+    db.commit()
+
+    assert revocations.is_revoked(db, "elsewhere")
+
+
+def test_filter_hit_is_confirmed_against_table(db):
+    revocations = RevocationList(capacity=100, error_rate=0.01, sync_seconds=60)
+    revocations.add(["never-committed"])
+    false_positives = revocation.false_positives.value
+
+    assert not revocations.is_revoked(db, "never-committed")
+    assert revocation.false_positives.value == false_positives + 1
+
+
+def test_sync_prunes_expired_rows_when_due(db, test_user):
+    revocations = RevocationList(capacity=100, error_rate=0.01, sync_seconds=0, prune_seconds=0)
+    now = datetime.now().timestamp()
+    db.add_all([
+        models.RevokedToken(jti="old", user_id=test_user.id, expires_at=now - 1, revoked_at=now - 10),
+        models.RevokedToken(jti="live", user_id=test_user.id, expires_at=now + 60, revoked_at=now - 10),
+        models.IssuedToken(jti="stale", user_id=test_user.id, expires_at=now - 1),
+        models.IssuedToken(jti="fresh", user_id=test_user.id, expires_at=now + 60),
+    ])
+    db.commit()
+    pruned = revocation.tokens_pruned.value
+
+    assert revocations.is_revoked(db, "live")
+
+    assert [row.jti for row in db.query(models.RevokedToken).all()] == ["live"]
+    assert [row.jti for row in db.query(models.IssuedToken).all()] == ["fresh"]
+    assert revocation.tokens_pruned.value == pruned + 2
@@ -3,6 +3,7 @@
 
 from types import SimpleNamespace
 import pytest
+from fastapi import Response
 
 from app.routers import accounts, boards, moderation, posts
 from app import models
@@ -19,13 +20,13 @@ def test_register_creates_token(monkeypatch):
         assert db is fake_db
         return fake_user
 
-    def fake_create_access_token(data):
-        # We assert the ID made it into the token payload
-        assert data == {"sub": str(fake_user.id)}
-        return "fake-token"
+    def fake_issue_session_token(db, user):
+        assert db is fake_db
+        assert user is fake_user
+        return {"access_token": "fake-token", "token_type": "bearer"}
 
     monkeypatch.setattr(accounts.account_service, "register_user", fake_register_user)
-    monkeypatch.setattr(accounts.account_service, "create_access_token", fake_create_access_token)
+    monkeypatch.setattr(accounts.token_service, "issue_session_token", fake_issue_session_token)
 
     # We can pass any object as user_data; the router just forwards it
     result = accounts.register(user_data=SimpleNamespace(), db=fake_db)
@@ -44,12 +45,13 @@ def test_login_returns_token(monkeypatch):
         assert password == "secret"
         return fake_user
 
-    def fake_create_access_token(data):
-        assert data == {"sub": str(fake_user.id)}
-        return "login-token"
+    def fake_issue_session_token(db, user):
+        assert db is fake_db
+        assert user is fake_user
+        return {"access_token": "login-token", "token_type": "bearer"}
 
     monkeypatch.setattr(accounts.account_service, "authenticate_user", fake_authenticate_user)
-    monkeypatch.setattr(accounts.account_service, "create_access_token", fake_create_access_token)
+    monkeypatch.setattr(accounts.token_service, "issue_session_token", fake_issue_session_token)
 
     credentials = SimpleNamespace(email="user@example.com", password="secret")
     result = accounts.login(credentials=credentials, db=fake_db)
@@ -63,12 +65,23 @@ def test_logout_returns_message():
     assert result == {"message": "Successfully logged out"}
 
 
-def test_get_all_users_uses_db_query():
-    fake_users = [SimpleNamespace(id=1), SimpleNamespace(id=2)]
-    fake_db = FakeDB(result_list=fake_users)
+def test_get_all_users_returns_directory_page(monkeypatch):
+    fake_users = [
+        SimpleNamespace(id=1, display_name="Alex", is_anonymous=False, role=models.UserRole.USER),
+        SimpleNamespace(id=2, display_name="Alice", is_anonymous=False, role=models.UserRole.USER),
+    ]
+    calls = []
 
-    result = accounts.get_all_users(db=fake_db)
-    assert result == fake_users
+    def fake_directory_page(db, q, limit, cursor):
+        calls.append((q, limit, cursor))
+        return fake_users, "next"
+
+    monkeypatch.setattr(accounts.account_service, "directory_page", fake_directory_page)
+
+    result = accounts.get_all_users(q="al", limit=2, cursor=None, db=FakeDB())
+    assert [user.id for user in result.items] == [1, 2]
+    assert result.next_cursor == "next"
+    assert calls == [("al", 2, None)]
 
 
 def test_get_current_user_info_returns_user():
@@ -109,9 +122,32 @@ def test_get_boards_calls_service(monkeypatch):
         return fake_boards
 
     monkeypatch.setattr(boards.board_service, "list_boards", fake_list_boards)
+    monkeypatch.setattr(boards.board_service, "boards_version", lambda db: (2, 1.0))
 
-    result = boards.get_boards(db=fake_db, current_user=current_user)
+    response = Response()
+    result = boards.get_boards(response=response, if_none_match=None, db=fake_db, current_user=current_user)
     assert result == fake_boards
+    assert response.headers["ETag"]
+
+
+def test_get_boards_not_modified(monkeypatch):
+    fake_db = FakeDB()
+    current_user = SimpleNamespace(id=1)
+    monkeypatch.setattr(boards.board_service, "boards_version", lambda db: (2, 1.0))
+    monkeypatch.setattr(boards.board_service, "list_boards", lambda db: [])
+
+    first = Response()
+    boards.get_boards(response=first, if_none_match=None, db=fake_db, current_user=current_user)
+
+    def fail_list_boards(db):
+        raise AssertionError("board list should not be loaded")
+
+    monkeypatch.setattr(boards.board_service, "list_boards", fail_list_boards)
+
+    result = boards.get_boards(
+        response=Response(), if_none_match=first.headers["ETag"], db=fake_db, current_user=current_user
+    )
+    assert result.status_code == 304
 
 
 def test_create_board_as_moderator(monkeypatch):
@@ -143,6 +179,10 @@ def test_create_board_forbidden_for_regular_user():
 
 # ---------- moderation.py tests ----------
 
+# Called directly, the endpoint would see Query() objects for the params left out
+REPORT_QUERY_DEFAULTS = dict(include_crisis=True, reason=None, group_id=None, created_after=None,
+                             created_before=None, sort="newest", limit=None, cursor=None)
+
 def test_get_reports_without_status(monkeypatch):
     fake_reports = [SimpleNamespace(id=1), SimpleNamespace(id=2)]
     fake_db = FakeDB(result_list=fake_reports)
@@ -155,7 +195,7 @@ def test_get_reports_without_status(monkeypatch):
 
     monkeypatch.setattr(moderation, "require_moderator", fake_require_moderator)
 
-    result = moderation.get_reports(status=None, db=fake_db, current_user=current_user)
+    result = moderation.get_reports(status=None, **REPORT_QUERY_DEFAULTS, db=fake_db, current_user=current_user)
     assert result == fake_reports
 
 
@@ -170,7 +210,8 @@ def test_get_reports_with_invalid_status(monkeypatch):
 
     monkeypatch.setattr(moderation, "require_moderator", fake_require_moderator)
 
-    result = moderation.get_reports(status="not-a-real-status", db=fake_db, current_user=current_user)
+    result = moderation.get_reports(status="not-a-real-status", **REPORT_QUERY_DEFAULTS, db=fake_db,
+                                    current_user=current_user)
     assert result == fake_reports
 
 
@@ -289,20 +330,47 @@ def test_get_posts_no_group(fake_posts=None):
     fake_db = FakeDB(result_list=fake_posts)
     current_user = SimpleNamespace(id=1)
 
-    result = posts.get_posts(group_id=None, db=fake_db, current_user=current_user)
+    result = posts.get_posts(
+        response=Response(), group_id=None, limit=None, cursor=None, if_none_match=None,
+        db=fake_db, current_user=current_user,
+    )
     assert result == fake_posts
 
 
-def test_get_posts_with_group():
+def test_get_posts_with_group(monkeypatch):
     fake_posts = [SimpleNamespace(id=10)]
     fake_db = FakeDB(result_list=fake_posts)
     current_user = SimpleNamespace(id=1)
+    monkeypatch.setattr(posts.board_service, "board_version", lambda db, group_id: None)
 
     # Just ensure it runs with a group_id argument
-    result = posts.get_posts(group_id=123, db=fake_db, current_user=current_user)
+    result = posts.get_posts(
+        response=Response(), group_id=123, limit=None, cursor=None, if_none_match=None,
+        db=fake_db, current_user=current_user,
+    )
     assert result == fake_posts
 
 
+def test_get_posts_with_limit_returns_page(monkeypatch):
+    fake_db = FakeDB()
+    current_user = SimpleNamespace(id=1)
+
+    def fake_list_posts_page(db, group_id, limit, cursor):
+        assert db is fake_db
+        assert (group_id, limit, cursor) == (3, 20, "abc")
+        return [], "next"
+
+    monkeypatch.setattr(posts.messaging_service, "list_posts_page", fake_list_posts_page)
+    monkeypatch.setattr(posts.board_service, "board_version", lambda db, group_id: None)
+
+    result = posts.get_posts(
+        response=Response(), group_id=3, limit=20, cursor="abc", if_none_match=None,
+        db=fake_db, current_user=current_user,
+    )
+    assert result.items == []
+    assert result.next_cursor == "next"
+
+
 def test_post_message_calls_service(monkeypatch):
     fake_db = FakeDB()
     current_user = SimpleNamespace(id=1)
@@ -0,0 +1,236 @@
+"""
+Tests for server-side crisis screening of new posts.
+"""
+import socket
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import leases, models, schemas
+from app.config import settings
+from app.db import Base
+from app.services import messaging_service, screening_service
+from app.test.conftest import TestSessionLocal
+from app.test.test_helpers import create_post
+
+
+def _job_for(db, post_id):
+    db.expire_all()
+    return db.query(models.ScreeningJob).filter(models.ScreeningJob.post_id == post_id).one()
+
+
+def _crisis_reports(db, post_id):
+    db.expire_all()
+    return db.query(models.Report).filter(models.Report.post_id == post_id, models.Report.is_crisis.is_(True)).all()
+
+
+@pytest.fixture()
+def file_sessions(tmp_path):
+    """
+    Sessions on a file database for tests with worker threads. The shared
+    in-memory connection would let one thread's rollback undo another's writes.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'screening.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture()
+def service(monkeypatch, file_sessions):
+    """A screening service on its own database, installed as the one post_message submits to."""
+    svc = screening_service.ScreeningService(file_sessions, workers=2, queue_size=10, sweep_seconds=60)
+    monkeypatch.setattr(screening_service, "service", svc)
+    yield svc
+    svc.stop()
+
+
+def _post_message(session_factory, content):
+    db = session_factory()
+    try:
+        author = models.User(display_name="Poster", is_anonymous=False)
+        db.add(author)
+        db.commit()
+        data = schemas.PostCreate(group_id=1, content=content, posttime=1.0)
+        return messaging_service.post_message(db, author, data).id
+    finally:
+        db.close()
+
+
+def test_new_post_is_persisted_for_screening(client, db, auth_headers):
+    post = create_post(client, auth_headers, content="I want to die")
+
+    job = _job_for(db, post["id"])
+    assert job.status == models.ScreeningStatus.PENDING
+    assert _crisis_reports(db, post["id"]) == []
+
+
+def test_screen_job_escalates_crisis_post(client, db, auth_headers, test_user):
+    post = create_post(client, auth_headers, content="Honestly I want to die")
+
+    job = screening_service.screen_job(db, _job_for(db, post["id"]).id)
+
+    assert job.status == models.ScreeningStatus.DONE
+    assert job.escalated is True
+    [report] = _crisis_reports(db, post["id"])
+    assert report.reported_user_id == test_user.id
+    assert report.status == models.ReportStatus.OPEN
+    assert db.query(models.CrisisTicket).filter(models.CrisisTicket.report_id == report.id).count() == 1
+
+
+def test_screen_job_leaves_ordinary_post_alone(client, db, auth_headers):
+    post = create_post(client, auth_headers, content="Pending items for my appointment")
+
+    job = screening_service.screen_job(db, _job_for(db, post["id"]).id)
+
+    assert job.status == models.ScreeningStatus.DONE
+    assert job.escalated is False
+    assert _crisis_reports(db, post["id"]) == []
+
+
+def test_screen_job_claims_each_job_once(client, db, auth_headers):
+    post = create_post(client, auth_headers, content="feeling down")
+    job_id = _job_for(db, post["id"]).id
+
+    assert screening_service.screen_job(db, job_id) is not None
+    assert screening_service.screen_job(db, job_id) is None
+    assert len(_crisis_reports(db, post["id"])) == 1
+
+
+def test_screening_skips_posts_already_escalated(client, db, auth_headers):
+    post = create_post(client, auth_headers, content="kill myself")
+    client.post("/crisis/escalate", json={"post_id": post["id"], "content_snip": "kill myself"}, headers=auth_headers)
+
+    job = screening_service.screen_job(db, _job_for(db, post["id"]).id)
+
+    assert job.escalated is False
+    assert len(_crisis_reports(db, post["id"])) == 1
+
+
+def test_screening_skips_deleted_posts(client, db, auth_headers):
+    post = create_post(client, auth_headers, content="suicidal")
+    client.delete(f"/posts/{post['id']}", headers=auth_headers)
+
+    job = screening_service.screen_job(db, _job_for(db, post["id"]).id)
+
+    assert job.escalated is False
+    assert _crisis_reports(db, post["id"]) == []
+
+
+def test_record_failure_retries_until_attempts_run_out(client, db, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "SCREENING_MAX_ATTEMPTS", 2)
+    post = create_post(client, auth_headers, content="suicide")
+    job = _job_for(db, post["id"])
+
+    job.attempts = 1
+    db.commit()
+    screening_service.record_failure(db, job.id, RuntimeError("boom"))
+    assert _job_for(db, post["id"]).status == models.ScreeningStatus.PENDING
+
+    job.attempts = 2
+    db.commit()
+    screening_service.record_failure(db, job.id, RuntimeError("boom"))
+    job = _job_for(db, post["id"])
+    assert job.status == models.ScreeningStatus.FAILED
+    assert "boom" in job.last_error
+
+
+def test_running_service_screens_new_posts(service, file_sessions):
+    service.start()
+    post_ids = [_post_message(file_sessions, content) for content in ("I just want to end it all", "Nice day", "suicidal")]
+    service.join()
+
+    db = file_sessions()
+    try:
+        assert [_job_for(db, post_id).status for post_id in post_ids] == [models.ScreeningStatus.DONE] * 3
+        assert [len(_crisis_reports(db, post_id)) for post_id in post_ids] == [1, 0, 1]
+    finally:
+        db.close()
+
+
+def test_full_queue_defers_to_backlog_then_sweeps(client, db, auth_headers, monkeypatch):
+    svc = screening_service.ScreeningService(TestSessionLocal, workers=0, queue_size=1, sweep_seconds=60)
+    monkeypatch.setattr(screening_service, "service", svc)
+    svc.running = True  # Accept submissions without threads so the queue stays full
+    deferred_before = screening_service.jobs_deferred.value
+
+    first = create_post(client, auth_headers, content="want to die")
+    second = create_post(client, auth_headers, content="feeling down")
+
+    assert svc.queue_depth == 1
+    assert screening_service.jobs_deferred.value == deferred_before + 1
+    assert _job_for(db, second["id"]).status == models.ScreeningStatus.PENDING
+    assert svc.sweep() == 0
+
+    queued = svc._queue.get_nowait()
+    assert queued == _job_for(db, first["id"]).id
+    screening_service.screen_job(db, queued)
+    svc._queued.discard(queued)
+    assert svc.sweep() == 1
+    assert svc._queue.get_nowait() == _job_for(db, second["id"]).id
+
+
+def test_start_requeues_jobs_left_running(service, file_sessions):
+    post_id = _post_message(file_sessions, "harm myself")
+    db = file_sessions()
+    try:
+        _job_for(db, post_id).status = models.ScreeningStatus.RUNNING
+        db.commit()
+
+        service.start()
+        service.sweep()
+        service.join()
+
+        assert _job_for(db, post_id).status == models.ScreeningStatus.DONE
+        assert len(_crisis_reports(db, post_id)) == 1
+    finally:
+        db.close()
+
+
+def test_reclaim_leaves_jobs_other_live_processes_hold(service, file_sessions, monkeypatch):
+    monkeypatch.setattr(leases, "process_alive", lambda pid: pid != 4242)
+    host = socket.gethostname()
+    now = screening_service._now()
+    claims = {
+        "live sibling": (f"{host}:4343", now),
+        "dead sibling": (f"{host}:4242", now),
+        "expired lease": (f"{host}:4343", now - settings.SCREENING_LEASE_SECONDS - 1),
+        "other host": ("elsewhere:4242", now),
+    }
+    db = file_sessions()
+    try:
+        job_ids = {}
+        for name, (claimed_by, claimed_at) in claims.items():
+            job = _job_for(db, _post_message(file_sessions, name))
+            job.status = models.ScreeningStatus.RUNNING
+            job.claimed_by, job.claimed_at = claimed_by, claimed_at
+            db.commit()
+            job_ids[name] = job.id
+
+        assert sorted(service.reclaim()) == sorted([job_ids["dead sibling"], job_ids["expired lease"]])
+        db.expire_all()
+        statuses = {name: db.get(models.ScreeningJob, job_id).status for name, job_id in job_ids.items()}
+        assert statuses == {
+            "live sibling": models.ScreeningStatus.RUNNING,
+            "dead sibling": models.ScreeningStatus.PENDING,
+            "expired lease": models.ScreeningStatus.PENDING,
+            "other host": models.ScreeningStatus.RUNNING,
+        }
+    finally:
+        db.close()
+
+
+def test_claim_records_owner(client, db, auth_headers):
+    post = create_post(client, auth_headers, content="hello")
+    job = screening_service.screen_job(db, _job_for(db, post["id"]).id)
+    assert job.claimed_by == leases.owner_id()
+    assert job.claimed_at is not None
+
+
+def test_screening_stats_requires_moderator(client, auth_headers, mod_auth_headers):
+    assert client.get("/moderation/screening", headers=auth_headers).status_code == 403
+
+    response = client.get("/moderation/screening", headers=mod_auth_headers)
+    assert response.status_code == 200
+    assert response.json()["queue_capacity"] == settings.SCREENING_QUEUE_SIZE
@@ -0,0 +1,139 @@
+"""
+Tests for full-text post search.
+"""
+import pytest
+
+from app import models
+from app.services import search_service
+from app.test.test_helpers import walk_pages
+
+
+def _post(db, author, content, group_id=1, status=models.PostStatus.ACTIVE):
+    post = models.Post(author_id=author.id, group_id=group_id, content=content, status=status, created_at=1.0)
+    db.add(post)
+    db.commit()
+    return post
+
+
+def _search(client, headers, query):
+    response = client.get(f"/posts/search?{query}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_search_finds_matching_posts(client, db, auth_headers, test_user):
+    _post(db, test_user, "Managing insulin before exercise")
+    _post(db, test_user, "Great weather today")
+
+    page = _search(client, auth_headers, "q=insulin")
+    assert [p["content"] for p in page["items"]] == ["Managing insulin before exercise"]
+    assert page["items"][0]["author"]["display_name"] == "Test User"
+
+
+def test_search_requires_every_word(client, db, auth_headers, test_user):
+    _post(db, test_user, "insulin pump tips")
+    _post(db, test_user, "insulin pen tips")
+
+    assert len(_search(client, auth_headers, "q=insulin pump")["items"]) == 1
+    assert len(_search(client, auth_headers, "q=Insulin TIPS")["items"]) == 2
+
+
+def test_search_ranks_better_matches_first(client, db, auth_headers, test_user):
+    _post(db, test_user, "pain once in a long post about many other things entirely")
+    _post(db, test_user, "pain pain pain")
+
+    page = _search(client, auth_headers, "q=pain")
+    assert page["items"][0]["content"] == "pain pain pain"
+
+
+def test_search_filters_by_board(client, db, auth_headers, test_user):
+    _post(db, test_user, "asthma inhaler", group_id=1)
+    _post(db, test_user, "asthma inhaler", group_id=2)
+
+    page = _search(client, auth_headers, "q=inhaler&group_id=2")
+    assert [p["group_id"] for p in page["items"]] == [2]
+
+
+def test_search_excludes_deleted_posts(client, db, auth_headers, test_user):
+    post = _post(db, test_user, "arthritis flare")
+    _post(db, test_user, "hidden arthritis", status=models.PostStatus.DELETED)
+
+    assert len(_search(client, auth_headers, "q=arthritis")["items"]) == 1
+
+    assert client.delete(f"/posts/{post.id}", headers=auth_headers).status_code == 200
+    assert _search(client, auth_headers, "q=arthritis")["items"] == []
+
+
+def test_search_sees_new_posts_from_api(client, auth_headers):
+    client.post("/posts/", json={"group_id": 1, "content": "fresh cardiology question", "posttime": 1.0},
+                headers=auth_headers)
+    assert len(_search(client, auth_headers, "q=cardiology")["items"]) == 1
+
+
+def test_search_cursor_paging_visits_each_match_once(client, db, auth_headers, test_user):
+    for i in range(7):
+        _post(db, test_user, "migraine " * (i + 1))
+
+    seen = walk_pages(client, auth_headers, "/posts/search", "q=migraine&limit=3")
+
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+
+
+@pytest.mark.parametrize("q", ['"unbalanced', "NEAR(", "a OR b", "col:value", "*"])
+def test_search_treats_operators_as_text(client, db, auth_headers, test_user, q):
+    _post(db, test_user, "plain text")
+    response = client.get("/posts/search", params={"q": q}, headers=auth_headers)
+    assert response.status_code == 200
+
+
+def test_search_ranks_newest_candidates_first(db, test_user, monkeypatch):
+    from app.config import settings
+
+    posts = [_post(db, test_user, "lupus") for _ in range(5)]
+    monkeypatch.setattr(settings, "SEARCH_CANDIDATE_LIMIT", 3)
+
+    items, next_cursor = search_service.search_posts(db, "lupus", limit=3)
+    assert {p.id for p in items} == {p.id for p in posts[-3:]}
+    assert next_cursor is not None
+
+
+def test_search_pages_past_the_candidate_window(client, db, auth_headers, test_user, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "SEARCH_CANDIDATE_LIMIT", 4)
+    posts = [_post(db, test_user, "common " * (i % 3 + 1)) for i in range(11)]
+
+    seen, cursor = [], None
+    while True:
+        query = "q=common&limit=3" + (f"&cursor={cursor}" if cursor else "")
+        page = _search(client, auth_headers, query)
+        seen.extend(p["id"] for p in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+        # A new match between pages lands above every window already handed out
+        _post(db, test_user, "common common common")
+
+    assert sorted(seen) == [p.id for p in posts]
+
+
+def test_tokenize_folds_case_and_diacritics_like_the_index(db, test_user):
+    assert search_service.tokenize("Café NAÏVE_day, 2nd") == ["cafe", "naive", "day", "2nd"]
+
+    _post(db, test_user, "Café visit")
+    assert len(search_service.search_posts(db, "cafe")[0]) == 1
+
+
+def test_search_blank_query_rejected(client, auth_headers):
+    assert client.get("/posts/search", params={"q": "   "}, headers=auth_headers).status_code == 400
+
+
+def test_rebuild_index_restores_missing_entries(db, test_user):
+    _post(db, test_user, "kidney stones")
+    db.connection().exec_driver_sql("INSERT INTO posts_fts(posts_fts) VALUES('delete-all')")
+    db.commit()
+    assert search_service.search_posts(db, "kidney")[0] == []
+
+    assert search_service.rebuild_index(db) == 1
+    assert len(search_service.search_posts(db, "kidney")[0]) == 1
@@ -327,24 +327,20 @@ def test_determine_action_crisis_report_ban_raises():
     assert "Crisis reports can only use 'Delete Post' or 'Dismiss'" in str(exc.value.detail)
 
 
-def test_determine_action_crisis_report_delete_post_allowed():
-    """Crisis reports can use delete_post to remove the crisis content"""
-    post = models.Post()
-    post.id = 5
-    post.status = models.PostStatus.ACTIVE
-    
-    report = models.Report()
-    report.id = 1
-    report.is_crisis = True
-    report.status = models.ReportStatus.OPEN
-    report.resolution_impact = None
-    report.reported_user_id = None
-    report.post_id = 5
-    db = FakeSession({models.Report: [report], models.Post: [post], models.AuditLogEntry: []})
-    moderator = SimpleNamespace(id=1)
-    data = SimpleNamespace(action="delete_post", report_id=1, mod_note="Removing crisis content")
+# determine_action closes the report with a conditional UPDATE, so these run on the test database
 
-    result = moderation_service.determine_action(db, moderator, data)
+def test_determine_action_crisis_report_delete_post_allowed(db, test_user, test_moderator):
+    """Crisis reports can use delete_post to remove the crisis content"""
+    post = models.Post(author_id=test_user.id, group_id=1, content="crisis", status=models.PostStatus.ACTIVE)
+    db.add(post)
+    db.commit()
+    report = models.Report(reporting_user_id=test_user.id, post_id=post.id, is_crisis=True,
+                           reason=models.ReportReason.CRISIS, status=models.ReportStatus.OPEN, created_at=1.0)
+    db.add(report)
+    db.commit()
+    data = SimpleNamespace(action="delete_post", report_id=report.id, mod_note="Removing crisis content")
+
+    result = moderation_service.determine_action(db, test_moderator, data)
     assert result.status == models.ReportStatus.RESOLVED
     assert result.resolution_impact == "post_deleted"
     assert post.status == models.PostStatus.DELETED
@@ -369,51 +365,37 @@ def test_determine_action_crisis_report_warn_raises():
     assert "Crisis reports can only use 'Delete Post' or 'Dismiss'" in str(exc.value.detail)
 
 
-def test_determine_action_crisis_report_dismiss_allowed():
+def test_determine_action_crisis_report_dismiss_allowed(db, test_user, test_moderator):
     """Crisis reports can be dismissed"""
-    report = models.Report()
-    report.id = 1
-    report.is_crisis = True
-    report.status = models.ReportStatus.OPEN
-    report.resolution_impact = None
-    report.reported_user_id = None
-    db = FakeSession({models.Report: [report], models.AuditLogEntry: []})
-    moderator = SimpleNamespace(id=1)
-    data = SimpleNamespace(action="dismiss", report_id=1, mod_note=None)
+    report = models.Report(reporting_user_id=test_user.id, is_crisis=True, reason=models.ReportReason.CRISIS,
+                           status=models.ReportStatus.OPEN, created_at=1.0)
+    db.add(report)
+    db.commit()
+    data = SimpleNamespace(action="dismiss", report_id=report.id, mod_note=None)
 
-    result = moderation_service.determine_action(db, moderator, data)
+    result = moderation_service.determine_action(db, test_moderator, data)
     assert result.status == models.ReportStatus.DISMISSED
     assert result.resolution_impact == "dismiss"
 
 
-def test_determine_action_ban_resolves_report_and_bans_user():
-    report = models.Report()
-    report.id = 1
-    report.is_crisis = False
-    report.status = models.ReportStatus.OPEN
-    report.resolution_impact = None
-    report.reported_user_id = 10
-
-    user = models.User()
-    user.id = 10
-    user.is_banned = False
-
-    db = FakeSession({
-        models.Report: [report],
-        models.User: [user],
-        models.AuditLogEntry: [],
-    })
-
-    moderator = SimpleNamespace(id=1)
-    data = SimpleNamespace(action="ban", report_id=1, mod_note="bad behavior")
+def test_determine_action_ban_resolves_report_and_bans_user(db, test_user, test_moderator):
+    user = models.User(display_name="Reported", is_anonymous=False, is_banned=False)
+    db.add(user)
+    db.commit()
+    report = models.Report(reporting_user_id=test_user.id, reported_user_id=user.id, is_crisis=False,
+                           reason=models.ReportReason.SPAM, status=models.ReportStatus.OPEN, created_at=1.0)
+    db.add(report)
+    db.commit()
+    data = SimpleNamespace(action="ban", report_id=report.id, mod_note="bad behavior")
 
-    result = moderation_service.determine_action(db, moderator, data)
+    result = moderation_service.determine_action(db, test_moderator, data)
 
     assert result is report
     assert report.status == models.ReportStatus.RESOLVED
     assert report.resolution_impact == "ban"
+    db.refresh(user)
     assert user.is_banned is True
-    assert len(db.data[models.AuditLogEntry]) == 1
+    assert db.query(models.AuditLogEntry).filter(models.AuditLogEntry.target_id == report.id).count() == 1
 
 
 def test_moderation_delete_post_not_found_raises():
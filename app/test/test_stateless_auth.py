@@ -0,0 +1,117 @@
+"""
+Tests for stateless auth: claim-bearing access tokens and rotating refresh tokens.
+"""
+import pytest
+
+from app import models
+from app.config import settings
+from app.principals import principal_cache
+from app.services import token_service
+
+
+@pytest.fixture()
+def stateless(monkeypatch):
+    monkeypatch.setattr(settings, "STATELESS_AUTH", True)
+
+
+def _login(client, email="testuser@example.com"):
+    response = client.post("/accounts/login", json={"email": email, "password": "testpassword"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _headers(tokens):
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def _refresh(client, tokens):
+    return client.post("/accounts/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+
+def _post(client, tokens):
+    return client.post("/posts/", json={"group_id": 1, "content": "hello", "posttime": 1.0}, headers=_headers(tokens))
+
+
+def test_session_mode_issues_no_refresh_token(client, test_user):
+    tokens = _login(client)
+
+    assert tokens["refresh_token"] is None
+    assert tokens["expires_in"] is None
+
+
+def test_login_issues_short_lived_token_and_refresh_token(client, db, test_user, stateless):
+    tokens = _login(client)
+
+    assert tokens["expires_in"] == settings.CLAIMS_TOKEN_EXPIRE_MINUTES * 60
+    assert tokens["refresh_token"]
+    stored = db.query(models.RefreshToken).one()
+    assert stored.user_id == test_user.id
+    assert stored.token_hash != tokens["refresh_token"]
+
+
+def test_claims_authorize_without_user_lookup(client, test_user, stateless):
+    tokens = _login(client)
+    principal_cache.clear()
+
+    response = client.get("/boards/stats", headers=_headers(tokens))
+
+    assert response.status_code == 200
+    assert len(principal_cache) == 0
+
+
+def test_moderator_claim_passes_require_moderator(client, test_user, test_moderator, stateless):
+    assert client.get("/moderation/screening", headers=_headers(_login(client))).status_code == 403
+    assert client.get("/moderation/screening", headers=_headers(_login(client, "testmod@example.com"))).status_code == 200
+
+
+def test_expired_claims_token_is_rejected(client, db, test_user, stateless, monkeypatch):
+    monkeypatch.setattr(settings, "CLAIMS_TOKEN_EXPIRE_MINUTES", -1)
+    token = token_service.create_claims_token(db, test_user)
+
+    response = client.get("/boards/stats", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 401
+
+
+def test_refresh_rotates_tokens(client, test_user, stateless):
+    tokens = _login(client)
+
+    response = _refresh(client, tokens)
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert client.get("/boards/stats", headers=_headers(rotated)).status_code == 200
+
+    assert _refresh(client, rotated).status_code == 200
+
+
+def test_reused_refresh_token_revokes_family(client, test_user, stateless):
+    tokens = _login(client)
+    rotated = _refresh(client, tokens).json()
+
+    assert _refresh(client, tokens).status_code == 401
+    assert _refresh(client, rotated).status_code == 401
+
+
+def test_unknown_refresh_token_is_rejected(client, stateless):
+    assert client.post("/accounts/refresh", json={"refresh_token": "nope"}).status_code == 401
+
+
+def test_ban_reaches_token_on_refresh(client, db, test_user, stateless):
+    tokens = _login(client)
+    test_user.is_banned = True
+    db.commit()
+
+    # The access token keeps its claims until it expires...
+    assert _post(client, tokens).status_code == 200
+    # ...and the next one carries the ban
+    assert _post(client, _refresh(client, tokens).json()).status_code == 403
+
+
+def test_deleting_account_revokes_refresh_tokens(client, test_user, stateless):
+    tokens = _login(client)
+
+    response = client.request("DELETE", "/accounts/me/", json={"reason": "leaving"}, headers=_headers(tokens))
+    assert response.status_code == 200
+
+    assert _refresh(client, tokens).status_code == 401
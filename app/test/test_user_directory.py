@@ -0,0 +1,69 @@
+"""
+Tests for the paged user directory.
+"""
+from app import models
+from app.test.test_helpers import walk_pages
+
+
+def _users(db, names, **fields):
+    users = [models.User(display_name=name, is_anonymous=False, **fields) for name in names]
+    db.add_all(users)
+    db.commit()
+    return [user.id for user in users]
+
+
+def _get(client, headers, query=""):
+    response = client.get(f"/accounts/?{query}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_pages_walk_directory_by_name(client, db, auth_headers):
+    _users(db, ["carol", "Bob", "alice", "Dave", "bob"])
+
+    names = walk_pages(client, auth_headers, "/accounts/", "limit=2", field="display_name")
+
+    assert names == ["alice", "Bob", "bob", "carol", "Dave", "Test User"]
+
+
+def test_prefix_search_is_case_insensitive(client, db, auth_headers):
+    _users(db, ["Alice", "alex", "Albert", "Bob", "Al"])
+
+    assert walk_pages(client, auth_headers, "/accounts/", "q=AL&limit=2", field="display_name") == \
+        ["Al", "Albert", "alex", "Alice"]
+    assert walk_pages(client, auth_headers, "/accounts/", "q=ale", field="display_name") == ["alex"]
+    assert _get(client, auth_headers, "q=zz")["items"] == []
+
+
+def test_prefix_ending_at_the_edge_of_unicode(client, db, auth_headers):
+    _users(db, ["a\ud7ffb", "a\ue000", "z\U0010ffffx", "z"])
+
+    def search(q):
+        response = client.get("/accounts/", params={"q": q}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        return [user["display_name"] for user in response.json()["items"]]
+
+    # U+D7FF is followed by the surrogates, U+10FFFF by nothing
+    assert search("a\ud7ff") == ["a\ud7ffb"]
+    assert search("z\U0010ffff") == ["z\U0010ffffx"]
+
+
+def test_excludes_anonymous_and_inactive_users(client, db, auth_headers):
+    _users(db, ["Listed"])
+    db.add_all([
+        models.User(display_name="Hidden", is_anonymous=True),
+        models.User(display_name="Deleted User", is_anonymous=False, is_active=False),
+    ])
+    db.commit()
+
+    names = walk_pages(client, auth_headers, "/accounts/", "limit=10", field="display_name")
+    assert names == ["Listed", "Test User"]
+
+
+def test_page_size_is_capped(client, auth_headers):
+    response = client.get("/accounts/?limit=100000", headers=auth_headers)
+    assert response.status_code == 422
+
+
+def test_requires_authentication(client):
+    assert client.get("/accounts/").status_code == 401
@@ -0,0 +1,90 @@
+"""
+Benchmark audit logging against a file-backed SQLite database.
+
+Runs the same number of small transactions from several threads, each
+logging one audit entry, once with the entry inserted inline and once
+through the write-behind writer, and reports per-transaction latency.
+
+Usage:
+    python -m benchmarks.bench_audit_writes [--transactions 1000] [--threads 8]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.config import settings
+from app.db import Base
+from app.services import audit_service
+
+
+def run(session_factory, transactions, threads):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(count):
+        local = []
+        for i in range(count):
+            db = session_factory()
+            try:
+                started = time.perf_counter()
+                db.add(models.ScreeningJob(post_id=i, created_at=0.0, updated_at=0.0))
+                audit_service.record(db, actor_id=None, action_type="bench", target_type="Post", target_id=i)
+                db.commit()
+                local.append(time.perf_counter() - started)
+            finally:
+                db.close()
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(transactions // threads,)) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - started, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    for name, buffered in (("inline", False), ("write-behind", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                                   connect_args={"check_same_thread": False, "timeout": 30})
+            Base.metadata.create_all(bind=engine)
+            session_factory = sessionmaker(bind=engine)
+            writer = audit_service.AuditWriter(
+                session_factory,
+                batch_size=settings.AUDIT_BATCH_SIZE,
+                flush_seconds=settings.AUDIT_FLUSH_SECONDS,
+                max_pending=settings.AUDIT_MAX_PENDING,
+            )
+            audit_service.writer = writer
+            if buffered:
+                writer.start()
+            try:
+                elapsed, latencies = run(session_factory, args.transactions, args.threads)
+            finally:
+                writer.stop()
+                db = session_factory()
+                written = db.query(models.AuditLogEntry).count()
+                db.close()
+                engine.dispose()
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{name:>12}: {len(latencies)} transactions in {elapsed * 1000:.0f} ms, "
+              f"p95 {p95 * 1000:.2f} ms, {written} audit rows")
+
+
+if __name__ == "__main__":
+    main()
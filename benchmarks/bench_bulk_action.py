@@ -0,0 +1,77 @@
+"""
+Benchmark dismissing a spam wave against a file-backed SQLite database.
+
+Compares one determine_action call per report with a single bulk_action
+over the same reports.
+
+Usage:
+    python -m benchmarks.bench_bulk_action [--reports 300]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, schemas
+from app.db import Base
+from app.services import moderation_service
+
+
+def seed(session_factory, count):
+    db = session_factory()
+    try:
+        moderator = models.User(display_name="Mod", is_anonymous=False, role=models.UserRole.MODERATOR)
+        spammer = models.User(display_name="Spammer", is_anonymous=False)
+        db.add_all([moderator, spammer])
+        db.flush()
+        reports = [
+            models.Report(reporting_user_id=moderator.id, reported_user_id=spammer.id,
+                          reason=models.ReportReason.SPAM, created_at=float(i))
+            for i in range(count)
+        ]
+        db.add_all(reports)
+        db.commit()
+        return moderator.id, [report.id for report in reports]
+    finally:
+        db.close()
+
+
+def one_by_one(db, moderator, report_ids):
+    for report_id in report_ids:
+        data = schemas.DetermineActionInput(report_id=report_id, action="dismiss", mod_note="spam wave")
+        moderation_service.determine_action(db, moderator, data)
+
+
+def in_bulk(db, moderator, report_ids):
+    data = schemas.BulkActionInput(action="dismiss", report_ids=report_ids, mod_note="spam wave")
+    moderation_service.bulk_action(db, moderator, data)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=300)
+    args = parser.parse_args()
+
+    for name, apply in (("determine_action each", one_by_one), ("bulk_action", in_bulk)):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(bind=engine)
+            session_factory = sessionmaker(bind=engine)
+            moderator_id, report_ids = seed(session_factory, args.reports)
+            db = session_factory()
+            try:
+                moderator = db.get(models.User, moderator_id)
+                started = time.perf_counter()
+                apply(db, moderator, report_ids)
+                elapsed = time.perf_counter() - started
+            finally:
+                db.close()
+                engine.dispose()
+        print(f"{name:>22}: {args.reports} reports in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark crisis keyword detection: per-keyword substring scan vs the compiled matcher.
+
+Usage:
+    python -m benchmarks.bench_crisis
+"""
+import random
+import timeit
+
+from app.constants import CRISIS_KEYWORDS
+from app.keyword_matcher import KeywordMatcher
+
+POST_WORDS = (
+    "today was hard but the new medication seems to help a little and my doctor adjusted the dose "
+    "again after the last appointment I have been sleeping better although the pain in my joints "
+    "flares up in the evenings thanks everyone for the support it really means a lot to hear from "
+    "people who understand what this is like week month family work tired hopeful"
+).split()
+
+SIZES = {"short (~100 chars)": 18, "typical (~600 chars)": 110, "long (~3000 chars)": 550}
+
+
+def substring_scan(keywords):
+    """The previous detect_crisis: one `in` per keyword over the lowercased post."""
+    def detect(content):
+        content_lower = content.lower()
+        return any(keyword in content_lower for keyword in keywords)
+    return detect
+
+
+def grown_keyword_list(count, rng):
+    """Phrases of one to four words that never occur in POST_WORDS, so every post is a full scan."""
+    syllables = ["ka", "zu", "mor", "vel", "tri", "quo", "xan", "ep", "lio", "dra"]
+    phrases = set(CRISIS_KEYWORDS)
+    while len(phrases) < count:
+        words = ["".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(rng.randint(1, 4))]
+        phrases.add(" ".join(words))
+    return sorted(phrases)
+
+
+def main():
+    rng = random.Random(8)
+    posts = {label: [" ".join(rng.choices(POST_WORDS, k=words)) for _ in range(200)] for label, words in SIZES.items()}
+    for keyword_count in (len(CRISIS_KEYWORDS), 100, 500):
+        keywords = grown_keyword_list(keyword_count, rng)
+        matcher = KeywordMatcher(keywords)
+        implementations = {"substring scan": substring_scan(keywords), "compiled matcher": matcher.search}
+        print(f"{keyword_count} keywords")
+        for label, batch in posts.items():
+            for name, detect in implementations.items():
+                seconds = min(timeit.repeat(lambda: [detect(post) for post in batch], number=10, repeat=5))
+                print(f"  {label:<22} {name:<17} {seconds / (10 * len(batch)) * 1e6:8.1f} us/post")
+
+
+if __name__ == "__main__":
+    main()
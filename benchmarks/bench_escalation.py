@@ -0,0 +1,102 @@
+"""
+Benchmark crisis escalation against a file-backed SQLite database.
+
+Compares the current single-transaction crisis_service.escalate_crisis with
+the previous version, kept here as a baseline, which committed the report,
+the ticket and the audit entry separately.
+
+Usage:
+    python -m benchmarks.bench_escalation [--runs 500]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, schemas
+from app.db import Base
+from app.services import crisis_service
+
+
+def escalate_crisis_three_commits(db, data, current_user):
+    """escalate_crisis before it became one transaction."""
+    report = models.Report(
+        reporting_user_id=current_user.id,
+        reported_user_id=current_user.id,
+        post_id=data.post_id,
+        reason=models.ReportReason.CRISIS,
+        details=data.content_snip[:200] if data.content_snip else "Crisis detected in content",
+        is_crisis=True,
+        status=models.ReportStatus.OPEN,
+        created_at=datetime.now().timestamp(),
+    )
+    db.add(report)
+    db.commit()
+    db.refresh(report)
+
+    ticket = models.CrisisTicket(user_id=current_user.id, report_id=report.id)
+    db.add(ticket)
+    db.commit()
+    db.refresh(ticket)
+
+    details = data.content_snip[:100] if data.content_snip else "Crisis escalation without content details"
+    audit = models.AuditLogEntry(
+        actor_id=current_user.id,
+        action_type="crisis_escalation",
+        target_type="CrisisTicket",
+        target_id=ticket.id,
+        details=details,
+    )
+    db.add(audit)
+    db.commit()
+    return ticket
+
+
+def measure(session_factory, escalate, user_id, runs):
+    data = schemas.CrisisEscalationInput(post_id=1, content_snip="I don't want to be here anymore")
+    samples = []
+    db = session_factory()
+    try:
+        user = db.get(models.User, user_id)
+        for _ in range(runs):
+            start = time.perf_counter()
+            ticket = escalate(db, data, user)
+            # The endpoint reads these back for its response
+            ticket.id, ticket.status
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        db.close()
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=500)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_escalation.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with session_factory() as db:
+        user = models.User(display_name="Bench", is_anonymous=False)
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    implementations = {
+        "three commits (before)": escalate_crisis_three_commits,
+        "one transaction (after)": crisis_service.escalate_crisis,
+    }
+    for label, escalate in implementations.items():
+        median, p95 = measure(session_factory, escalate, user_id, args.runs)
+        print(f"{label:<26} median {median:7.2f} ms   p95 {p95:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark read latency during a burst of logins.
+
+Fires concurrent logins at the app while a reader polls /boards/stats,
+once with bcrypt on the request threadpool with no limit (the previous
+behaviour) and once through the bounded hashing pool. Runs against a
+file-backed SQLite database.
+
+Usage:
+    python -m benchmarks.bench_login_burst [--logins 60] [--clients 32]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_login.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import models  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.db import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import auth_service, hashing_service  # noqa: E402
+
+
+def seed():
+    db = SessionLocal()
+    try:
+        if not db.query(models.User).filter(models.User.email == "bench@example.com").first():
+            db.add(models.User(email="bench@example.com", hashed_password=auth_service.hash_password("benchpass"),
+                               display_name="Bench", is_anonymous=False, role=models.UserRole.USER, is_active=True))
+            db.commit()
+    finally:
+        db.close()
+
+
+def burst(client, logins, clients):
+    token = client.post("/accounts/login", json={"email": "bench@example.com", "password": "benchpass"}).json()
+    headers = {"Authorization": f"Bearer {token['access_token']}"}
+    latencies, statuses, done = [], [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            started = time.perf_counter()
+            client.get("/boards/stats", headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.01)
+
+    def login(_):
+        response = client.post("/accounts/login", json={"email": "bench@example.com", "password": "benchpass"})
+        statuses.append(response.status_code)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        list(executor.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    reader.join()
+    latencies.sort()
+    return {
+        "reads": len(latencies),
+        "read_p50_ms": statistics.median(latencies),
+        "read_p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "logins_ok": statuses.count(200),
+        "logins_429": statuses.count(429),
+        "burst_seconds": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=60)
+    parser.add_argument("--clients", type=int, default=32)
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        seed()
+        unbounded = hashing_service.HashingPool(workers=0, queue_limit=args.logins + 1)
+        bounded = hashing_service.HashingPool(
+            workers=settings.PASSWORD_HASH_WORKERS, queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT)
+        for name, pool in (("threadpool, unbounded", unbounded), ("process pool, bounded", bounded)):
+            hashing_service.pool = pool
+            try:
+                result = burst(client, args.logins, args.clients)
+            finally:
+                pool.shutdown()
+            print(f"{name:>22}: " + ", ".join(
+                f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
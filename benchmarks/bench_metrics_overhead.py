@@ -0,0 +1,68 @@
+"""
+Benchmark the cost of request and SQL instrumentation.
+
+Times record_request for a request that ran a handful of statements, and
+a trivial statement against an in-memory SQLite database with and without
+the timing hooks, and reports the added cost in microseconds.
+
+Usage:
+    python -m benchmarks.bench_metrics_overhead [--iterations 100000] [--statements 5]
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from app import db, instrumentation
+
+
+class _Route:
+    path = "/posts/{post_id}"
+
+
+class _Request:
+    method = "GET"
+    scope = {"route": _Route()}
+
+
+def per_call(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--statements", type=int, default=5)
+    args = parser.parse_args()
+
+    counter = db.StatementCounter()
+    counter.count = args.statements
+    counter.durations = [0.0002] * args.statements
+    request = _Request()
+
+    def record():
+        instrumentation.requests_in_flight.inc()
+        instrumentation.requests_in_flight.dec()
+        instrumentation.record_request(request, 200, 0.004, counter)
+
+    print(f"record_request ({args.statements} statements): {per_call(record, args.iterations):.2f} us per request")
+
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        def statement():
+            connection.exec_driver_sql("SELECT 1")
+
+        with_hooks = per_call(statement, args.iterations)
+        event.remove(Engine, "before_cursor_execute", db._count_statement)
+        event.remove(Engine, "after_cursor_execute", db._time_statement)
+        without_hooks = per_call(statement, args.iterations)
+    print(f"SELECT 1: {without_hooks:.2f} us without hooks, {with_hooks:.2f} us with hooks "
+          f"(+{with_hooks - without_hooks:.2f} us per statement)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark post search latency on a large seeded SQLite database.
+
+Usage:
+    python -m benchmarks.bench_search [--posts 1000000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app import models
+from app.services import search_service
+
+TOPIC_WORDS = (
+    "insulin glucose pump diet exercise sleep pain flare fatigue doctor appointment medication "
+    "inhaler breathing anxiety support family work stress therapy walk weather today feeling better "
+    "worse tired hopeful scan results treatment nurse clinic morning night week month"
+).split()
+
+
+def vocabulary(size=20_000):
+    """Topic words followed by filler words, weighted by a Zipf distribution like natural text."""
+    rng = random.Random(7)
+    filler = {"".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 9))) for _ in range(size)}
+    words = TOPIC_WORDS + sorted(filler - set(TOPIC_WORDS))
+    cumulative, total = [], 0.0
+    for rank in range(1, len(words) + 1):
+        total += 1.0 / rank
+        cumulative.append(total)
+    return words, cumulative
+
+
+def seed(engine, count, batch=50_000):
+    rng = random.Random(411)
+    words, cumulative = vocabulary()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO users (id, display_name, is_anonymous) VALUES (1, 'Bench', 0)")
+        for start in range(0, count, batch):
+            rows = [
+                (
+                    i + 1, 1, rng.randint(1, 8),
+                    " ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(8, 60))),
+                    "ACTIVE", float(i),
+                )
+                for i in range(start, min(start + batch, count))
+            ]
+            conn.exec_driver_sql(
+                "INSERT INTO posts (id, author_id, group_id, content, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"INSERT INTO {search_service.FTS_TABLE}({search_service.FTS_TABLE}) VALUES('optimize')")
+
+
+def timed(fn, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_search.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+
+    start = time.perf_counter()
+    seed(engine, args.posts)
+    print(f"seeded {args.posts} posts in {time.perf_counter() - start:.1f}s")
+
+    db = sessionmaker(bind=engine)()
+    _, cursor = search_service.search_posts(db, "insulin", limit=20)
+    cases = {
+        "rare terms": dict(q="nurse clinic"),
+        "most common term": dict(q="insulin"),
+        "most common term, page 2": dict(q="insulin", cursor=cursor),
+        "common term + board": dict(q="pain", group_id=3),
+        "two common terms": dict(q="insulin glucose"),
+        "no match": dict(q="zzzzzz"),
+    }
+    for label, kwargs in cases.items():
+        median, p95 = timed(lambda: search_service.search_posts(db, limit=20, **kwargs))
+        print(f"{label:<26} median {median:8.2f} ms   p95 {p95:8.2f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
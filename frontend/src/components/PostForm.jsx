@@ -1,6 +1,5 @@
 import { useState } from 'react'
 import { api } from "../services/api" 
-import { detectCrisis } from '../utils/constants'
 import './PostForm.css'
 
 function PostForm({ groupId, onPostCreated, onCancel }) {
@@ -17,30 +16,18 @@ function PostForm({ groupId, onPostCreated, onCancel }) {
       return
     }
 
-    // Check for crisis keywords using centralized utility
-    const isCrisis = detectCrisis(content)
-
     setLoading(true)
     setError(null)
     try {
-      // Create the post first
-      const newPost = await api.createPost({
+      const post = await api.createPost({
         group_id: groupId,
         content: content.trim(),
         posttime: Date.now()
       })
       
-      // If crisis detected, escalate with the post_id so moderators can see the post
-      if (isCrisis) {
-        alert('Crisis detected. Moderators have been alerted and support resources are being prepared.')
-        try {
-          await api.crisisEscalation({
-            content_snip: content,
-            post_id: newPost.id
-          })
-        } catch (err) {
-          console.error('Error escalating crisis:', err)
-        }
+      // The server screens every new post and alerts moderators; only its match is trusted here
+      if (post.crisis_detected) {
+        alert('Crisis detected. Moderators are being alerted and support resources are being prepared.')
       }
       
       setContent('')
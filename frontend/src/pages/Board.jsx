@@ -9,6 +9,8 @@ import './Board.css'
 function Board() {
   const { groupId } = useParams()
   const [posts, setPosts] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState(null)
   const [showPostForm, setShowPostForm] = useState(false)
@@ -41,6 +43,56 @@ function Board() {
     }
   }
 
+  // Live updates for this board. The browser resends Last-Event-ID when it reconnects by itself;
+  // once the ticket has expired the stream is refused, so reconnect with a fresh ticket and pass
+  // the last event id along
+  useEffect(() => {
+    let source = null
+    let retryTimer = null
+    let stopped = false
+    let lastEventId = null
+
+    const track = (handler) => (event) => {
+      if (event.lastEventId) lastEventId = event.lastEventId
+      handler(JSON.parse(event.data))
+    }
+
+    const connect = async () => {
+      try {
+        const { ticket } = await api.getBoardEventsTicket(groupId)
+        if (stopped) return
+        source = new EventSource(api.boardEventsUrl(groupId, ticket, lastEventId))
+      } catch (err) {
+        console.error('Error connecting to board events:', err)
+        if (!stopped) retryTimer = setTimeout(connect, 5000)
+        return
+      }
+      source.addEventListener('post_created', track((post) => {
+        setPosts(prev => prev.some(p => p.id === post.id) ? prev : [post, ...prev])
+      }))
+      source.addEventListener('post_deleted', track(({ id }) => {
+        setPosts(prev => prev.filter(p => p.id !== id))
+      }))
+      // Too far behind to resume; start over from the feed
+      source.addEventListener('reset', () => {
+        lastEventId = null
+        loadPosts()
+      })
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED && !stopped) {
+          retryTimer = setTimeout(connect, 3000)
+        }
+      }
+    }
+
+    connect()
+    return () => {
+      stopped = true
+      clearTimeout(retryTimer)
+      if (source) source.close()
+    }
+  }, [groupId])
+
   //updates post timestamp every minute
   useEffect(() => {
     const interval = setInterval(() => {
@@ -65,19 +117,35 @@ function Board() {
     setLoading(true)
     setError(null)
     try {
-      const data = await api.getPosts(parseInt(groupId))
-      // Sort by created date, newest first (created_at is already a timestamp)
-      const sorted = (data || []).sort((a, b) => (b.created_at || 0) - (a.created_at || 0))
-      setPosts(sorted)
+      // Server returns newest first; older pages are fetched on demand
+      const page = await api.getPostsPage(parseInt(groupId))
+      setPosts(page?.items || [])
+      setNextCursor(page?.next_cursor || null)
     } catch (err) {
       console.error('Error loading posts:', err)
       setError(err.message || 'Failed to load posts')
       setPosts([])
+      setNextCursor(null)
     } finally {
       setLoading(false)
     }
   }
 
+  const loadMorePosts = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const page = await api.getPostsPage(parseInt(groupId), nextCursor)
+      setPosts(prev => [...prev, ...(page?.items || [])])
+      setNextCursor(page?.next_cursor || null)
+    } catch (err) {
+      console.error('Error loading more posts:', err)
+      alert('Failed to load more posts: ' + (err.message || 'Unknown error'))
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handlePostCreated = () => {
     //reloads from the database to get the latest posts
     loadPosts()
@@ -256,6 +324,11 @@ function Board() {
               )}
             </article>
           ))}
+          {nextCursor && (
+            <button className="btn-secondary" onClick={loadMorePosts} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load older posts'}
+            </button>
+          )}
         </div>
       )}
 
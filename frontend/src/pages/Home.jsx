@@ -11,21 +11,11 @@ function Home() {
 
   const loadBoardStats = async () => {
     try {
-      const remoteBoards = await api.getBoards()
-      const stats = await Promise.all(remoteBoards.map(async (board) => {
-        try {
-          const posts = await api.getPosts(board.id)
-          return {
-            ...board,
-            postCount: posts?.length || 0,
-          }
-        } catch (error) {
-          console.error(`Error loading stats for board ${board.id}:`, error)
-          return {
-            ...board,
-            postCount: 0,
-          }
-        }
+      const [remoteBoards, boardStats] = await Promise.all([api.getBoards(), api.getBoardStats()])
+      const countsById = new Map((boardStats || []).map(s => [s.board_id, s.post_count]))
+      const stats = remoteBoards.map(board => ({
+        ...board,
+        postCount: countsById.get(board.id) || 0,
       }))
       setBoards(stats)
     } catch (error) {
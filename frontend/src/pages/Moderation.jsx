@@ -6,7 +6,10 @@ import './Moderation.css'
 
 function Moderation() {
   const [reports, setReports] = useState([])
+  const [summary, setSummary] = useState(null)
+  const [nextCursor, setNextCursor] = useState(null)
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [error, setError] = useState(null)
   const [statusFilter, setStatusFilter] = useState('open')
   const [selectedReport, setSelectedReport] = useState(null)
@@ -17,20 +20,49 @@ function Moderation() {
     loadReports()
   }, [statusFilter])
 
+  const loadSummary = async () => {
+    try {
+      setSummary(await api.getModerationSummary())
+    } catch (err) {
+      console.error('Error loading summary:', err)
+    }
+  }
+
   const loadReports = async () => {
     setLoading(true)
     setError(null)
+    loadSummary()
     try {
-      const data = await api.getReports(statusFilter === 'all' ? null : statusFilter)
-      setReports(data || [])
+      const page = await api.getReportsPage(statusFilter === 'all' ? null : statusFilter, null, reportSort())
+      setReports(page?.items || [])
+      setNextCursor(page?.next_cursor || null)
     } catch (err) {
       console.error('Error loading reports:', err)
       setError(err.message || 'Failed to load reports')
+      setNextCursor(null)
     } finally {
       setLoading(false)
     }
   }
 
+  // Open reports are worked oldest first; everything else reads newest first
+  const reportSort = () => ({ sort: statusFilter === 'open' ? 'oldest' : 'newest' })
+
+  const loadMoreReports = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const page = await api.getReportsPage(statusFilter === 'all' ? null : statusFilter, nextCursor, reportSort())
+      setReports(prev => [...prev, ...(page?.items || [])])
+      setNextCursor(page?.next_cursor || null)
+    } catch (err) {
+      console.error('Error loading more reports:', err)
+      alert('Failed to load more reports: ' + (err.message || 'Unknown error'))
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleDetermineAction = async (reportId, action) => {
     if (!actionReason.trim() && action !== 'dismiss') {
       alert('Please provide a reason for this action')
@@ -87,6 +119,15 @@ function Moderation() {
         </div>
       )}
 
+      {summary && (
+        <div className="moderation-summary">
+          <span><strong>{summary.open}</strong> open</span>
+          <span><strong>{summary.crisis_open}</strong> crisis open</span>
+          <span><strong>{summary.resolved_today}</strong> resolved today</span>
+          <span><strong>{summary.dismissed_today}</strong> dismissed today</span>
+        </div>
+      )}
+
       <div className="moderation-filters">
         <button
           className={`filter-button ${statusFilter === 'all' ? 'active' : ''}`}
@@ -268,6 +309,11 @@ function Moderation() {
               </div>
             </div>
           ))}
+          {nextCursor && (
+            <button className="btn-secondary" onClick={loadMoreReports} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more reports'}
+            </button>
+          )}
         </div>
       )}
     </div>
@@ -100,11 +100,36 @@ export const api = {
     return request(`/posts/${params}`)
   },
 
+  // Get one page of posts; pass the previous page's next_cursor to continue
+  getPostsPage: (groupId = null, cursor = null, limit = 20) => {
+    const params = new URLSearchParams({ limit })
+    if (groupId !== null) params.set('group_id', groupId)
+    if (cursor) params.set('cursor', cursor)
+    return request(`/posts/?${params.toString()}`)
+  },
+
   // Get condition boards
   getBoards: () => {
     return request('/boards/')
   },
 
+  // Get post count and latest post time for every board in one request
+  getBoardStats: () => {
+    return request('/boards/stats')
+  },
+
+  // EventSource can't send the Authorization header, so board streams take a short-lived ticket
+  getBoardEventsTicket: (boardId) => {
+    return request(`/boards/${boardId}/events/ticket`, { method: 'POST' })
+  },
+
+  // URL of a board's event stream; lastEventId resumes a stream opened on a new connection
+  boardEventsUrl: (boardId, ticket, lastEventId = null) => {
+    const params = new URLSearchParams({ ticket })
+    if (lastEventId) params.set('last_event_id', lastEventId)
+    return `${API_BASE_URL}/boards/${boardId}/events?${params.toString()}`
+  },
+
   // Create a new post
   createPost: (data) => {
     return request('/posts/', {
@@ -125,9 +150,12 @@ export const api = {
     return request('/accounts/me/')
   },
 
-  // Get all users (for dev switcher)
-  getUsers: () => {
-    return request('/accounts/')
+  // One page of the user directory (for dev switcher); q is a display name prefix
+  getUsers: ({ q = null, cursor = null, limit = 50 } = {}) => {
+    const params = new URLSearchParams({ limit })
+    if (q) params.set('q', q)
+    if (cursor) params.set('cursor', cursor)
+    return request(`/accounts/?${params.toString()}`)
   },
 
   // Alert mods if crisis
@@ -152,6 +180,17 @@ export const api = {
     return request(`/moderation/reports${params}`)
   },
 
+  getReportsPage: (status = null, cursor = null, { sort = 'newest', limit = 50 } = {}) => {
+    const params = new URLSearchParams({ limit, sort })
+    if (status) params.set('status', status)
+    if (cursor) params.set('cursor', cursor)
+    return request(`/moderation/reports?${params.toString()}`)
+  },
+
+  getModerationSummary: () => {
+    return request('/moderation/summary')
+  },
+
   determineAction: (data) => {
     return request('/moderation/determine-action', {
       method: 'POST',